@@ -26,6 +26,10 @@ app.conf.beat_schedule = {
     #     "task": "dj.teams.tasks.check_and_save_pro_teams",
     #     "schedule": crontab(hour="6"),
     # },
+    "task-crontab-heroes": {
+        "task": "dj.heroes.tasks.task_sync_hero_catalog",
+        "schedule": crontab(minute=0, hour=4),
+    },
     "task-crontab-leagues": {
         "task": "dj.leagues.tasks.check_and_save_leagues_data",
         "schedule": crontab(minute="*/55"),
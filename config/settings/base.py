@@ -1,8 +1,10 @@
 # ruff: noqa: ERA001, E501
 """Base settings to build other settings files upon."""
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import environ
+from kombu import Queue
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # dj/
@@ -269,6 +271,10 @@ LOGGING = {
         },
     },
     "root": {"level": "INFO", "handlers": ["console"]},
+    "loggers": {
+        # httpx logs every request at INFO level
+        "httpx": {"level": "WARNING"},
+    },
 }
 
 # Celery
@@ -307,6 +313,34 @@ CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_BROKER_CONNECTION_RETRY = True
+# Queues: "interactive" for refreshes triggered from the UI (the views pick it explicitly),
+# "ingest-bulk" for crawling and saving, "analytics" for the stats aggregations, and the
+# default "celery" for everything unrouted. A worker started without -Q consumes all of them.
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-routes
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+CELERY_TASK_QUEUES = [Queue(name) for name in ("celery", "interactive", "ingest-bulk", "analytics")]
+CELERY_TASK_ROUTES = {
+    "dj.users.tasks.*": {"queue": "interactive"},
+    "dj.leagues.tasks.*": {"queue": "ingest-bulk"},
+    "dj.matches.tasks.*": {"queue": "ingest-bulk"},
+    "dj.teams.tasks.*": {"queue": "ingest-bulk"},
+    "dj.players.tasks.*": {"queue": "ingest-bulk"},
+    "dj.heroes.tasks.*": {"queue": "ingest-bulk"},
+    "dj.common.tasks.*": {"queue": "ingest-bulk"},
+    "dj.stats.tasks.*": {"queue": "analytics"},
+}
+# Priorities 0 (highest) to 9 on Redis; scheduled work runs at 5 and UI refreshes at 0, which
+# the match batches they queue inherit so that they overtake a running resync.
+# https://docs.celeryq.dev/en/stable/userguide/routing.html#redis-message-priorities
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_INHERIT_PARENT_PRIORITY = True
+# Reserve one message at a time so that priorities apply to what a worker picks next
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -331,4 +365,92 @@ URL_STRATZ = 'https://api.stratz.com/api/v1/'
 TOKEN_STRATZ = (
     '.eyJTdWJqZWN0IjoiYzBkM2RjZjQtNzBlNS00OGUzLWJiYTItNTg5MDA2ZDhhOWRkIiwiU3RlYW1JZCI6IjM0MTY2MDYzIiwibmJmIjoxNzE0NjY1ODE5LCJleHAiOjE3NDYyMDE4MTksImlhdCI6MTcxNDY2NTgxOSwiaXNzIjoiaHR0cHM6Ly9hcGkuc3RyYXR6LmNvbSJ9.Cn9aJFngI7iBDI64-cggOGqb2Ai31NeLJAd3QJtZNzo')
 
+# Base URL of the STRATZ REST API; point at serve_stratz_fixtures to replay recorded responses
+STRATZ_API_URL = env("STRATZ_API_URL", default="https://api.stratz.com/api/v1")
+# Outbound HTTP client (dj.common.http)
+# https://requests.readthedocs.io/en/latest/user/advanced/#timeouts
+HTTP_POOL_SIZE = env.int("HTTP_POOL_SIZE", default=20)
+HTTP_CONNECT_TIMEOUT = env.float("HTTP_CONNECT_TIMEOUT", default=5.0)
+HTTP_READ_TIMEOUT = env.float("HTTP_READ_TIMEOUT", default=30.0)
+# https://www.python-httpx.org/http2/
+HTTP_USE_HTTP2 = env.bool("HTTP_USE_HTTP2", default=False)
+# Requests kept in flight by the asyncio fetch stage (dj.common.async_fetch)
+HTTP_ASYNC_CONCURRENCY = env.int("HTTP_ASYNC_CONCURRENCY", default=100)
+# On-disk response cache (dj.common.http_cache)
+HTTP_CACHE_ENABLED = env.bool("HTTP_CACHE_ENABLED", default=True)
+HTTP_CACHE_DIR = env("HTTP_CACHE_DIR", default=str(BASE_DIR / ".cache" / "http"))
+HTTP_CACHE_MAX_BYTES = env.int("HTTP_CACHE_MAX_BYTES", default=2 * 1024 ** 3)
+# (url regex, ttl in seconds), first match wins; None caches forever,
+# URLs matching no rule are never cached.
+HTTP_CACHE_TTLS = [
+    (r"/match/\d+$", None),
+    (r"/league/\d+/(matches|series)", 5 * 60),
+    (r"/league\?", 60 * 60),
+    (r"/player/", 60 * 60),
+    (r"/team/", 60 * 60),
+    (r"/Hero$", 24 * 60 * 60),
+]
+# JSON schema validation of API responses (dj.common.utils.validate_json):
+# "full", "sample" (top level + a sample of list items) or "top" (top level only)
+JSON_VALIDATION_MODE = env("JSON_VALIDATION_MODE", default="full")
+JSON_VALIDATION_BULK_MODE = env("JSON_VALIDATION_BULK_MODE", default="sample")
+JSON_VALIDATION_SAMPLE_SIZE = env.int("JSON_VALIDATION_SAMPLE_SIZE", default=20)
+# Match payloads above this size are parsed section by section (ijson) instead of loaded whole
+JSON_STREAM_THRESHOLD = env.int("JSON_STREAM_THRESHOLD", default=4 * 1024 * 1024)
+# Redis used to coordinate workers (rate limits etc.), the broker by default
+COORDINATION_REDIS_URL = env("COORDINATION_REDIS_URL", default=CELERY_BROKER_URL)
+# Per-host token buckets shared by all workers (dj.common.ratelimit):
+# "rate" is the sustained requests per second, "burst" the bucket capacity.
+HTTP_RATE_LIMITS = {
+    "api.stratz.com": {
+        "rate": env.float("STRATZ_RATE_LIMIT", default=4.0),
+        "burst": env.int("STRATZ_RATE_BURST", default=20),
+    },
+    "api.opendota.com": {
+        "rate": env.float("OPENDOTA_RATE_LIMIT", default=1.0),
+        "burst": env.int("OPENDOTA_RATE_BURST", default=5),
+    },
+}
+HTTP_RATE_LIMIT_MAX_WAIT = env.float("HTTP_RATE_LIMIT_MAX_WAIT", default=60.0)
+# zstd archive of every fetched payload for re-ingesting without the API (manage.py reingest_archive):
+# "file:///path" or "s3://bucket/prefix" (PAYLOAD_ARCHIVE_ENDPOINT_URL for S3-compatible stores), empty disables it
+PAYLOAD_ARCHIVE_URL = env("PAYLOAD_ARCHIVE_URL", default="")
+PAYLOAD_ARCHIVE_ENDPOINT_URL = env("PAYLOAD_ARCHIVE_ENDPOINT_URL", default=None)
+PAYLOAD_ARCHIVE_LEVEL = env.int("PAYLOAD_ARCHIVE_LEVEL", default=3)
+# Bodies waiting to be archived per process, responses beyond it are dropped from the archive
+PAYLOAD_ARCHIVE_MAX_PENDING = env.int("PAYLOAD_ARCHIVE_MAX_PENDING", default=32)
+# Recorded API responses replayed by serve_stratz_fixtures / bench_ingest
+STRATZ_FIXTURES_DIR = env("STRATZ_FIXTURES_DIR", default=str(BASE_DIR / "dj" / "common" / "fixtures" / "stratz"))
+# Coalesce concurrent fetches of one URL: followers wait up to SINGLE_FLIGHT_WAIT seconds
+# for the leader, whose body is shared through Redis for SINGLE_FLIGHT_RESULT_TTL seconds.
+# Larger bodies are left to the response cache so that they stay out of the (broker) Redis.
+SINGLE_FLIGHT_WAIT = env.float("SINGLE_FLIGHT_WAIT", default=30.0)
+SINGLE_FLIGHT_RESULT_TTL = env.float("SINGLE_FLIGHT_RESULT_TTL", default=10.0)
+SINGLE_FLIGHT_MAX_BYTES = env.int("SINGLE_FLIGHT_MAX_BYTES", default=256 * 1024)
+# Retries for 429/5xx/timeouts: full-jitter exponential backoff unless the API sends Retry-After
+HTTP_MAX_RETRIES = env.int("HTTP_MAX_RETRIES", default=4)
+HTTP_BACKOFF_BASE = env.float("HTTP_BACKOFF_BASE", default=0.5)
+HTTP_BACKOFF_MAX = env.float("HTTP_BACKOFF_MAX", default=30.0)
+# Consecutive failures before a host is considered down, and for how long (shared through Redis)
+HTTP_CIRCUIT_FAILURE_THRESHOLD = env.int("HTTP_CIRCUIT_FAILURE_THRESHOLD", default=5)
+HTTP_CIRCUIT_RESET_TIMEOUT = env.float("HTTP_CIRCUIT_RESET_TIMEOUT", default=60.0)
+# Seconds a process keeps its in-memory hero lookup before reloading it
+HERO_LOOKUP_TTL = env.int("HERO_LOOKUP_TTL", default=300)
+# Match ingestion ledger: retries of failed matches, seconds before a queued match counts
+# as lost, and how many finished match ids each process remembers
+MATCH_INGEST_MAX_ATTEMPTS = env.int("MATCH_INGEST_MAX_ATTEMPTS", default=5)
+MATCH_INGEST_PENDING_TIMEOUT = env.int("MATCH_INGEST_PENDING_TIMEOUT", default=3600)
+MATCH_LEDGER_CACHE_SIZE = env.int("MATCH_LEDGER_CACHE_SIZE", default=200_000)
+# Matches per ingestion task when crawlers queue match payloads
+MATCH_INGEST_BATCH_SIZE = env.int("MATCH_INGEST_BATCH_SIZE", default=50)
+# Claim-check store for task payloads, which every worker must be able to read: a Redis URL, by default
+# database 2 of the broker's server so that payloads stay out of the broker database, or "file:///path"
+# for a single host or a directory shared by all of them. Empty sends payloads inside the messages.
+CLAIM_CHECK_URL = env("CLAIM_CHECK_URL", default=urlsplit(CELERY_BROKER_URL)._replace(path="/2").geturl())
+CLAIM_CHECK_TTL = env.int("CLAIM_CHECK_TTL", default=24 * 3600)
+# Subtasks a periodic sweep over entities may run at once (dj.common.tasks.fan_out_entities)
+FAN_OUT_CONCURRENCY = env.int("FAN_OUT_CONCURRENCY", default=8)
+# Subtasks per chain of a fan-out wave, every chain message carries the rest of its chain
+FAN_OUT_CHAIN_LENGTH = env.int("FAN_OUT_CHAIN_LENGTH", default=25)
+
 APPEND_SLASH = False
@@ -36,3 +36,9 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver"
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Workers are not coordinated in tests, keep outbound calls unthrottled.
+COORDINATION_REDIS_URL = ""
+# Never serve API responses from the on-disk cache in tests.
+HTTP_CACHE_ENABLED = False
+# Task payloads travel inside the messages.
+CLAIM_CHECK_URL = ""
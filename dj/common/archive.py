@@ -0,0 +1,240 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # zstandard is only required when the archive is enabled
+    zstandard = None
+
+try:
+    import boto3
+except ImportError:  # boto3 is only required for s3:// archives
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+MATCH = "match"
+PLAYER = "player"
+TEAM = "team"
+LEAGUE_SERIES = "league-series"
+LEAGUE_MATCHES = "league-matches"
+
+# (kind, url regex) used to file raw responses, the first group is the entity id.
+URL_KINDS = [
+    (MATCH, re.compile(r"/match/(\d+)$")),
+    (PLAYER, re.compile(r"/player/(\d+)$")),
+    (TEAM, re.compile(r"/team/(\d+)$")),
+    (LEAGUE_SERIES, re.compile(r"/league/(\d+)/series$")),
+    (LEAGUE_MATCHES, re.compile(r"/league/(\d+)/matches$")),
+]
+SUFFIX = ".json.zst"
+
+
+def classify(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Return ``(kind, name)`` for an archivable URL, None otherwise.
+
+    Paginated league lists are named ``<league_id>-<skip>`` so that every
+    page is kept.
+    """
+    parts = urlsplit(url)
+    for kind, pattern in URL_KINDS:
+        match = pattern.search(parts.path)
+        if match:
+            if kind in (LEAGUE_SERIES, LEAGUE_MATCHES):
+                skip = re.search(r"(?:^|&)skip=(\d+)", parts.query)
+                return kind, f"{match.group(1)}-{skip.group(1) if skip else 0}"
+            return kind, match.group(1)
+    return None
+
+
+def entity_id(name: str) -> int:
+    return int(name.split("-", 1)[0])
+
+
+class PayloadArchive(ABC):
+    """
+    zstd-compressed raw API responses, sharded as ``<kind>/<id % 1000>/<name>.json.zst``.
+    """
+
+    def __init__(self, level: int = 3) -> None:
+        if zstandard is None:
+            raise ImproperlyConfigured("zstandard is not installed")
+        self.level = level
+
+    @staticmethod
+    def key(kind: str, name: str) -> str:
+        return f"{kind}/{entity_id(name) % 1000:03d}/{name}{SUFFIX}"
+
+    def put(self, kind: str, name: str, body: bytes) -> None:
+        self._write(self.key(kind, name), zstandard.ZstdCompressor(level=self.level).compress(body))
+
+    def get(self, kind: str, name: str) -> Optional[bytes]:
+        data = self._read(self.key(kind, name))
+        return zstandard.ZstdDecompressor().decompress(data) if data is not None else None
+
+    def names(self, kind: str) -> Iterator[str]:
+        """
+        Yield the names of every archived payload of ``kind``.
+        """
+        for key in self._list(f"{kind}/"):
+            if key.endswith(SUFFIX):
+                yield key.rsplit("/", 1)[-1][:-len(SUFFIX)]
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def _list(self, prefix: str) -> Iterator[str]:
+        ...
+
+
+class LocalArchive(PayloadArchive):
+    def __init__(self, root: Path, level: int = 3) -> None:
+        super().__init__(level)
+        self.root = Path(root)
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return (self.root / key).read_bytes()
+        except OSError:
+            return None
+
+    def _list(self, prefix: str) -> Iterator[str]:
+        for path in (self.root / prefix).glob(f"*/*{SUFFIX}"):
+            yield path.relative_to(self.root).as_posix()
+
+
+class S3Archive(PayloadArchive):
+    """
+    Archive in an S3-compatible bucket (AWS, MinIO, ...).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, level: int = 3) -> None:
+        super().__init__(level)
+        if boto3 is None:
+            raise ImproperlyConfigured("boto3 is not installed")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _write(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._full_key(key), Body=data)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._full_key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def _list(self, prefix: str) -> Iterator[str]:
+        strip = len(self._full_key(""))
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._full_key(prefix)):
+            for item in page.get("Contents", []):
+                yield item["Key"][strip:]
+
+
+_archives: Dict[int, Optional[PayloadArchive]] = {}
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_slots: Dict[int, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+def get_archive() -> Optional[PayloadArchive]:
+    """
+    Return the archive configured by ``PAYLOAD_ARCHIVE_URL`` (``file:///path`` or
+    ``s3://bucket/prefix``), or None when archiving is disabled.
+    """
+    pid = os.getpid()
+    if pid not in _archives:
+        with _lock:
+            if pid not in _archives:
+                _archives[pid] = _build_archive()
+    return _archives[pid]
+
+
+def _build_archive() -> Optional[PayloadArchive]:
+    url = getattr(settings, "PAYLOAD_ARCHIVE_URL", "")
+    if not url:
+        return None
+    level = getattr(settings, "PAYLOAD_ARCHIVE_LEVEL", 3)
+    parts = urlsplit(url)
+    try:
+        if parts.scheme == "s3":
+            return S3Archive(
+                parts.netloc,
+                parts.path,
+                endpoint_url=getattr(settings, "PAYLOAD_ARCHIVE_ENDPOINT_URL", None),
+                level=level,
+            )
+        return LocalArchive(parts.path if parts.scheme == "file" else url, level=level)
+    except ImproperlyConfigured as e:
+        logger.error(f"Payload archive disabled: {e}")
+        return None
+
+
+def archive_response(url: str, body: bytes) -> None:
+    """
+    Store a freshly fetched response in the archive, off the request path.
+
+    At most ``PAYLOAD_ARCHIVE_MAX_PENDING`` bodies wait for the writer threads,
+    responses arriving while the backlog is full are not archived.
+    """
+    archive = get_archive()
+    if archive is None:
+        return
+    classified = classify(url)
+    if classified is None:
+        return
+    pid = os.getpid()
+    if pid not in _executors:
+        with _lock:
+            if pid not in _executors:
+                _slots[pid] = threading.BoundedSemaphore(getattr(settings, "PAYLOAD_ARCHIVE_MAX_PENDING", 32))
+                _executors[pid] = ThreadPoolExecutor(max_workers=4, thread_name_prefix="archive")
+    slots = _slots[pid]
+    if not slots.acquire(blocking=False):
+        logger.warning(f"archive_response: backlog full, not archiving {classified[0]}/{classified[1]}")
+        return
+    _executors[pid].submit(_put, archive, *classified, body, slots)
+
+
+def _put(archive: PayloadArchive, kind: str, name: str, body: bytes, slots: threading.BoundedSemaphore) -> None:
+    try:
+        archive.put(kind, name, body)
+    except Exception as e:
+        logger.warning(f"archive_response: failed to store {kind}/{name}: {repr(e)}")
+    finally:
+        slots.release()
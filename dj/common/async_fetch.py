@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from orjson import orjson
+
+from dj.common.archive import archive_response
+from dj.common.http import fresh_body
+from dj.common.http_cache import CachedResponse, ResponseCache, get_response_cache
+from dj.common.ratelimit import Throttled, throttle
+from dj.common.retry import RETRY_STATUSES, get_breaker, retry_delay
+from dj.common.singleflight import single_flight
+from dj.common.utils import validate_json
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+async def _get(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]]) -> httpx.Response:
+    """
+    Async counterpart of the retry loop in ``dj.common.http.fetch_bytes``.
+
+    While the host's circuit is open or its rate limit exhausted the request
+    waits instead of failing, so a batch survives a short upstream outage.
+    """
+    breaker = get_breaker(url)
+    max_retries = getattr(settings, "HTTP_MAX_RETRIES", 4)
+    attempt = 0
+    while True:
+        while (retry_in := await asyncio.to_thread(breaker.retry_in)) > 0:
+            await asyncio.sleep(retry_in)
+        # The shared rate limiter is blocking (Redis), keep it off the event loop.
+        try:
+            await asyncio.to_thread(throttle, url)
+        except Throttled as e:
+            logger.warning(f"_get: {e}")
+            await asyncio.sleep(e.retry_in)
+            continue
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            if attempt >= max_retries:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"_get: {repr(e)} for {url}, retry in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            if response.status_code != 429:
+                breaker.record_failure()
+            if attempt >= max_retries:
+                return response
+            delay = retry_delay(attempt, response.headers)
+            logger.warning(f"_get: HTTP {response.status_code} for {url}, retry in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _fetch_body(
+    client: httpx.AsyncClient,
+    url: str,
+    cache: Optional[ResponseCache],
+    entry: Optional[CachedResponse],
+) -> bytes:
+    response = await _get(client, url, entry.validators() if entry else None)
+    if entry and response.status_code == 304:
+        await asyncio.to_thread(cache.refresh, entry)
+        return entry.body
+    response.raise_for_status()
+    body = response.content
+    await asyncio.to_thread(_store, cache, url, body, response.headers)
+    return body
+
+
+def _store(cache: Optional[ResponseCache], url: str, body: bytes, headers: httpx.Headers) -> None:
+    if cache:
+        cache.put(url, body, headers)
+    archive_response(url, body)
+
+
+async def _fetch_json(
+    client: httpx.AsyncClient,
+    url: str,
+    schema: Dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    flights: Executor,
+    raw: bool = False,
+) -> Optional[Any]:
+    """
+    Fetch ``url`` the way ``dj.common.http.fetch_bytes`` does, without blocking the event loop.
+
+    The response cache and the archive do disk I/O and run in threads. A fetch
+    goes through ``single_flight`` like the synchronous path, so it is
+    coalesced with the same URL fetched by other threads and workers: the
+    (blocking) leader election runs in a ``flights`` thread, which waits for
+    the request made on the event loop.
+    """
+    cache = get_response_cache()
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        try:
+            entry = await asyncio.to_thread(cache.get, url) if cache else None
+            if entry and entry.is_fresh():
+                body = entry.body
+            else:
+
+                def fetch() -> bytes:
+                    return asyncio.run_coroutine_threadsafe(_fetch_body(client, url, cache, entry), loop).result()
+
+                body = await loop.run_in_executor(flights, single_flight, url, fetch, partial(fresh_body, cache, url))
+            if raw:
+                return body
+            json_data = orjson.loads(body)
+        except httpx.HTTPError as e:
+            logger.error(f"HTTPError while requesting URL {url}: {repr(e)}")
+            return None
+        except ValueError as e:
+            logger.error(f"ValueError while parsing JSON from URL {url}: {repr(e)}")
+            return None
+
+    if validate_json(json_data, schema):
+        return json_data
+    logger.warning(f"JSON validation failed for URL: {url}")
+    return None
+
+
+async def _produce(
+    urls: Iterable[str],
+    schema: Dict[str, Any],
+    concurrency: int,
+    results: queue.Queue,
+    stop: threading.Event,
+    raw: bool = False,
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    # One thread per request in flight for single_flight, apart from the default
+    # executor that the requests themselves use for the rate limiter and cache.
+    flights = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="iter-fetch-flight")
+    async with httpx.AsyncClient(
+        headers={"Authorization": f"Bearer {settings.TOKEN_STRATZ}"},
+        http2=getattr(settings, "HTTP_USE_HTTP2", False),
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    ) as client:
+
+        async def fetch(url: str) -> None:
+            if stop.is_set():
+                return
+            data = await _fetch_json(client, url, schema, semaphore, flights, raw)
+            # Bounded queue: block (off-loop) while the writer catches up.
+            while not stop.is_set():
+                try:
+                    await asyncio.to_thread(results.put, (url, data), True, 1)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            await asyncio.gather(*(fetch(url) for url in urls))
+        finally:
+            flights.shutdown(wait=False)
+
+
+def iter_fetch_json(
+    urls: Iterable[str],
+    schema: Dict[str, Any],
+    concurrency: Optional[int] = None,
+    raw: bool = False,
+) -> Iterator[Tuple[str, Optional[Any]]]:
+    """
+    Fetch many URLs concurrently and yield ``(url, json_data)`` as they complete.
+
+    The fetch stage runs an asyncio event loop in a background thread with at
+    most ``concurrency`` requests in flight; the caller consumes results in its
+    own thread, which keeps Django ORM writes out of the event loop.
+
+    Args:
+        urls (Iterable[str]): URLs to fetch.
+        schema (Dict[str, Any]): The schema to validate each response against.
+        concurrency (Optional[int]): Requests in flight, ``HTTP_ASYNC_CONCURRENCY`` by default.
+        raw (bool): Yield the raw response bodies, unparsed and unvalidated.
+
+    Yields:
+        Tuple[str, Optional[Any]]: The URL and its validated JSON data, or None on error.
+    """
+    concurrency = concurrency or getattr(settings, "HTTP_ASYNC_CONCURRENCY", 100)
+    results: queue.Queue = queue.Queue(maxsize=concurrency * 2)
+    stop = threading.Event()
+
+    def run() -> None:
+        try:
+            asyncio.run(_produce(urls, schema, concurrency, results, stop, raw))
+        except Exception as e:
+            logger.error(f"iter_fetch_json: fetch stage failed: {repr(e)}")
+        finally:
+            if not stop.is_set():
+                results.put(_DONE)
+
+    thread = threading.Thread(target=run, name="iter-fetch-json", daemon=True)
+    thread.start()
+    try:
+        while (item := results.get()) is not _DONE:
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,149 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PAYLOAD = "claimcheck:{key}"
+REDIS_SCHEMES = ("redis", "rediss", "unix")
+SWEEP_INTERVAL = 300.0
+
+_clients: Dict[Tuple[int, str], redis.Redis] = {}
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def check_in(body: bytes) -> Optional[str]:
+    """
+    Store a task payload out of band so that the message only carries its key.
+
+    Payloads go to the directory of a ``file://`` ``CLAIM_CHECK_URL`` or to the
+    Redis database it names, never to the broker's own database, and expire
+    after ``CLAIM_CHECK_TTL`` seconds.
+
+    Args:
+        body (bytes): The serialized payload.
+
+    Returns:
+        Optional[str]: The claim key, or None if no store is available and the
+                       payload has to travel in the message.
+    """
+    key = uuid.uuid4().hex
+    ttl = getattr(settings, "CLAIM_CHECK_TTL", 24 * 3600)
+    root = _local_root()
+    if root is not None:
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=root, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(body)
+                os.replace(tmp, root / key)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            logger.warning(f"check_in: failed to store a payload in {root}: {repr(e)}")
+            return None
+        _sweep(root, ttl)
+        return key
+
+    client = _client()
+    if client is None:
+        return None
+    try:
+        client.set(KEY_PAYLOAD.format(key=key), body, ex=ttl)
+    except redis.RedisError as e:
+        logger.warning(f"check_in: Redis unavailable: {repr(e)}")
+        return None
+    return key
+
+
+def check_out(key: str) -> Optional[bytes]:
+    """
+    Load the payload stored under ``key``, None if it expired or is unknown.
+    """
+    root = _local_root()
+    if root is not None:
+        try:
+            return (root / key).read_bytes()
+        except OSError:
+            return None
+    client = _client()
+    if client is None:
+        return None
+    try:
+        return client.get(KEY_PAYLOAD.format(key=key))
+    except redis.RedisError as e:
+        logger.warning(f"check_out: Redis unavailable: {repr(e)}")
+        return None
+
+
+def release(key: str) -> None:
+    """
+    Drop a payload once its task is done with it.
+    """
+    root = _local_root()
+    if root is not None:
+        (root / key).unlink(missing_ok=True)
+        return
+    client = _client()
+    if client is None:
+        return
+    try:
+        client.delete(KEY_PAYLOAD.format(key=key))
+    except redis.RedisError:
+        pass
+
+
+def _local_root() -> Optional[Path]:
+    parts = urlsplit(getattr(settings, "CLAIM_CHECK_URL", ""))
+    return Path(parts.path) if parts.scheme == "file" else None
+
+
+def _client() -> Optional[redis.Redis]:
+    """
+    Process-wide client of a Redis ``CLAIM_CHECK_URL``, None for any other store
+    or when it is the broker URL.
+    """
+    url = getattr(settings, "CLAIM_CHECK_URL", "")
+    if urlsplit(url).scheme not in REDIS_SCHEMES:
+        return None
+    if url == getattr(settings, "CELERY_BROKER_URL", None):
+        logger.warning("CLAIM_CHECK_URL is the broker URL, task payloads are sent inside the messages")
+        return None
+    key = (os.getpid(), url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=5)
+    return client
+
+
+def _sweep(root: Path, ttl: int) -> None:
+    """
+    Delete payloads older than ``ttl`` whose task never ran, at most every SWEEP_INTERVAL seconds.
+    """
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep < SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    expired = time.time() - ttl
+    for path in root.iterdir():
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -130,6 +130,10 @@ LEAGUE_TIER_THRESHOLD = 2
 LEAGUE_MATCH_COUNT = 25
 LEAGUE_LIST_COUNT = 300
 LEAGUE_MATCH_SKIP = 0
+LEAGUE_PAGE_SIZE = 300
+LEAGUE_MAX_PAGES = 100
+# Matches up to this id predate what the crawlers ingest
+MATCH_ID_THRESHOLD = 7833796201
 
 TEAM = 'team'
 PLAYER = 'player'
@@ -141,6 +145,16 @@ ALL_TYPE = sorted(frozenset({TEAM, PLAYER, MATCH, LEAGUE, ALL}))
 
 TASK_TYPE_CHOICES = sorted(zip(ALL_TYPE, ALL_TYPE))
 
+# Celery queues, see CELERY_TASK_ROUTES. With the Redis broker 0 is the highest priority.
+QUEUE_INTERACTIVE = 'interactive'
+QUEUE_INGEST_BULK = 'ingest-bulk'
+QUEUE_ANALYTICS = 'analytics'
+PRIORITY_INTERACTIVE = 0
+
+VALIDATE_FULL = 'full'
+VALIDATE_SAMPLE = 'sample'
+VALIDATE_TOP = 'top'
+
 GAME_VERSION = {175: {'id': 175, 'name': '7.36c', 'startDate': '2024-06-24T00:00:00'},
                 173: {'id': 173, 'name': '7.36', 'startDate': '2024-05-23T00:00:00'},
                 172: {'id': 172, 'name': '7.35d', 'startDate': '2024-03-22T00:00:00'},
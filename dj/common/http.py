@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from dj.common.archive import archive_response
+from dj.common.http_cache import CachedResponse, ResponseCache, get_response_cache
+from dj.common.ratelimit import throttle
+from dj.common.retry import RETRY_STATUSES, get_breaker, retry_delay
+from dj.common.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+HTTP_ERRORS = (requests.RequestException, httpx.HTTPError)
+# Connection problems and timeouts, worth retrying
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+
+_local = threading.local()
+_shared_clients: Dict[int, "HttpClient"] = {}
+_shared_lock = threading.Lock()
+
+
+class HttpClient:
+    """
+    Pooled keep-alive HTTP client used by every fetcher in ``dj.*.services``.
+
+    Backed by a ``requests.Session`` (one per thread, since sessions are not
+    thread-safe) or, when ``HTTP_USE_HTTP2`` is enabled, by a single thread-safe
+    ``httpx.Client`` per process.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        http2: bool = False,
+    ) -> None:
+        self.http2 = http2
+        if self.http2:
+            self._client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                ),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        else:
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any):
+        throttle(url)
+        if self.http2:
+            return self._client.get(url, headers=headers, **kwargs)
+        return self._client.get(url, headers=headers, timeout=self.timeout, **kwargs)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _build_client() -> HttpClient:
+    return HttpClient(
+        pool_size=getattr(settings, "HTTP_POOL_SIZE", 20),
+        connect_timeout=getattr(settings, "HTTP_CONNECT_TIMEOUT", 5.0),
+        read_timeout=getattr(settings, "HTTP_READ_TIMEOUT", 30.0),
+        http2=getattr(settings, "HTTP_USE_HTTP2", False),
+    )
+
+
+def get_client() -> HttpClient:
+    """
+    Return the HTTP client for the current thread (HTTP/1.1) or process (HTTP/2).
+
+    Clients are keyed by pid so that Celery prefork children never reuse
+    sockets inherited from the parent process.
+    """
+    pid = os.getpid()
+    if getattr(settings, "HTTP_USE_HTTP2", False):
+        client = _shared_clients.get(pid)
+        if client is None:
+            with _shared_lock:
+                client = _shared_clients.get(pid)
+                if client is None:
+                    client = _shared_clients[pid] = _build_client()
+        return client
+
+    client = getattr(_local, "client", None)
+    if client is None or getattr(_local, "pid", None) != pid:
+        client = _local.client = _build_client()
+        _local.pid = pid
+    return client
+
+
+def fetch_bytes(url: str, revalidate: bool = False) -> bytes:
+    """
+    GET ``url`` through the shared client and return the raw response body.
+
+    Responses are served from the on-disk response cache while fresh and
+    revalidated with ``If-None-Match``/``If-Modified-Since`` once stale, or
+    right away with ``revalidate`` (refreshes asked for by a user).
+    429/5xx responses and timeouts are retried up to ``HTTP_MAX_RETRIES`` times
+    with jittered exponential backoff (or the upstream's Retry-After), and the
+    host's circuit breaker is consulted before every attempt. Concurrent
+    requests for the same URL are coalesced, see ``single_flight``.
+
+    Raises:
+        CircuitOpenError: If the host's circuit is open.
+        Throttled: If the host's rate limit stays exhausted, see ``throttle``.
+        HTTP_ERRORS: On connection errors and non-2xx responses once retries are exhausted.
+    """
+    cache = get_response_cache()
+    entry = cache.get(url) if cache else None
+    if entry and entry.is_fresh() and not revalidate:
+        return entry.body
+
+    return single_flight(url, lambda: _fetch_bytes(url, cache, entry), lambda: fresh_body(cache, url))
+
+
+def fresh_body(cache: Optional[ResponseCache], url: str) -> Optional[bytes]:
+    """
+    The cached body of ``url`` if fresh, e.g. just stored by another worker.
+    """
+    entry = cache.get(url) if cache else None
+    return entry.body if entry and entry.is_fresh() else None
+
+
+def _fetch_bytes(url: str, cache: Optional[ResponseCache], entry: Optional[CachedResponse]) -> bytes:
+    headers = {"Authorization": f"Bearer {settings.TOKEN_STRATZ}"}
+    if entry:
+        headers.update(entry.validators())
+    breaker = get_breaker(url)
+    max_retries = getattr(settings, "HTTP_MAX_RETRIES", 4)
+    attempt = 0
+    while True:
+        breaker.before_request()
+        try:
+            response = get_client().get(url, headers=headers)
+        except TRANSIENT_ERRORS as e:
+            breaker.record_failure()
+            if attempt >= max_retries:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"fetch_bytes: {repr(e)} for {url}, retry in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                break
+            if response.status_code != 429:
+                breaker.record_failure()
+            if attempt >= max_retries:
+                break
+            delay = retry_delay(attempt, response.headers)
+            logger.warning(f"fetch_bytes: HTTP {response.status_code} for {url}, retry in {delay:.1f}s")
+        time.sleep(delay)
+        attempt += 1
+
+    if entry and response.status_code == 304:
+        cache.refresh(entry)
+        return entry.body
+    response.raise_for_status()
+    body = response.content
+    if cache:
+        cache.put(url, body, response.headers)
+    archive_response(url, body)
+    return body
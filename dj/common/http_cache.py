@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from django.conf import settings
+from orjson import orjson
+
+logger = logging.getLogger(__name__)
+
+# Matches fetched before STRATZ parsed the replay will change, don't keep them forever.
+UNPARSED_MATCH_TTL = 60 * 60
+EVICT_EVERY = 100
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    stored_at: float
+    ttl: Optional[int]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self) -> bool:
+        return self.ttl is None or time.time() - self.stored_at < self.ttl
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Conditional request headers for revalidating this entry.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw API responses.
+
+    Bodies are stored once per content hash under ``objects/``; per-URL index
+    entries under ``index/`` point to a body and carry the TTL and validators.
+    Index mtimes are bumped on every hit, so eviction drops the least recently
+    used URLs first once the cache grows past ``max_bytes``.
+
+    Args:
+        root (Path): Cache directory.
+        max_bytes (int): Size bound for the whole cache directory.
+        ttls (List[Tuple[str, Optional[int]]]): ``(url regex, ttl seconds)`` rules,
+            first match wins; ``None`` caches forever, unmatched URLs are not cached.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, ttls: List[Tuple[str, Optional[int]]]) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rules = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, url: str) -> Tuple[bool, Optional[int]]:
+        for pattern, ttl in self.rules:
+            if pattern.search(url):
+                return True, ttl
+        return False, None
+
+    def is_cacheable(self, url: str) -> bool:
+        return self.ttl_for(url)[0]
+
+    @staticmethod
+    def _digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _index_path(self, url: str) -> Path:
+        key = self._digest(url.encode())
+        return self.root / "index" / key[:2] / f"{key}.json"
+
+    def _object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        index_path = self._index_path(url)
+        try:
+            meta = orjson.loads(index_path.read_bytes())
+            body = self._object_path(meta["sha"]).read_bytes()
+            os.utime(index_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return CachedResponse(
+            url=url,
+            body=body,
+            stored_at=meta["stored_at"],
+            ttl=meta.get("ttl"),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+        )
+
+    def put(self, url: str, body: bytes, headers: Optional[Dict[str, Any]] = None) -> None:
+        cacheable, ttl = self.ttl_for(url)
+        if not cacheable:
+            return
+        if ttl is None and "/match/" in url and self._is_unparsed_match(body):
+            ttl = UNPARSED_MATCH_TTL
+        headers = headers or {}
+        sha = self._digest(body)
+        try:
+            object_path = self._object_path(sha)
+            if not object_path.exists():
+                self._write_atomic(object_path, body)
+            self._write_meta(url, {
+                "url": url,
+                "sha": sha,
+                "stored_at": time.time(),
+                "ttl": ttl,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            })
+        except OSError as e:
+            logger.warning(f"ResponseCache: failed to store {url}: {repr(e)}")
+            return
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def refresh(self, entry: CachedResponse) -> None:
+        """
+        Restart the TTL of an entry after a ``304 Not Modified`` revalidation.
+        """
+        try:
+            self._write_meta(entry.url, {
+                "url": entry.url,
+                "sha": self._digest(entry.body),
+                "stored_at": time.time(),
+                "ttl": entry.ttl,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+            })
+        except OSError as e:
+            logger.warning(f"ResponseCache: failed to refresh {entry.url}: {repr(e)}")
+
+    def _write_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        self._write_atomic(self._index_path(url), orjson.dumps(meta))
+
+    @staticmethod
+    def _is_unparsed_match(body: bytes) -> bool:
+        return b'"parsedDateTime":' not in body or b'"parsedDateTime":null' in body
+
+    def evict(self) -> None:
+        """
+        Drop least recently used index entries until the cache fits in 90% of
+        ``max_bytes``, then remove bodies no longer referenced by any entry.
+        """
+        try:
+            entries = sorted(
+                ((path.stat().st_mtime, path) for path in (self.root / "index").glob("*/*.json")),
+                key=lambda item: item[0],
+            )
+            objects = {path.name: path.stat().st_size for path in (self.root / "objects").glob("*/*")}
+        except OSError as e:
+            logger.warning(f"ResponseCache: eviction scan failed: {repr(e)}")
+            return
+
+        total = sum(objects.values())
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        referenced: Dict[str, int] = {}
+        metas = []
+        for _, path in entries:
+            try:
+                sha = orjson.loads(path.read_bytes())["sha"]
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+                continue
+            metas.append((path, sha))
+            referenced[sha] = referenced.get(sha, 0) + 1
+
+        for path, sha in metas:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            referenced[sha] -= 1
+            if referenced[sha] == 0:
+                total -= objects.get(sha, 0)
+
+        for sha in objects:
+            if not referenced.get(sha):
+                self._object_path(sha).unlink(missing_ok=True)
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide response cache, or None if ``HTTP_CACHE_ENABLED`` is off.
+    """
+    global _cache
+    if not getattr(settings, "HTTP_CACHE_ENABLED", False):
+        return None
+    if _cache is None:
+        _cache = ResponseCache(
+            root=settings.HTTP_CACHE_DIR,
+            max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+            ttls=settings.HTTP_CACHE_TTLS,
+        )
+    return _cache
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import redis
+from django.conf import settings
+
+from dj.common.redis_client import get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+KEY_BUCKET = "ratelimit:bucket:{host}"
+KEY_METRICS = "ratelimit:metrics:{host}"
+
+# Refill the bucket using the Redis clock so that every worker agrees on "now",
+# then take one token if available. Returns the milliseconds to wait otherwise.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    redis.call('HINCRBY', KEYS[2], 'granted', 1)
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+    redis.call('HINCRBY', KEYS[2], 'throttled', 1)
+    redis.call('HINCRBY', KEYS[2], 'wait_ms', wait)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class Throttled(Exception):
+    """
+    Raised when the per-host budget has no token within ``max_wait``.
+    The caller should back off for ``retry_in`` seconds instead of sending the request.
+    """
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"Rate limit for {host} exhausted, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """
+    Distributed token bucket shared by all Celery workers through Redis.
+
+    Args:
+        host (str): Upstream host the budget applies to.
+        rate (float): Tokens added per second (sustained requests per second).
+        burst (int): Bucket capacity (requests allowed back to back).
+        max_wait (float): Raise ``Throttled`` rather than wait longer than this many seconds.
+    """
+
+    def __init__(self, host: str, rate: float, burst: int, max_wait: float = 60.0) -> None:
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.keys = [KEY_BUCKET.format(host=host), KEY_METRICS.format(host=host)]
+
+    def acquire(self) -> bool:
+        """
+        Block until a token is available.
+
+        Returns:
+            bool: True if a token was taken, False if Redis is unavailable
+                  (the caller proceeds unthrottled).
+
+        Raises:
+            Throttled: If no token is available within ``max_wait``.
+        """
+        client = get_redis()
+        if client is None:
+            return False
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                wait_ms = int(client.eval(TOKEN_BUCKET_LUA, 2, *self.keys, self.rate, self.burst))
+            except redis.RedisError as e:
+                logger.warning("Rate limiter unavailable for %s: %s", self.host, repr(e))
+                mark_redis_down()
+                return False
+            if wait_ms <= 0:
+                return True
+            if time.monotonic() + wait_ms / 1000 > deadline:
+                logger.warning("Rate limiter wait exceeded %ss for %s", self.max_wait, self.host)
+                raise Throttled(self.host, wait_ms / 1000)
+            time.sleep(wait_ms / 1000)
+
+
+_buckets: Dict[str, Optional[TokenBucket]] = {}
+
+
+def get_bucket(host: str) -> Optional[TokenBucket]:
+    if host not in _buckets:
+        budget = getattr(settings, "HTTP_RATE_LIMITS", {}).get(host)
+        _buckets[host] = TokenBucket(
+            host,
+            rate=budget["rate"],
+            burst=budget["burst"],
+            max_wait=getattr(settings, "HTTP_RATE_LIMIT_MAX_WAIT", 60.0),
+        ) if budget else None
+    return _buckets[host]
+
+
+def throttle(url: str) -> None:
+    """
+    Wait for the per-host budget of ``url`` before an outbound request.
+    Hosts without a configured budget are not limited.
+
+    Raises:
+        Throttled: If the budget stays exhausted for ``HTTP_RATE_LIMIT_MAX_WAIT`` seconds.
+    """
+    bucket = get_bucket(urlsplit(url).hostname or "")
+    if bucket:
+        bucket.acquire()
+
+
+def get_rate_limit_metrics(host: str) -> Dict[str, Any]:
+    """
+    Return the counters collected for ``host``: granted, throttled and wait_ms.
+    """
+    client = get_redis()
+    if client is None:
+        return {}
+    try:
+        raw = client.hgetall(KEY_METRICS.format(host=host))
+    except redis.RedisError as e:
+        logger.warning("Rate limiter metrics unavailable for %s: %s", host, repr(e))
+        return {}
+    return {key.decode(): int(value) for key, value in raw.items()}
@@ -0,0 +1,50 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[int, redis.Redis] = {}
+_lock = threading.Lock()
+_down_until = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Return a process-wide Redis client for coordination between Celery workers.
+
+    Uses ``COORDINATION_REDIS_URL`` which defaults to the Celery broker.
+
+    Returns:
+        Optional[redis.Redis]: The client, or None if no URL is configured
+                               or Redis was recently marked as down.
+    """
+    url = getattr(settings, "COORDINATION_REDIS_URL", None)
+    if not url or time.monotonic() < _down_until:
+        return None
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _lock:
+            client = _clients.get(pid)
+            if client is None:
+                client = _clients[pid] = redis.Redis.from_url(
+                    url,
+                    socket_connect_timeout=1,
+                    socket_timeout=1,
+                )
+    return client
+
+
+def mark_redis_down(seconds: float = 30.0) -> None:
+    """
+    Stop handing out the Redis client for ``seconds`` after a connection error,
+    so callers fall back to local behaviour instead of paying a timeout per call.
+    """
+    global _down_until
+    _down_until = time.monotonic() + seconds
@@ -0,0 +1,166 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+from django.conf import settings
+
+from dj.common import urls
+from dj.common.http import fetch_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureStore:
+    """
+    Directory of recorded API responses, one file per request.
+
+    Fixtures are keyed by the request path relative to the API base plus the
+    query string, so ``{API}/match/1`` and ``http://127.0.0.1:8800/match/1``
+    resolve to the same file.
+
+    Args:
+        root (Path): Fixture directory.
+        base_path (str): Path prefix of the API base, e.g. ``/api/v1``.
+    """
+
+    def __init__(self, root: Path, base_path: str = "") -> None:
+        self.root = Path(root)
+        self.base_path = base_path.rstrip("/")
+
+    def key(self, url: str) -> str:
+        parts = urlsplit(url)
+        path = parts.path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        path = path.strip("/")
+        return f"{path}?{parts.query}" if parts.query else path
+
+    def path_for(self, url: str) -> Path:
+        return self.root / f"{quote(self.key(url), safe='')}.json"
+
+    def get(self, url: str) -> Optional[bytes]:
+        try:
+            return self.path_for(url).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, url: str, body: bytes) -> Path:
+        path = self.path_for(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        return path
+
+    def record(self, url: str) -> Optional[Path]:
+        """
+        Fetch ``url`` from the live API and store the raw response body.
+        """
+        try:
+            return self.put(url, fetch_bytes(url))
+        except Exception as e:
+            logger.error(f"FixtureStore: failed to record {url}: {repr(e)}")
+            return None
+
+    def keys(self) -> List[str]:
+        return sorted(unquote(path.stem) for path in self.root.glob("*.json"))
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the STRATZ API that serves recorded fixtures.
+
+    Args:
+        store (FixtureStore): Recorded responses.
+        address (Tuple[str, int]): Host and port to bind, port 0 picks a free one.
+        latency (float): Seconds added to every response.
+        jitter (float): Extra uniformly random delay in seconds.
+        error_rate (float): Share of requests answered with ``503 Service Unavailable``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+    ) -> None:
+        super().__init__(address, ReplayHandler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.store.base_path}"
+
+    def start(self) -> threading.Thread:
+        """
+        Serve in a daemon thread, for use from benchmarks and tests.
+        """
+        thread = threading.Thread(target=self.serve_forever, name="replay-server", daemon=True)
+        thread.start()
+        return thread
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+
+    def do_GET(self) -> None:
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if random.random() < server.error_rate:
+            self._send(503, b'{"error":"injected failure"}', {"Retry-After": "1"})
+            return
+        body = server.store.get(self.path)
+        if body is None:
+            logger.warning(f"ReplayServer: no fixture for {self.path}")
+            self._send(404, b'{"error":"no fixture"}')
+            return
+        self._send(200, body)
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+def get_fixture_store(root: Optional[Path] = None) -> FixtureStore:
+    """
+    Fixture store under ``STRATZ_FIXTURES_DIR`` keyed relative to the configured API base.
+    """
+    return FixtureStore(root or settings.STRATZ_FIXTURES_DIR, urlsplit(urls.API).path)
+
+
+@contextmanager
+def use_api(base_url: str) -> Iterator[None]:
+    """
+    Temporarily send every ``dj.common.urls`` request to ``base_url``.
+    """
+    previous = urls.API
+    urls.API = base_url.rstrip("/")
+    try:
+        yield
+    finally:
+        urls.API = previous
@@ -0,0 +1,148 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import redis
+from django.conf import settings
+
+from dj.common.redis_client import get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+KEY_CIRCUIT = "circuit:open:{host}"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream host whose circuit is open.
+    """
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"Circuit open for {host}, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter for the given (0-based) retry attempt.
+    """
+    base = getattr(settings, "HTTP_BACKOFF_BASE", 0.5)
+    cap = getattr(settings, "HTTP_BACKOFF_MAX", 30.0)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(headers) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header given either in seconds or as an HTTP date.
+    """
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_delay(attempt: int, headers=None) -> float:
+    """
+    Seconds to wait before retry ``attempt``: Retry-After when the upstream
+    sent one (capped by HTTP_BACKOFF_MAX), the jittered backoff otherwise.
+    """
+    delay = retry_after(headers)
+    if delay is None:
+        return backoff_delay(attempt)
+    return min(delay, getattr(settings, "HTTP_BACKOFF_MAX", 30.0))
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    Consecutive failures are counted per process; once ``failure_threshold``
+    is reached the circuit opens for ``reset_timeout`` seconds. The open state
+    is also published to Redis so that every worker stops calling the host.
+    After the timeout the next request is let through as a trial: success
+    closes the circuit, another failure opens it again.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """
+        Seconds until the circuit closes again, 0 if it is closed.
+        """
+        remaining = self.open_until - time.time()
+        if remaining > 0:
+            return remaining
+        client = get_redis()
+        if client is None:
+            return 0.0
+        try:
+            ttl_ms = client.pttl(KEY_CIRCUIT.format(host=self.host))
+        except redis.RedisError:
+            mark_redis_down()
+            return 0.0
+        if ttl_ms > 0:
+            self.open_until = time.time() + ttl_ms / 1000
+            return ttl_ms / 1000
+        return 0.0
+
+    def before_request(self) -> None:
+        retry_in = self.retry_in()
+        if retry_in > 0:
+            raise CircuitOpenError(self.host, retry_in)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return
+            self.open_until = time.time() + self.reset_timeout
+        logger.warning("Circuit opened for %s for %ss", self.host, self.reset_timeout)
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(KEY_CIRCUIT.format(host=self.host), 1, px=int(self.reset_timeout * 1000))
+        except redis.RedisError:
+            mark_redis_down()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    host = urlsplit(url).hostname or ""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(host, CircuitBreaker(
+                host,
+                failure_threshold=getattr(settings, "HTTP_CIRCUIT_FAILURE_THRESHOLD", 5),
+                reset_timeout=getattr(settings, "HTTP_CIRCUIT_RESET_TIMEOUT", 60.0),
+            ))
+    return breaker
@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+import redis
+from django.conf import settings
+
+from dj.common.redis_client import get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+KEY_LOCK = "singleflight:lock:{key}"
+KEY_RESULT = "singleflight:result:{key}"
+POLL_INTERVAL = 0.05
+
+# Delete the lock only if this caller still owns it.
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def single_flight(
+    url: str,
+    fetch: Callable[[], bytes],
+    fallback: Optional[Callable[[], Optional[bytes]]] = None,
+) -> bytes:
+    """
+    Run ``fetch`` for ``url`` at most once at a time.
+
+    Threads of the same process asking for a URL that is already being fetched
+    wait for the in-flight call and share its result or exception. Across
+    workers the leader is elected with a Redis lock, held for the longest a
+    retried fetch can take, and publishes bodies up to ``SINGLE_FLIGHT_MAX_BYTES``
+    for ``SINGLE_FLIGHT_RESULT_TTL`` seconds. Followers pick the body up from
+    there or from ``fallback`` (the response cache), and fetch themselves if
+    neither has it, the leader fails or Redis is unavailable.
+
+    Args:
+        url (str): The URL being fetched, used as the coalescing key.
+        fetch (Callable[[], bytes]): Performs the request and returns the body.
+        fallback (Optional[Callable[[], Optional[bytes]]]): Where followers look
+            for a body the leader did not publish.
+
+    Returns:
+        bytes: The response body.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(url)
+        leader = future is None
+        if leader:
+            future = _in_flight[url] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        body = _fetch_once(url, fetch, fallback)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(body)
+        return body
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(url, None)
+
+
+def _fetch_once(url: str, fetch: Callable[[], bytes], fallback: Optional[Callable[[], Optional[bytes]]]) -> bytes:
+    client = get_redis()
+    if client is None:
+        return fetch()
+
+    key = hashlib.sha256(url.encode()).hexdigest()
+    lock_key, result_key = KEY_LOCK.format(key=key), KEY_RESULT.format(key=key)
+    wait = getattr(settings, "SINGLE_FLIGHT_WAIT", 30.0)
+    lock_ms = int(lock_ttl() * 1000)
+    token = uuid.uuid4().hex
+    try:
+        acquired = client.set(lock_key, token, nx=True, px=lock_ms)
+        if not acquired:
+            body = _wait_for_result(client, lock_key, result_key, wait)
+            if body is None and fallback is not None:
+                body = fallback()
+            if body is not None:
+                return body
+            acquired = client.set(lock_key, token, nx=True, px=lock_ms)
+    except redis.RedisError as e:
+        logger.warning(f"single_flight: Redis unavailable: {repr(e)}")
+        mark_redis_down()
+        return fetch()
+
+    if not acquired:
+        return fetch()
+    try:
+        body = fetch()
+        _publish(client, result_key, body)
+        return body
+    finally:
+        try:
+            client.eval(RELEASE_LUA, 1, lock_key, token)
+        except redis.RedisError:
+            pass
+
+
+def lock_ttl() -> float:
+    """
+    Seconds the leader's lock is held at most: every attempt of a fetch retried
+    ``HTTP_MAX_RETRIES`` times waiting for the rate limiter and timing out,
+    plus the longest backoff between attempts.
+    """
+    retries = getattr(settings, "HTTP_MAX_RETRIES", 4)
+    attempt = (
+        getattr(settings, "HTTP_RATE_LIMIT_MAX_WAIT", 60.0)
+        + getattr(settings, "HTTP_CONNECT_TIMEOUT", 5.0)
+        + getattr(settings, "HTTP_READ_TIMEOUT", 30.0)
+    )
+    return (retries + 1) * attempt + retries * getattr(settings, "HTTP_BACKOFF_MAX", 30.0)
+
+
+def _publish(client: redis.Redis, result_key: str, body: bytes) -> None:
+    if len(body) > getattr(settings, "SINGLE_FLIGHT_MAX_BYTES", 256 * 1024):
+        return
+    ttl = getattr(settings, "SINGLE_FLIGHT_RESULT_TTL", 10.0)
+    try:
+        client.set(result_key, body, px=int(ttl * 1000))
+    except redis.RedisError as e:
+        logger.warning(f"single_flight: failed to publish a result: {repr(e)}")
+        mark_redis_down()
+
+
+def _wait_for_result(client: redis.Redis, lock_key: str, result_key: str, wait: float) -> Optional[bytes]:
+    """
+    Poll for the leader's result while it holds the lock.
+
+    Returns:
+        Optional[bytes]: The published body, or None if the leader released the
+                         lock without publishing one (error or oversized body).
+    """
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        body = client.get(result_key)
+        if body is not None:
+            return body
+        if not client.exists(lock_key):
+            return client.get(result_key)
+        time.sleep(POLL_INTERVAL)
+    return None
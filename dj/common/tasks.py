@@ -0,0 +1,101 @@
+import logging
+import math
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence
+
+from celery import chain, chord, current_app, shared_task, signature
+from celery.canvas import Signature
+from celery.result import AsyncResult
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+from dj.common.utils import chunked
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def eager_tasks() -> Iterator[None]:
+    """
+    Run the Celery tasks sent inside the block inline, then restore ``task_always_eager``.
+    """
+    conf = current_app.conf
+    previous = conf.task_always_eager
+    conf.task_always_eager = True
+    try:
+        yield
+    finally:
+        conf.task_always_eager = previous
+
+
+def fan_out_entities(
+    entity_queryset: QuerySet,
+    task: Any,
+    entity_name: str,
+    args: Sequence[Any] = (),
+    concurrency: Optional[int] = None,
+    callback: Optional[Signature] = None,
+) -> Optional[AsyncResult]:
+    """
+    Run ``task(entity_id, *args)`` as a Celery subtask for every entity of a queryset.
+
+    The ids are processed in waves of at most ``concurrency`` (``FAN_OUT_CONCURRENCY``
+    by default) chains of at most ``FAN_OUT_CHAIN_LENGTH`` subtasks each, so that
+    a sweep never holds more than that many worker slots and no message carries
+    more than a short chain, while the chains themselves spread over every worker.
+    Each wave is a chord whose body dispatches the next wave, and ``callback``
+    (``fan_out_complete`` by default) runs once the last one is done.
+
+    Chains stop at the first subtask that raises, so entity tasks are expected
+    to handle their own errors, as the tasks of this project do.
+
+    Args:
+        entity_queryset (QuerySet): Queryset to retrieve entity IDs.
+        task (Task): The Celery task to run per entity (e.g., get_and_save_player_data).
+        entity_name (str): String representing the entity type (e.g., 'Player' or 'League').
+        args (Sequence[Any]): Extra arguments passed to ``task`` after the entity ID.
+        concurrency (Optional[int]): Maximum number of subtasks running at once.
+        callback (Optional[Signature]): Run once every wave has finished.
+
+    Returns:
+        Optional[AsyncResult]: The result of the first wave, None if there was nothing to run.
+    """
+    entity_ids = list(entity_queryset.values_list("id", flat=True))
+    if not entity_ids:
+        logger.info("No %s entities to process", entity_name)
+        return None
+
+    concurrency = max(1, concurrency or getattr(settings, "FAN_OUT_CONCURRENCY", 8))
+    if callback is None:
+        callback = fan_out_complete.si(entity_name, len(entity_ids))
+    logger.info("Fanning out %s %s entities over %s chains at a time", len(entity_ids), entity_name, concurrency)
+    return dispatch_wave(task.name, entity_ids, list(args), concurrency, callback)
+
+
+def dispatch_wave(
+    task_name: str, entity_ids: List[Any], args: List[Any], concurrency: int, callback: Signature
+) -> AsyncResult:
+    """
+    Start the next wave of a fan-out as a chord of capped chains.
+    """
+    length = max(1, getattr(settings, "FAN_OUT_CHAIN_LENGTH", 25))
+    wave, rest = entity_ids[:concurrency * length], entity_ids[concurrency * length:]
+    lanes = [
+        chain([signature(task_name, args=(entity_id, *args), immutable=True) for entity_id in lane])
+        for lane in chunked(wave, math.ceil(len(wave) / concurrency))
+    ]
+    if rest:
+        body = fan_out_wave.si(task_name, rest, args, concurrency, callback)
+    else:
+        body = signature(callback)
+    return chord(lanes)(body)
+
+
+@shared_task
+def fan_out_wave(task_name: str, entity_ids: List[Any], args: List[Any], concurrency: int, callback: Any) -> None:
+    dispatch_wave(task_name, entity_ids, args, concurrency, callback)
+
+
+@shared_task
+def fan_out_complete(entity_name: str, total: int) -> None:
+    logger.info("Processed %s %s entities", total, entity_name)
@@ -1,4 +1,7 @@
-API = 'https://api.stratz.com/api/v1'
+from django.conf import settings
+
+# Point at a local fixture server (manage.py serve_stratz_fixtures) to work offline.
+API = getattr(settings, 'STRATZ_API_URL', 'https://api.stratz.com/api/v1').rstrip('/')
 URL_LAST_100_LEAGUES = f'{API}/league?take=100&orderBy=-startDateTime'
 OPENDOTA_API = 'https://api.opendota.com/api'
 
@@ -1,17 +1,28 @@
+import hashlib
+import io
 import logging
+import random
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any, Dict, Union, Callable
+from itertools import islice
+from typing import Optional, Any, Dict, Union, Callable, Iterable, Iterator, List, Tuple
 
+import ijson
 import pytz
 import requests
 from django.conf import settings
+from django.db import connections, router
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
 from django.db.models import Model
-from django.db.models.query import QuerySet
-from jsonschema import validate, exceptions
+from ijson.common import ObjectBuilder
+from jsonschema import exceptions
+from jsonschema.validators import validator_for
 from orjson import orjson
 
-from dj.common.constants import HEROES
+from dj.common.constants import HEROES, LEAGUE_MAX_PAGES, LEAGUE_PAGE_SIZE, VALIDATE_SAMPLE, VALIDATE_TOP
+from dj.common.http import fetch_bytes, HTTP_ERRORS
+from dj.common.ratelimit import Throttled
+from dj.common.retry import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -39,26 +50,121 @@ def datetime_to_int(dt: datetime = datetime.now(pytz.timezone(settings.TIME_ZONE
         return 0
 
 
-def validate_json(json_data: Any, schema: Dict[str, Any]) -> bool:
+_validators: Dict[int, Tuple[Any, ...]] = {}
+
+
+def _strip_items(schema: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[Optional[str], Dict[str, Any]]]]:
+    """
+    Split a schema into its top-level structure and the item schemas of the
+    arrays it contains: the root array (path None) or arrays held directly
+    by the root object's properties (path = property name).
+    """
+    arrays = []
+    shallow = dict(schema)
+    if "items" in shallow:
+        arrays.append((None, shallow.pop("items")))
+    properties = shallow.get("properties")
+    if isinstance(properties, dict):
+        shallow["properties"] = dict(properties)
+        for name, sub_schema in properties.items():
+            if isinstance(sub_schema, dict) and "items" in sub_schema:
+                sub_shallow = dict(sub_schema)
+                arrays.append((name, sub_shallow.pop("items")))
+                shallow["properties"][name] = sub_shallow
+    return shallow, arrays
+
+
+def get_validator(schema: Dict[str, Any]) -> Tuple[Any, Any, List[Tuple[Optional[str], Any]]]:
+    """
+    Return the compiled validators for a schema, building them on first use.
+
+    Schemas are module-level constants, so they are cached by identity
+    (a reference is kept so the id is never reused).
+
+    Returns:
+        Tuple: The full validator, the top-level validator and a list of
+               ``(path, item validator)`` for the arrays the schema contains.
+    """
+    cached = _validators.get(id(schema))
+    if cached is None:
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        shallow, arrays = _strip_items(schema)
+        cached = _validators[id(schema)] = (
+            schema,
+            cls(schema),
+            cls(shallow),
+            [(path, cls(items)) for path, items in arrays],
+        )
+    return cached[1], cached[2], cached[3]
+
+
+def validate_json(json_data: Any, schema: Dict[str, Any], bulk: bool = False) -> bool:
     """
     Validates JSON data against the given schema.
 
+    The mode is ``JSON_VALIDATION_MODE`` (``JSON_VALIDATION_BULK_MODE`` for bulk
+    endpoints): ``full`` validates everything, ``top`` only the top-level
+    structure, ``sample`` the top-level structure plus a random sample of
+    ``JSON_VALIDATION_SAMPLE_SIZE`` items of each list.
+
     Args:
         json_data (Any): The JSON data to validate.
         schema (Dict[str, Any]): The schema to validate against.
+        bulk (bool): Whether the data comes from a bulk (list) endpoint.
 
     Returns:
         bool: True if validation is successful, False otherwise.
     """
+    if not schema:
+        return True
+    mode = getattr(settings, "JSON_VALIDATION_BULK_MODE" if bulk else "JSON_VALIDATION_MODE", "full")
     try:
-        validate(instance=json_data, schema=schema)
+        full, top, arrays = get_validator(schema)
+        if mode not in (VALIDATE_SAMPLE, VALIDATE_TOP):
+            full.validate(json_data)
+            return True
+
+        top.validate(json_data)
+        if mode == VALIDATE_SAMPLE:
+            size = getattr(settings, "JSON_VALIDATION_SAMPLE_SIZE", 20)
+            for path, item_validator in arrays:
+                items = json_data if path is None else (json_data or {}).get(path)
+                if isinstance(items, list):
+                    sample = items if len(items) <= size else random.sample(items, size)
+                    for item in sample:
+                        item_validator.validate(item)
         return True
     except exceptions.ValidationError as err:
         logger.error(f"JSON validation error: {repr(err)}")
         return False
 
 
-def response_to_json(url: str, schema: Dict[str, Any]) -> Optional[Any]:
+def response_to_bytes(url: str, revalidate: bool = False) -> Optional[bytes]:
+    """
+    Makes a GET request to the specified URL and returns the raw response body.
+
+    Args:
+        url (str): The URL to make the GET request to.
+        revalidate (bool): Revalidate a fresh cached response with the API, see fetch_bytes.
+
+    Returns:
+        Optional[bytes]: The response body or None if an error occurs.
+    """
+    try:
+        return fetch_bytes(url, revalidate)
+    except requests.exceptions.SSLError as e:
+        logger.error(f"SSL error occurred: {e}")
+    except (CircuitOpenError, Throttled) as e:
+        logger.warning(f"Skipping URL {url}: {e}")
+    except HTTP_ERRORS as e:
+        logger.error(f"RequestException while requesting URL {url}: {repr(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected exception: {repr(e)}")
+    return None
+
+
+def response_to_json(url: str, schema: Dict[str, Any], bulk: bool = False, revalidate: bool = False) -> Optional[Any]:
     """
     Makes a GET request to the specified URL, validates the response JSON
     against the given schema, and returns the JSON data if valid.
@@ -66,26 +172,23 @@ def response_to_json(url: str, schema: Dict[str, Any]) -> Optional[Any]:
     Args:
         url (str): The URL to make the GET request to.
         schema (Dict[str, Any]): The schema to validate the response JSON against.
+        bulk (bool): Validate with the bulk mode, see validate_json.
+        revalidate (bool): Revalidate a fresh cached response with the API, see fetch_bytes.
 
     Returns:
         Optional[Any]: The validated JSON data or None if an error occurs.
     """
+    body = response_to_bytes(url, revalidate)
+    if body is None:
+        return None
     try:
-        token = settings.TOKEN_STRATZ
-        headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        json_data = response.json()
+        json_data = orjson.loads(body)
 
-        if validate_json(json_data, schema):
+        if validate_json(json_data, schema, bulk):
             return json_data
         else:
             logger.warning(f"JSON validation failed for URL: {url}")
             return None
-    except requests.exceptions.SSLError as e:
-        logger.error(f"SSL error occurred: {e}")
-    except requests.RequestException as e:
-        logger.error(f"RequestException while requesting URL {url}: {repr(e)}")
     except ValueError as e:
         logger.error(f"ValueError while parsing JSON from URL {url}: {repr(e)}")
     except Exception as e:
@@ -93,6 +196,171 @@ def response_to_json(url: str, schema: Dict[str, Any]) -> Optional[Any]:
     return None
 
 
+def is_oversized(body: bytes) -> bool:
+    """
+    Whether a payload should be parsed incrementally rather than loaded whole.
+    """
+    return len(body) > getattr(settings, "JSON_STREAM_THRESHOLD", 4 * 1024 * 1024)
+
+
+def payload_fingerprint(payload: Any) -> str:
+    """
+    Content hash of an API payload, stored on the saved entity so that an
+    unchanged payload can be recognised and skipped on the next refresh.
+
+    The hash is always taken over the canonical (sorted keys) serialization
+    of the parsed JSON, so a raw body and the same document already parsed
+    get the same fingerprint. Bodies over ``JSON_STREAM_THRESHOLD`` are
+    serialized from their ijson events instead of being loaded whole.
+
+    Args:
+        payload (Any): Raw response body, or parsed JSON.
+
+    Returns:
+        str: 32 hex characters.
+    """
+    if not isinstance(payload, (bytes, bytearray)):
+        canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    elif is_oversized(payload):
+        canonical = canonical_json(payload)
+    else:
+        canonical = orjson.dumps(orjson.loads(payload), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+def canonical_json(body: bytes) -> bytes:
+    """
+    ``orjson.dumps(orjson.loads(body), option=orjson.OPT_SORT_KEYS)`` built in
+    one pass over the ijson events, holding serialized values rather than
+    Python objects.
+    """
+    containers: List[Union[Dict[str, bytes], List[bytes]]] = []
+    keys: List[Optional[str]] = []
+    result = b""
+    for event, value in ijson.basic_parse(io.BytesIO(body), use_float=True):
+        if event == "map_key":
+            keys[-1] = value
+            continue
+        if event in ("start_map", "start_array"):
+            containers.append({} if event == "start_map" else [])
+            keys.append(None)
+            continue
+        if event == "end_map":
+            members = containers.pop()
+            keys.pop()
+            chunk = b"{" + b",".join(orjson.dumps(key) + b":" + members[key] for key in sorted(members)) + b"}"
+        elif event == "end_array":
+            chunk = b"[" + b",".join(containers.pop()) + b"]"
+            keys.pop()
+        else:
+            chunk = orjson.dumps(value)
+        if not containers:
+            result = chunk
+        elif isinstance(containers[-1], dict):
+            containers[-1][keys[-1]] = chunk
+        else:
+            containers[-1].append(chunk)
+    return result
+
+
+def iter_json_items(body: bytes, prefix: str) -> Iterator[Any]:
+    """
+    Lazily yield the JSON values found at ``prefix`` (ijson syntax, e.g. ``players.item``).
+
+    Args:
+        body (bytes): Raw JSON document.
+        prefix (str): Path of the values to yield.
+
+    Returns:
+        Iterator[Any]: The values, built one at a time.
+    """
+    return ijson.items(io.BytesIO(body), prefix, use_float=True)
+
+
+def json_object_without(body: bytes, skip: Iterable[str], path: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Build the JSON object at ``path`` without materializing the keys in ``skip``.
+
+    Skipped values are only scanned, so a document can be loaded field by
+    field while its large sections are read separately with iter_json_items.
+
+    Args:
+        body (bytes): Raw JSON document.
+        skip (Iterable[str]): Keys of the object to leave out.
+        path (str): ijson path of the object, the document root by default.
+
+    Returns:
+        Optional[Dict[str, Any]]: The object without the skipped keys,
+                                  or None if there is no object at ``path``.
+    """
+    skip = set(skip)
+    result = key = builder = None
+    for prefix, event, value in ijson.parse(io.BytesIO(body), use_float=True):
+        if prefix != path:
+            if builder is not None:
+                builder.event(event, value)
+            continue
+        if event == "start_map" and result is None:
+            result = {}
+        elif event == "map_key" and result is not None:
+            if builder is not None:
+                result[key] = builder.value
+            key, builder = value, None if value in skip else ObjectBuilder()
+        elif event == "end_map" and result is not None:
+            if builder is not None:
+                result[key] = builder.value
+            return result
+        else:
+            return None
+    return result
+
+
+def iter_pages(
+    url_for: Callable[[int, int], str],
+    schema: Dict[str, Any],
+    take: int = LEAGUE_PAGE_SIZE,
+    max_pages: int = LEAGUE_MAX_PAGES,
+    revalidate: bool = False,
+) -> Iterator[List[Any]]:
+    """
+    Walk a ``take``/``skip`` paginated list endpoint and yield its pages.
+
+    The next page is requested in a background thread while the caller
+    processes the current one. Iteration stops at the first empty, short or
+    failed page; a failed page is logged with its URL, and callers can tell
+    the truncation from the end of the list by the last yielded page being full.
+
+    Args:
+        url_for (Callable[[int, int], str]): Builds the page URL from ``(take, skip)``.
+        schema (Dict[str, Any]): The schema to validate each page against.
+        take (int): Page size.
+        max_pages (int): Safety limit on the number of pages.
+        revalidate (bool): Revalidate fresh cached pages with the API, see fetch_bytes.
+
+    Yields:
+        List[Any]: The items of each page.
+    """
+    def fetch(page: int) -> Optional[Any]:
+        return response_to_json(url_for(take, page * take), schema, bulk=True, revalidate=revalidate)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch, 0)
+        for page in range(max_pages):
+            items = future.result()
+            if not isinstance(items, list):
+                logger.warning(f"iter_pages: page {page} failed, stopping at {url_for(take, page * take)}")
+                return
+            if not items:
+                return
+            last = len(items) < take
+            if not last:
+                future = executor.submit(fetch, page + 1)
+            yield items
+            if last:
+                return
+        logger.warning(f"iter_pages: stopped after {max_pages} pages at {url_for(take, max_pages * take)}")
+
+
 def iso8601_to_int(date_string: Union[str, None]) -> Union[int, str]:
     """
     Convert an ISO 8601 date string to a Unix timestamp.
@@ -167,46 +435,98 @@ def string_to_datetime(date_string: Optional[str], tz_string: str = settings.TIM
     return None
 
 
-def process_entities(entity_queryset: QuerySet, task_function: Callable[[int], Any], entity_name: str) -> None:
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
     """
-    Universal function to process pro entities.
+    Split an iterable (possibly a lazy stream) into lists of at most ``size`` items.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_upsert(
+    model: type[Model],
+    objs: List[Model],
+    unique_fields: List[str],
+    update_fields: Optional[List[str]] = None,
+    batch_size: int = 1000,
+) -> None:
+    """
+    Insert or update many rows with ``INSERT ... ON CONFLICT (unique_fields) DO UPDATE``.
+
+    ``unique_fields`` must be covered by a unique constraint. Primary keys of
+    rows that already existed are not reported back, re-query them when needed.
 
     Args:
-        entity_queryset (QuerySet): Queryset to retrieve entity IDs.
-        task_function (Callable[[int], Any]): The task function to be called (e.g., task_get_and_save_player).
-        entity_name (str): String representing the entity type (e.g., 'Player' or 'Account').
+        model (type[Model]): The model class.
+        objs (List[Model]): Unsaved instances.
+        unique_fields (List[str]): Fields of the conflict target.
+        update_fields (Optional[List[str]]): Fields to overwrite on conflict,
+            every concrete field except the primary key, ``created_at`` and
+            ``unique_fields`` by default.
+        batch_size (int): Rows per INSERT statement.
     """
-    try:
-        entity_ids = list(entity_queryset.values_list("id", flat=True))
-        with ThreadPoolExecutor() as executor:
-            futures = {executor.submit(task_function, entity_id): entity_id for entity_id in entity_ids}
-            for future in futures:
-                entity_id = futures[future]
-                try:
-                    future.result()  # Wait for all tasks to complete
-                    logger.info("%s ID: %s", entity_name, entity_id)
-                except Exception as e:
-                    logger.error("Error processing %s ID: %s, error: %s", entity_name, entity_id, repr(e))
-    except Exception as e:
-        logger.error("Failed to process %s entities: %s", entity_name, repr(e))
+    if not objs:
+        return
+    if update_fields is None:
+        skip = set(unique_fields) | {"created_at"}
+        update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in skip
+        ]
+    model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+
+
+def link_m2m(instance: Model, field_name: str, related: List[Model]) -> None:
+    """
+    Add ``related`` objects to a many-to-many field in one INSERT, skipping existing links.
 
+    Args:
+        instance (Model): The owner of the many-to-many field.
+        field_name (str): Name of the field, e.g. ``players``.
+        related (List[Model]): Saved objects to link.
+    """
+    field = instance._meta.get_field(field_name)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    through.objects.bulk_create(
+        [through(**{f"{source}_id": instance.pk, f"{target}_id": obj.pk}) for obj in related],
+        ignore_conflicts=True,
+    )
 
-def process_entities_1(entity_queryset: QuerySet, task_function: Callable[[int], Any], entity_name: str) -> None:
+
+def bulk_insert(model: type[Model], objs: List[Model], batch_size: int = 1000) -> None:
     """
-    Universal function to process pro entities.
+    Insert new rows as fast as the backend allows: ``COPY ... FROM STDIN`` on
+    PostgreSQL (psycopg 3), batched multi-row INSERTs elsewhere.
+
+    Nothing is returned, so primary keys must be set on the instances
+    (``BaseModel`` uuids) or generated by the database.
 
     Args:
-        entity_queryset (QuerySet): Queryset to retrieve entity IDs.
-        task_function (Callable[[int], Any]): The task function to be called (e.g., task_get_and_save_player).
-        entity_name (str): String representing the entity type (e.g., 'Player' or 'Account').
+        model (type[Model]): The model class.
+        objs (List[Model]): Unsaved instances.
+        batch_size (int): Rows per INSERT statement when COPY is not available.
     """
-    try:
-        entity_ids = entity_queryset.values_list("id", flat=True)
-        for entity_id in entity_ids:
-            task_function(entity_id)
-            logger.info("%s ID: %s", entity_name, entity_id)
-    except Exception as e:
-        logger.error(f"Failed to process {entity_name} entities: {repr(e)}")
+    if not objs:
+        return
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor != "postgresql" or not is_psycopg3:
+        model.objects.bulk_create(objs, batch_size=batch_size)
+        return
+    fields = [field for field in model._meta.concrete_fields if not field.db_returning]
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for obj in objs:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
 
 
 def save_data_if_exists(
@@ -224,38 +544,28 @@ def save_data_if_exists(
     return None
 
 
-def process_related_data_1(
-    data: Optional[Dict[str, Any]],
-    key: str,
-    save_function: Callable[..., Any],
-    *args: Any
-) -> None:
-    try:
-        if data and key in data:
-            items = data.get(key, [])
-            items = items if isinstance(items, list) else [items]
-            with ThreadPoolExecutor() as executor:
-                futures = [executor.submit(save_function, item, *args) for item in items]
-                for future in futures:
-                    future.result()  # Wait for all tasks to complete
-    except Exception as e:
-        logger.error(f"process_related_data: Error processing related data for key '{key}': {e}")
-
-
 def process_related_data(
     data: Optional[Dict[str, Any]],
     key: str,
     save_function: Callable[..., Any],
     *args: Any
-) -> None:
+) -> bool:
+    """
+    Save every item under ``key`` with ``save_function``.
+
+    Returns:
+        bool: False if ``save_function`` failed (returned None or raised) for an item.
+    """
     try:
         if data and key in data:
             items = data.get(key, [])
-            items = items if isinstance(items, list) else [items]
-            for item in items:
-                save_function(item, *args)
+            items = items if isinstance(items, (list, Iterator)) else [items]
+            results = [save_function(item, *args) for item in items]
+            return all(result is not None for result in results)
+        return True
     except Exception as e:
         logger.error(f"process_related_data: Error processing related data for key '{key}': {e}")
+        return False
 
 
 def get_hero_info(hero_id: int) -> tuple:
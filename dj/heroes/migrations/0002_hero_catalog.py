@@ -0,0 +1,108 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def merge_duplicate_catalog_rows(apps, schema_editor):
+    """
+    Earlier syncs created abilities, roles and talents per hero, and stats and
+    languages per game version without linking them to heroes. Merge the rows
+    sharing the natural key of the new unique constraints, moving their hero
+    links to the oldest one, and leave ``hero_id`` on the newest language row
+    of each hero only. Nothing else is removed, the next sync rewrites the rest.
+    """
+    Hero = apps.get_model('heroes', 'Hero')
+    tables = {
+        'abilities': ('ability_id', 'slot'),
+        'roles': ('role_id', 'level'),
+        'talents': ('ability_id', 'slot', 'game_version_id'),
+    }
+    for name, key_fields in tables.items():
+        field = Hero._meta.get_field(name)
+        model, through = field.related_model, field.remote_field.through
+        source, target = f'{field.m2m_field_name()}_id', f'{field.m2m_reverse_field_name()}_id'
+        kept = {}
+        for row in model.objects.order_by('created_at').values_list('pk', *key_fields):
+            pk, key = row[0], row[1:]
+            if None in key:
+                continue
+            if key not in kept:
+                kept[key] = pk
+                continue
+            linked = set(through.objects.filter(**{target: kept[key]}).values_list(source, flat=True))
+            moved = set(through.objects.filter(**{target: pk}).values_list(source, flat=True)) - linked
+            through.objects.bulk_create([through(**{source: hero_pk, target: kept[key]}) for hero_pk in moved])
+            through.objects.filter(**{target: pk}).delete()
+            model.objects.filter(pk=pk).delete()
+
+    Language = apps.get_model('heroes', 'Language')
+    seen = set()
+    for pk, hero_id in Language.objects.exclude(hero_id=None).order_by('-updated_at').values_list('pk', 'hero_id'):
+        if hero_id in seen or hero_id < 0:
+            Language.objects.filter(pk=pk).update(hero_id=None)
+        seen.add(hero_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('heroes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeroCatalog',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('game_version_id', models.IntegerField(unique=True)),
+                ('payload_hash', models.CharField(max_length=32)),
+                ('hero_count', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'get_latest_by': 'updated_at',
+            },
+        ),
+        migrations.RemoveField(
+            model_name='hero',
+            name='language',
+        ),
+        migrations.RunPython(merge_duplicate_catalog_rows, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='stat',
+            name='hero_id',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='language',
+            name='hero_id',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='language',
+            name='language_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hero',
+            name='language',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='heroes.language'),
+        ),
+        migrations.AddConstraint(
+            model_name='ability',
+            constraint=models.UniqueConstraint(fields=('ability_id', 'slot'), name='unique_ability_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='role',
+            constraint=models.UniqueConstraint(fields=('role_id', 'level'), name='unique_role_level'),
+        ),
+        migrations.AddConstraint(
+            model_name='talent',
+            constraint=models.UniqueConstraint(fields=('ability_id', 'slot', 'game_version_id'), name='unique_talent'),
+        ),
+    ]
@@ -8,19 +8,35 @@ class Ability(BaseModel):
     slot = models.IntegerField(blank=True, null=True)
     ability_id = models.IntegerField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ability_id", "slot"], name="unique_ability_slot"),
+        ]
+
 
 class Role(BaseModel):
     role_id = models.IntegerField(blank=True, null=True)
     level = models.IntegerField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["role_id", "level"], name="unique_role_level"),
+        ]
+
 
 class Talent(BaseModel):
     slot = models.IntegerField(blank=True, null=True)
     game_version_id = models.IntegerField(blank=True, null=True)
     ability_id = models.IntegerField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ability_id", "slot", "game_version_id"], name="unique_talent"),
+        ]
+
 
 class Stat(BaseModel):
+    hero_id = models.PositiveSmallIntegerField(unique=True, blank=True, null=True)
     game_version_id = models.IntegerField(blank=True, null=True)
     enabled = models.BooleanField(blank=True, null=True)
     hero_unlock_order = models.IntegerField(blank=True, null=True)
@@ -56,9 +72,9 @@ class Stat(BaseModel):
 
 
 class Language(BaseModel):
-    hero_id = models.IntegerField(blank=True, null=True)
+    hero_id = models.PositiveSmallIntegerField(unique=True, blank=True, null=True)
     game_version_id = models.IntegerField(blank=True, null=True)
-    language_id = models.IntegerField(blank=True, null=True, unique=True)
+    language_id = models.IntegerField(blank=True, null=True)
     display_name = models.CharField(max_length=255, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
     hype = models.TextField(blank=True, null=True)
@@ -73,7 +89,7 @@ class Hero(BaseModel):
     roles = models.ManyToManyField(Role, blank=True)
     talents = models.ManyToManyField(Talent, blank=True)
     stat = models.OneToOneField(Stat, on_delete=models.CASCADE, blank=True, null=True)
-    language = models.OneToOneField(Language, to_field='language_id', on_delete=models.CASCADE, blank=True, null=True)
+    language = models.OneToOneField(Language, on_delete=models.CASCADE, blank=True, null=True)
     aliases = models.JSONField(blank=True, null=True)
 
     def __str__(self):
@@ -81,3 +97,18 @@ class Hero(BaseModel):
 
     def get_absolute_url(self):
         return f"/heroes/{self.id}/"
+
+
+class HeroCatalog(BaseModel):
+    """
+    A synced version of the hero catalog, used to skip syncs of unchanged data.
+    """
+    game_version_id = models.IntegerField(unique=True)
+    payload_hash = models.CharField(max_length=32)
+    hero_count = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        get_latest_by = "updated_at"
+
+    def __str__(self):
+        return f"{self.game_version_id}"
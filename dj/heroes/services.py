@@ -1,151 +1,259 @@
 import logging
-from typing import Optional, Any, Dict
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
 
-from django.core.exceptions import ValidationError
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Model
 
 from dj.common.urls import get_url_heroes
-from dj.common.utils import save_data_if_exists, process_related_data, response_to_json
-from dj.heroes.models import Stat, Language
+from dj.common.utils import response_to_json, bulk_upsert, payload_fingerprint
+from dj.heroes.models import Stat, Language, Ability, Role, Talent, HeroCatalog
 from .models import Hero
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_and_process_heroes() -> None:
+def ability_key(ability_data: Dict[str, Any]) -> Tuple:
+    return ability_data.get("abilityId"), ability_data.get("slot")
+
+
+def role_key(role_data: Dict[str, Any]) -> Tuple:
+    return role_data.get("roleId"), role_data.get("level")
+
+
+def talent_key(talent_data: Dict[str, Any]) -> Tuple:
+    return talent_data.get("abilityId"), talent_data.get("slot"), talent_data.get("gameVersionId")
+
+
+# Hero payload key (and many-to-many field) -> (model, natural key fields, key builder)
+CATALOG_TABLES = {
+    "abilities": (Ability, ("ability_id", "slot"), ability_key),
+    "roles": (Role, ("role_id", "level"), role_key),
+    "talents": (Talent, ("ability_id", "slot", "game_version_id"), talent_key),
+}
+
+_lookup: Dict[str, Any] = {"expires": 0.0, "heroes": {}}
+
+
+def fetch_and_process_heroes(force: bool = False) -> bool:
     try:
         url = get_url_heroes()
         response = response_to_json(url, {})
         heroes = response if isinstance(response, dict) else {}
-        for hero_id, hero_data in heroes.items():
-            try:
-                save_hero(hero_data)
-            except ValidationError as e:
-                logger.error(f"Validation error: {e}")
-            except Exception as e:
-                logger.exception(f"An error occurred: {e}")
+        return sync_hero_catalog(list(heroes.values()), force)
     except Exception as e:
         logger.error(
             f"fetch_and_process_heroes: An error occurred during the transaction: {e}"
         )
+        return False
 
 
-@transaction.atomic
-def save_hero(hero_data: Dict[str, Any]) -> Optional[Hero]:
-    try:
-        stat = save_data_if_exists(hero_data, "stat", save_stats)
-        language = save_data_if_exists(hero_data, "language", save_language)
-
-        hero, _ = Hero.objects.update_or_create(
-            id=hero_data.get("id"),
-            defaults={
-                "name": hero_data.get("name"),
-                "display_name": hero_data.get("displayName"),
-                "short_name": hero_data.get("shortName"),
-                "stat": stat,
-                "language": language,
-                "aliases": hero_data.get("aliases", []),
-            },
-        )
+def catalog_version(heroes_data: Iterable[Dict[str, Any]]) -> int:
+    """
+    Latest game version referenced by the stats and languages of a hero catalog.
+    """
+    versions = [
+        section.get("gameVersionId")
+        for hero_data in heroes_data
+        for section in (hero_data.get("stat"), hero_data.get("language"))
+        if section
+    ]
+    return max(filter(None, versions), default=0)
 
-        process_related_data(hero_data, "abilities", save_ability, hero)
-        process_related_data(hero_data, "roles", save_role, hero)
-        process_related_data(hero_data, "talents", save_talent, hero)
 
-        return hero
-    except Exception as e:
-        logger.error("Failed to save hero: %s", e)
-        return None
+def sync_hero_catalog(heroes_data: List[Dict[str, Any]], force: bool = False) -> bool:
+    """
+    Write the whole hero catalog with a few set-based statements per table.
 
+    The catalog is keyed by game version: nothing is written when the version
+    has already been synced from the same payload. Abilities, roles and talents
+    are shared rows keyed on their natural key, and the hero links are replaced.
 
-def save_ability(ability_data: Dict[str, Any], hero: Hero):
-    try:
-        hero.abilities.update_or_create(
-            slot=ability_data.get("slot"), ability_id=ability_data.get("abilityId")
+    :param heroes_data: Hero JSON objects
+    :param force: Sync even if the version is up to date
+    :return: Whether the catalog was written
+    """
+    heroes_data = [hero_data for hero_data in heroes_data if hero_data and hero_data.get("id")]
+    if not heroes_data:
+        return False
+    version = catalog_version(heroes_data)
+    fingerprint = payload_fingerprint(heroes_data)
+    if not force and HeroCatalog.objects.filter(game_version_id=version, payload_hash=fingerprint).exists():
+        logger.info(f"sync_hero_catalog: game version {version} is up to date")
+        return False
+
+    hero_ids = sorted(hero_data["id"] for hero_data in heroes_data)
+    with transaction.atomic():
+        stat_pks = save_by_hero(Stat, {
+            hero_data["id"]: stat_fields(hero_data["stat"]) for hero_data in heroes_data if hero_data.get("stat")
+        })
+        language_pks = save_by_hero(Language, {
+            hero_data["id"]: language_fields(hero_data["language"])
+            for hero_data in heroes_data if hero_data.get("language")
+        })
+        rows = [
+            {**hero_fields(hero_data), "stat_id": stat_pks.get(hero_data["id"]),
+             "language_id": language_pks.get(hero_data["id"])}
+            for hero_data in heroes_data
+        ]
+        bulk_upsert(
+            Hero,
+            [Hero(**row) for row in rows],
+            unique_fields=["id"],
+            update_fields=[name for name in rows[0] if name != "id"] + ["updated_at"],
         )
-    except Exception as e:
-        logger.error("Failed to save hero ability: %s", e)
-        return None
+        hero_pks = dict(Hero.objects.filter(id__in=hero_ids).values_list("id", "pk"))
 
+        for field_name, (model, key_fields, key) in CATALOG_TABLES.items():
+            links = {
+                (hero_pks[hero_data["id"]], key(item))
+                for hero_data in heroes_data
+                for item in hero_data.get(field_name) or []
+                if item and None not in key(item)
+            }
+            pks = save_catalog_rows(model, key_fields, {item_key for _, item_key in links})
+            field = Hero._meta.get_field(field_name)
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            through.objects.filter(**{f"{source}_id__in": hero_pks.values()}).delete()
+            through.objects.bulk_create(
+                [through(**{f"{source}_id": hero_pk, f"{target}_id": pks[item_key]}) for hero_pk, item_key in links],
+                batch_size=1000,
+            )
 
-def save_role(role_data: Dict[str, Any], hero: Hero):
-    try:
-        hero.roles.update_or_create(
-            role_id=role_data.get("roleId"), defaults={"level": role_data.get("level")}
+        HeroCatalog.objects.update_or_create(
+            game_version_id=version, defaults={"payload_hash": fingerprint, "hero_count": len(hero_ids)}
         )
-    except Exception as e:
-        logger.error("Failed to save hero role: %s", e)
-        return None
+        transaction.on_commit(clear_hero_lookup)
+    logger.info(f"sync_hero_catalog: synced {len(hero_ids)} heroes for game version {version}")
+    return True
 
 
-def save_talent(talent_data: Dict[str, Any], hero: Hero):
-    try:
-        hero.talents.update_or_create(
-            slot=talent_data.get("slot"),
-            game_version_id=talent_data.get("gameVersionId"),
-            defaults={"ability_id": talent_data.get("abilityId")},
-        )
-    except Exception as e:
-        logger.error("Failed to save hero talent: %s", e)
-        return None
+def save_by_hero(model: type[Model], rows: Dict[int, Dict[str, Any]]) -> Dict[int, UUID]:
+    """
+    Upsert one row per hero keyed on ``hero_id`` and return their primary keys by hero id.
+    """
+    if not rows:
+        return {}
+    fields = next(iter(rows.values()))
+    bulk_upsert(
+        model,
+        [model(hero_id=hero_id, **row) for hero_id, row in sorted(rows.items())],
+        unique_fields=["hero_id"],
+        update_fields=list(fields) + ["updated_at"],
+    )
+    return dict(model.objects.filter(hero_id__in=rows).values_list("hero_id", "pk"))
 
 
-def save_stats(stat_data: Dict[str, Any]) -> Optional[Stat]:
-    try:
-        stat, _ = Stat.objects.update_or_create(
-            game_version_id=stat_data.get("gameVersionId"),
-            defaults={
-                "enabled": stat_data.get("enabled"),
-                "hero_unlock_order": stat_data.get("heroUnlockOrder"),
-                "team": stat_data.get("team"),
-                "cm_enabled": stat_data.get("cmEnabled"),
-                "new_player_enabled": stat_data.get("newPlayerEnabled"),
-                "attack_type": stat_data.get("attackType"),
-                "starting_armor": stat_data.get("startingArmor"),
-                "starting_magic_armor": stat_data.get("startingMagicArmor"),
-                "starting_damage_min": stat_data.get("startingDamageMin"),
-                "starting_damage_max": stat_data.get("startingDamageMax"),
-                "attack_rate": stat_data.get("attackRate"),
-                "attack_animation_point": stat_data.get("attackAnimationPoint"),
-                "attack_acquisition_range": stat_data.get("attackAcquisitionRange"),
-                "attack_range": stat_data.get("attackRange"),
-                "attribute_primary": stat_data.get("AttributePrimary"),
-                "hero_primary_attribute": stat_data.get("heroPrimaryAttribute"),
-                "strength_base": stat_data.get("strengthBase"),
-                "strength_gain": stat_data.get("strengthGain"),
-                "intelligence_base": stat_data.get("intelligenceBase"),
-                "intelligence_gain": stat_data.get("intelligenceGain"),
-                "agility_base": stat_data.get("agilityBase"),
-                "agility_gain": stat_data.get("agilityGain"),
-                "hp_regen": stat_data.get("hpRegen"),
-                "mp_regen": stat_data.get("mpRegen"),
-                "move_speed": stat_data.get("moveSpeed"),
-                "move_turn_rate": stat_data.get("moveTurnRate"),
-                "hp_bar_offset": stat_data.get("hpBarOffset"),
-                "vision_daytime_range": stat_data.get("visionDaytimeRange"),
-                "vision_nighttime_range": stat_data.get("visionNighttimeRange"),
-                "complexity": stat_data.get("complexity"),
-                "primary_attribute_enum": stat_data.get("primaryAttributeEnum"),
-            },
-        )
-    except Exception as e:
-        logger.error("Failed to save hero stats: %s", e)
-        return None
+def save_catalog_rows(
+    model: type[Model], key_fields: Tuple[str, ...], keys: Iterable[Tuple]
+) -> Dict[Tuple, UUID]:
+    """
+    Insert the missing rows of a shared catalog table and return the primary
+    keys of all ``keys``.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key in keys], batch_size=1000, ignore_conflicts=True
+    )
+    stored = model.objects.filter(**{f"{key_fields[0]}__in": {key[0] for key in keys}})
+    return {tuple(row[1:]): row[0] for row in stored.values_list("pk", *key_fields)}
 
 
-def save_language(language_data: Dict[str, Any]) -> Optional[Language]:
-    try:
-        # Save Language
-        language, _ = Language.objects.update_or_create(
-            game_version_id=language_data.get("gameVersionId"),
-            defaults={
-                "language_id": language_data.get("languageId"),
-                "hero_id": language_data.get("heroId"),
-                "display_name": language_data.get("displayName"),
-                "bio": language_data.get("bio"),
-                "hype": language_data.get("hype"),
-            },
-        )
-    except Exception as e:
-        logger.error("Failed to save hero language: %s", e)
-        return None
+def hero_lookup() -> Dict[int, Dict[str, Any]]:
+    """
+    Hero id -> names, attack type, primary attribute and role ids.
+
+    Held in process memory and reloaded at most every ``HERO_LOOKUP_TTL``
+    seconds, or after a catalog sync in this process, so views and analytics
+    can resolve heroes without touching the database.
+    """
+    now = time.monotonic()
+    if now >= _lookup["expires"]:
+        try:
+            _lookup["heroes"] = load_hero_lookup()
+        except Exception as e:
+            logger.error(f"hero_lookup: failed to load heroes: {e}")
+        _lookup["expires"] = now + getattr(settings, "HERO_LOOKUP_TTL", 300)
+    return _lookup["heroes"]
+
+
+def load_hero_lookup() -> Dict[int, Dict[str, Any]]:
+    heroes = Hero.objects.active().select_related("stat").prefetch_related("roles")
+    return {
+        hero.id: {
+            "id": hero.id,
+            "name": hero.name,
+            "display_name": hero.display_name,
+            "short_name": hero.short_name,
+            "attack_type": hero.stat.attack_type if hero.stat else None,
+            "primary_attribute": hero.stat.attribute_primary if hero.stat else None,
+            "roles": [role.role_id for role in hero.roles.all()],
+        }
+        for hero in heroes
+    }
+
+
+def clear_hero_lookup() -> None:
+    _lookup["expires"] = 0.0
+
+
+def hero_fields(hero_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": hero_data.get("id"),
+        "name": hero_data.get("name"),
+        "display_name": hero_data.get("displayName"),
+        "short_name": hero_data.get("shortName"),
+        "aliases": hero_data.get("aliases", []),
+    }
+
+
+def stat_fields(stat_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "game_version_id": stat_data.get("gameVersionId"),
+        "enabled": stat_data.get("enabled"),
+        "hero_unlock_order": stat_data.get("heroUnlockOrder"),
+        "team": stat_data.get("team"),
+        "cm_enabled": stat_data.get("cmEnabled"),
+        "new_player_enabled": stat_data.get("newPlayerEnabled"),
+        "attack_type": stat_data.get("attackType"),
+        "starting_armor": stat_data.get("startingArmor"),
+        "starting_magic_armor": stat_data.get("startingMagicArmor"),
+        "starting_damage_min": stat_data.get("startingDamageMin"),
+        "starting_damage_max": stat_data.get("startingDamageMax"),
+        "attack_rate": stat_data.get("attackRate"),
+        "attack_animation_point": stat_data.get("attackAnimationPoint"),
+        "attack_acquisition_range": stat_data.get("attackAcquisitionRange"),
+        "attack_range": stat_data.get("attackRange"),
+        "attribute_primary": stat_data.get("AttributePrimary"),
+        "hero_primary_attribute": stat_data.get("heroPrimaryAttribute"),
+        "strength_base": stat_data.get("strengthBase"),
+        "strength_gain": stat_data.get("strengthGain"),
+        "intelligence_base": stat_data.get("intelligenceBase"),
+        "intelligence_gain": stat_data.get("intelligenceGain"),
+        "agility_base": stat_data.get("agilityBase"),
+        "agility_gain": stat_data.get("agilityGain"),
+        "hp_regen": stat_data.get("hpRegen"),
+        "mp_regen": stat_data.get("mpRegen"),
+        "move_speed": stat_data.get("moveSpeed"),
+        "move_turn_rate": stat_data.get("moveTurnRate"),
+        "hp_bar_offset": stat_data.get("hpBarOffset"),
+        "vision_daytime_range": stat_data.get("visionDaytimeRange"),
+        "vision_nighttime_range": stat_data.get("visionNighttimeRange"),
+        "complexity": stat_data.get("complexity"),
+        "primary_attribute_enum": stat_data.get("primaryAttributeEnum"),
+    }
+
+
+def language_fields(language_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "game_version_id": language_data.get("gameVersionId"),
+        "language_id": language_data.get("languageId"),
+        "display_name": language_data.get("displayName"),
+        "bio": language_data.get("bio"),
+        "hype": language_data.get("hype"),
+    }
@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from dj.heroes.services import fetch_and_process_heroes
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def task_sync_hero_catalog(force: bool = False):
+    try:
+        fetch_and_process_heroes(force)
+    except Exception as e:
+        logger.exception(f'Exception in task_sync_hero_catalog: {repr(e)}')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0004_remove_league_pick_bans_league_pick_bans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='series_watermark',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
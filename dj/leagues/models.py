@@ -44,6 +44,8 @@ class League(BaseModel):
     free_to_spectate = models.BooleanField(default=False, blank=True, null=True)
     is_followed = models.BooleanField(default=False, blank=True, null=True)
     last_match_date = models.PositiveBigIntegerField(null=True, blank=True)
+    # Latest series lastMatchDate covered by a complete series sync
+    series_watermark = models.PositiveBigIntegerField(null=True, blank=True)
     pro_circuit_points = models.CharField(max_length=220, null=True, blank=True)
     banner = models.CharField(max_length=220, null=True, blank=True)
     stop_sales_time = models.CharField(max_length=15, null=True, blank=True)
@@ -1,14 +1,16 @@
 import logging
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, List
 
+from django.conf import settings
 from django.db import transaction
 
 from dj.common.urls import get_url_league_list, get_url_league_match_list, get_url_league_series_list
-from dj.common.utils import response_to_json, to_abs, datetime_to_int
+from dj.common.utils import response_to_json, to_abs, iter_pages, bulk_upsert, chunked
 from .models import League, Series
 from .schemas import SCHEMA_LEAGUE_LIST, SCHEMA_LEAGUE_SERIES_LIST
-from ..common.constants import LEAGUE_LIST_COUNT
-from ..matches.tasks import save_match_from_data
+from ..common.constants import LEAGUE_LIST_COUNT, LEAGUE_PAGE_SIZE, MATCH_ID_THRESHOLD
+from ..matches.services import matches_to_ingest, mark_pending
+from ..matches.tasks import queue_match_batch
 from ..teams.models import Team
 
 logger = logging.getLogger(__name__)
@@ -17,41 +19,95 @@ logger = logging.getLogger(__name__)
 def get_and_save_league_matches(league_id: int) -> None:
     try:
         league, _ = League.objects.get_or_create(id=league_id)
-        url = get_url_league_match_list(league_id, 300, 0)
-        response = response_to_json(url, {})
+        pages = iter_pages(lambda take, skip: get_url_league_match_list(league_id, take, skip), {})
         # response = load_json('dj/common/json/pgl-matches.json')
-        matches_list = response if isinstance(response, list) else []
-        for match in matches_list:
-            save_match_from_data.delay(match)
+        for matches_list in pages:
+            queue_matches(matches_list, min_match_id=0)
     except Exception as e:
         logger.error(f"get_and_save_league_series: An error occurred: {e}")
 
 
 def get_and_save_league_series(league_id: int, force: bool = False) -> None:
+    """
+    Sync the series of a league incrementally.
+
+    Series whose last match is not newer than the league's ``series_watermark``
+    are skipped without touching the database, the others are checked against
+    the stored series with one lookup per page and only new or changed ones are
+    saved. The watermark only advances after a complete sync without errors, and
+    a finished league already synced past its end date is not fetched at all.
+
+    :param league_id: League ID
+    :param force: Save every series regardless of the watermark, and bypass fresh cached pages
+    """
     try:
         league, _ = League.objects.get_or_create(id=league_id)
-        url = get_url_league_series_list(league_id, 300, 0)
-        response = response_to_json(url, SCHEMA_LEAGUE_SERIES_LIST)
+        watermark = None if force else league.series_watermark
+        if watermark and league.is_over and league.end_datetime and watermark >= league.end_datetime:
+            return
+        pages = iter_pages(
+            lambda take, skip: get_url_league_series_list(league_id, take, skip),
+            SCHEMA_LEAGUE_SERIES_LIST,
+            revalidate=force,
+        )
         # response = load_json('dj/common/json/series.json')
-        series_list = response if isinstance(response, list) else []
-
-        for series_data in series_list:
-            series, _ = Series.objects.get_or_create(id=series_data.get('id'))
-            is_need = series_data.get('lastMatchDate') >= datetime_to_int(series.updated_at)
-            if force or is_need:
-                save_series_data(series_data)
+        latest, complete, failed = league.series_watermark or 0, False, False
+        for series_list in pages:
+            latest = max([latest] + [series_data.get('lastMatchDate') or 0 for series_data in series_list])
+            complete = len(series_list) < LEAGUE_PAGE_SIZE
+            matches = []
+            for series_data in series_list if force else series_to_sync(series_list, watermark):
+                if save_series(series_data) is None:
+                    failed = True
+                    continue
+                matches.extend(series_data.get('matches') or [])
+            queue_matches(matches)
+        if complete and not failed and latest != (league.series_watermark or 0):
+            League.objects.filter(id=league_id).update(series_watermark=latest, last_match_date=latest)
     except Exception as e:
         logger.error(f"get_and_save_league_series: An error occurred: {e}")
 
 
-def save_series_data(series_data: Dict[str, Any]) -> None:
-    try:
-        save_series(series_data)
-        for match_data in series_data['matches']:
-            if int(match_data.get('id')) > 7833796201:
-                save_match_from_data.delay(match_data)
-    except Exception as e:
-        logger.error(f"process_series_data: Error processing series data: {e}")
+def series_to_sync(series_list: List[Dict[str, Any]], watermark: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Select the series that are new or changed since they were last saved.
+
+    :param series_list: Series JSON objects of one page
+    :param watermark: Series whose last match is not newer than this are skipped, None to check them all
+    :return: Series JSON objects to save
+    """
+    candidates = [
+        series_data for series_data in series_list
+        if watermark is None or (series_data.get('lastMatchDate') or 0) > watermark
+    ]
+    if not candidates:
+        return []
+    stored = dict(
+        Series.objects.filter(id__in=[series_data.get('id') for series_data in candidates])
+        .values_list('id', 'last_match_date_time')
+    )
+    return [
+        series_data for series_data in candidates
+        if series_data.get('id') not in stored
+        or (series_data.get('lastMatchDate') or 0) > (stored[series_data.get('id')] or 0)
+    ]
+
+
+def queue_matches(matches_data: Iterable[Dict[str, Any]], min_match_id: int = MATCH_ID_THRESHOLD) -> int:
+    """
+    Queue the matches that the ingestion ledger does not consider done, in
+    tasks of ``MATCH_INGEST_BATCH_SIZE`` matches that carry claim-check keys.
+
+    :param matches_data: Match JSON objects
+    :param min_match_id: Matches up to this id are ignored
+    :return: Number of matches queued
+    """
+    selected = matches_to_ingest(matches_data, min_match_id)
+    if selected:
+        mark_pending(int(match_data['id']) for match_data in selected)
+    for batch in chunked(selected, getattr(settings, 'MATCH_INGEST_BATCH_SIZE', 50)):
+        queue_match_batch(batch)
+    return len(selected)
 
 
 def save_series(series_data: Dict[str, Any]) -> Optional[Series]:
@@ -79,45 +135,67 @@ def save_series(series_data: Dict[str, Any]) -> Optional[Series]:
         return None
 
 
+def league_fields(league_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': league_data.get('id'),
+        'registration_period': league_data.get('registrationPeriod'),
+        'country': league_data.get('country'),
+        'venue': league_data.get('venue'),
+        'private': league_data.get('private'),
+        'city': league_data.get('city'),
+        'description': league_data.get('description'),
+        'has_live_matches': league_data.get('hasLiveMatches'),
+        'tier': league_data.get('tier'),
+        'tournament_url': league_data.get('tournamentUrl'),
+        'free_to_spectate': league_data.get('freeToSpectate'),
+        'is_followed': league_data.get('isFollowed'),
+        'pro_circuit_points': league_data.get('proCircuitPoints'),
+        'banner': league_data.get('banner'),
+        'stop_sales_time': league_data.get('stopSalesTime'),
+        'image_uri': league_data.get('imageUri'),
+        'display_name': league_data.get('displayName'),
+        'end_datetime': league_data.get('endDateTime'),
+        'name': league_data.get('name'),
+        'prize_pool': league_data.get('prizePool'),
+        'base_prize_pool': league_data.get('basePrizePool'),
+        'region': league_data.get('region'),
+        'start_datetime': league_data.get('startDateTime'),
+        'status': league_data.get('status'),
+    }
+
+
 def save_league(league_data: Dict[str, Any]) -> Optional[League]:
     """
     Save or update a league record in the database.
     """
     try:
-        instance, _ = League.objects.update_or_create(
-            id=league_data.get('id'),
-            defaults={
-                'registration_period': league_data.get('registrationPeriod'),
-                'country': league_data.get('country'),
-                'venue': league_data.get('venue'),
-                'private': league_data.get('private'),
-                'city': league_data.get('city'),
-                'description': league_data.get('description'),
-                'has_live_matches': league_data.get('hasLiveMatches'),
-                'tier': league_data.get('tier'),
-                'tournament_url': league_data.get('tournamentUrl'),
-                'free_to_spectate': league_data.get('freeToSpectate'),
-                'is_followed': league_data.get('isFollowed'),
-                'pro_circuit_points': league_data.get('proCircuitPoints'),
-                'banner': league_data.get('banner'),
-                'stop_sales_time': league_data.get('stopSalesTime'),
-                'image_uri': league_data.get('imageUri'),
-                'display_name': league_data.get('displayName'),
-                'end_datetime': league_data.get('endDateTime'),
-                'name': league_data.get('name'),
-                'prize_pool': league_data.get('prizePool'),
-                'base_prize_pool': league_data.get('basePrizePool'),
-                'region': league_data.get('region'),
-                'start_datetime': league_data.get('startDateTime'),
-                'status': league_data.get('status'),
-            }
-        )
+        defaults = league_fields(league_data)
+        instance, _ = League.objects.update_or_create(id=defaults.pop('id'), defaults=defaults)
         return instance
     except Exception as e:
         logger.error(f'An error occurred while saving League: {e}')
         return None
 
 
+def save_leagues(leagues_data: Iterable[Dict[str, Any]]) -> int:
+    """
+    Upsert a list of leagues with one ``INSERT ... ON CONFLICT (id)`` per batch.
+
+    :param leagues_data: League JSON objects
+    :return: Number of leagues written
+    """
+    rows = list({row['id']: row for row in map(league_fields, leagues_data) if row['id']}.values())
+    if not rows:
+        return 0
+    bulk_upsert(
+        League,
+        [League(**row) for row in rows],
+        unique_fields=['id'],
+        update_fields=[name for name in rows[0] if name != 'id'] + ['updated_at'],
+    )
+    return len(rows)
+
+
 @transaction.atomic
 def fetch_and_process_leagues() -> None:
     """
@@ -125,10 +203,9 @@ def fetch_and_process_leagues() -> None:
     """
     try:
         url = get_url_league_list(take=LEAGUE_LIST_COUNT, order_by='-startDateTime')
-        response = response_to_json(url, SCHEMA_LEAGUE_LIST)
+        response = response_to_json(url, SCHEMA_LEAGUE_LIST, bulk=True)
         tournaments = response if isinstance(response, list) else []
-        for league_data in tournaments:
-            save_league(league_data)
+        save_leagues(tournaments)
         League.objects.update_is_over()
     except Exception as e:
         logger.error(f"fetch_and_process_leagues: An error occurred during the transaction: {e}")
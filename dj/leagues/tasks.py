@@ -4,7 +4,7 @@ from celery import shared_task
 
 from .models import League, Series
 from .services import fetch_and_process_leagues, get_and_save_league_series, get_and_save_league_matches
-from ..common.utils import process_entities
+from ..common.tasks import fan_out_entities
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +38,6 @@ def check_and_save_leagues_data():
     try:
         League.objects.update_is_over()
         Series.objects.update_is_over()
-        process_entities(League.objects.tier2(), task_get_and_save_league_series, 'League')
+        fan_out_entities(League.objects.tier2(), task_get_and_save_league_series, 'League')
     except Exception as e:
         logger.exception("Failed to check_and_save_leagues_data: %s", e)
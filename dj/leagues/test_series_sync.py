@@ -0,0 +1,119 @@
+from typing import Any, Dict, List
+from unittest import mock
+
+import pytest
+
+from dj.leagues import services
+from dj.leagues.models import League, Series
+from dj.leagues.services import get_and_save_league_series, save_series, series_to_sync
+
+pytestmark = pytest.mark.django_db
+
+LEAGUE_ID = 15728
+
+
+def series_payload(series_id: int, last_match_date: int, match_ids: List[int] = ()) -> Dict[str, Any]:
+    return {
+        "id": series_id,
+        "leagueId": LEAGUE_ID,
+        "type": 1,
+        "teamOneId": 1,
+        "teamTwoId": 2,
+        "lastMatchDate": last_match_date,
+        "matches": [{"id": match_id} for match_id in match_ids],
+    }
+
+
+@pytest.fixture()
+def league() -> League:
+    return League.objects.create(id=LEAGUE_ID)
+
+
+@pytest.fixture()
+def queue_matches():
+    with mock.patch.object(services, "queue_matches") as queue_matches:
+        yield queue_matches
+
+
+def sync(pages: List[List[Dict[str, Any]]], force: bool = False) -> mock.Mock:
+    with mock.patch.object(services, "iter_pages", return_value=iter(pages)) as iter_pages:
+        get_and_save_league_series(LEAGUE_ID, force=force)
+    return iter_pages
+
+
+def test_series_to_sync_skips_series_up_to_the_watermark(league, django_assert_num_queries):
+    series_list = [series_payload(1, 100), series_payload(2, 200)]
+
+    with django_assert_num_queries(0):
+        assert series_to_sync(series_list, watermark=200) == []
+    assert [series_data["id"] for series_data in series_to_sync(series_list, watermark=150)] == [2]
+
+
+def test_series_to_sync_skips_unchanged_series(league, django_assert_num_queries):
+    save_series(series_payload(1, 100))
+    save_series(series_payload(2, 200))
+    series_list = [series_payload(1, 100), series_payload(2, 250), series_payload(3, 50)]
+
+    with django_assert_num_queries(1):
+        selected = series_to_sync(series_list)
+
+    assert [series_data["id"] for series_data in selected] == [2, 3]
+
+
+def test_complete_sync_advances_the_watermark(league, queue_matches):
+    sync([[series_payload(1, 100, [11]), series_payload(2, 200, [21, 22])]])
+
+    league.refresh_from_db()
+    assert league.series_watermark == league.last_match_date == 200
+    assert Series.objects.count() == 2
+    assert [match["id"] for match in queue_matches.call_args.args[0]] == [11, 21, 22]
+
+
+def test_next_sync_only_saves_newer_series(league, queue_matches):
+    sync([[series_payload(1, 100), series_payload(2, 200)]])
+
+    with mock.patch.object(services, "save_series", wraps=save_series) as saving:
+        sync([[series_payload(1, 100), series_payload(2, 200), series_payload(3, 300)]])
+
+    assert [call.args[0]["id"] for call in saving.call_args_list] == [3]
+    league.refresh_from_db()
+    assert league.series_watermark == 300
+
+
+def test_failed_series_keeps_the_watermark(league, queue_matches):
+    league.series_watermark = 100
+    league.save()
+
+    with mock.patch.object(services, "save_series", return_value=None):
+        sync([[series_payload(2, 200)]])
+
+    league.refresh_from_db()
+    assert league.series_watermark == 100
+
+
+def test_incomplete_sync_keeps_the_watermark(league, queue_matches):
+    with mock.patch.object(services, "LEAGUE_PAGE_SIZE", 2):
+        sync([[series_payload(1, 100), series_payload(2, 200)]])
+
+    league.refresh_from_db()
+    assert league.series_watermark is None
+    assert Series.objects.count() == 2
+
+
+def test_finished_league_synced_past_its_end_is_not_fetched(league, queue_matches):
+    League.objects.filter(id=LEAGUE_ID).update(is_over=True, end_datetime=300, series_watermark=300)
+
+    iter_pages = sync([[series_payload(3, 400)]])
+
+    iter_pages.assert_not_called()
+    assert not Series.objects.exists()
+
+
+def test_forced_sync_saves_every_series(league, queue_matches):
+    sync([[series_payload(1, 100), series_payload(2, 200)]])
+
+    with mock.patch.object(services, "save_series", wraps=save_series) as saving:
+        iter_pages = sync([[series_payload(1, 100), series_payload(2, 200)]], force=True)
+
+    assert saving.call_count == 2
+    assert iter_pages.call_args.kwargs["revalidate"] is True
@@ -8,6 +8,7 @@ from django.views.decorators.http import require_POST, require_GET
 from django.views.generic import ListView, DetailView
 from orjson import orjson
 
+from dj.common.constants import QUEUE_INTERACTIVE, PRIORITY_INTERACTIVE
 from dj.leagues.models import League, Series
 
 
@@ -89,7 +90,8 @@ def update_league_data(request, league_id):
     try:
         league, _ = League.objects.get_or_create(id=league_id)
         current_app.send_task(
-            "dj.leagues.tasks.task_get_and_save_league_series", args=[league.id, True]
+            "dj.leagues.tasks.task_get_and_save_league_series", args=[league.id, True],
+            queue=QUEUE_INTERACTIVE, priority=PRIORITY_INTERACTIVE,
         )
         messages.success(request, 'Task "Update League Data" is running!')
     except League.DoesNotExist:
@@ -110,7 +112,8 @@ def update_series_matches(request, series_id):
             'win': series.winning_team_id,
         }
         current_app.send_task(
-            "dj.matches.tasks.task_get_and_save_object_matches", args=['series', series_id]
+            "dj.matches.tasks.task_get_and_save_object_matches", args=['series', series_id],
+            queue=QUEUE_INTERACTIVE, priority=PRIORITY_INTERACTIVE,
         )
         response_data = orjson.dumps(series_data)
         return HttpResponse(response_data, content_type='application/json')
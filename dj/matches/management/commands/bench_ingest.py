@@ -0,0 +1,99 @@
+import re
+import time
+from typing import Callable, Iterable, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from orjson import orjson
+
+from dj.common.constants import LEAGUE_MAX_PAGES, LEAGUE_PAGE_SIZE
+from dj.common.replay import ReplayServer, get_fixture_store, use_api
+from dj.common.tasks import eager_tasks
+from dj.common.urls import get_url_league_series_list, get_url_match
+from dj.leagues.services import get_and_save_league_series
+from dj.matches.services import save_match_payload
+from dj.players.services import get_and_save_player
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ingestion against recorded STRATZ fixtures: matches/sec and queries/match "
+        "for save_match_payload, get_and_save_league_series and get_and_save_player. "
+        "Writes are rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--match", type=int, nargs="*", help="Match IDs, every recorded match by default")
+        parser.add_argument("--league", type=int, nargs="*", help="League IDs, every recorded league by default")
+        parser.add_argument("--player", type=int, nargs="*", help="Player IDs, every recorded player by default")
+        parser.add_argument("--only", choices=["matches", "series", "players"], nargs="*", help="Scenarios to run")
+        parser.add_argument("--repeat", type=int, default=1, help="Run each scenario this many times")
+        parser.add_argument("--latency", type=float, default=0.0, help="Replay server latency in seconds")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Replay server 503 rate")
+        parser.add_argument("--keep", action="store_true", help="Commit the ingested rows")
+        parser.add_argument("--dir", default=None, help="Fixture directory, STRATZ_FIXTURES_DIR by default")
+
+    def handle(self, *args, **options):
+        self.store = get_fixture_store(options["dir"])
+        keys = self.store.keys()
+        if not keys:
+            raise CommandError(f"No fixtures in {self.store.root}, run record_stratz_fixtures first")
+
+        match_ids = options["match"] or self._ids(keys, r"match/(\d+)")
+        league_ids = options["league"] or self._ids(keys, r"league/(\d+)/series\?")
+        player_ids = options["player"] or self._ids(keys, r"player/(\d+)")
+        scenarios = options["only"] or ["matches", "series", "players"]
+        self.keep = options["keep"]
+
+        server = ReplayServer(self.store, latency=options["latency"], error_rate=options["error_rate"])
+        server.start()
+        try:
+            # Series fan out to save_matches_from_data, run it inline so its queries are counted.
+            with use_api(server.url), override_settings(HTTP_CACHE_ENABLED=False), eager_tasks():
+                for _ in range(options["repeat"]):
+                    if "matches" in scenarios and match_ids:
+                        self._run("save_match_payload", "match", lambda: self._save_matches(match_ids))
+                    if "series" in scenarios and league_ids:
+                        self._run("get_and_save_league_series", "match", lambda: self._save_series(league_ids))
+                    if "players" in scenarios and player_ids:
+                        self._run("get_and_save_player", "player", lambda: self._save_players(player_ids))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @staticmethod
+    def _ids(keys: Iterable[str], pattern: str) -> List[int]:
+        return [int(m.group(1)) for key in keys if (m := re.match(pattern, key))]
+
+    def _run(self, name: str, unit: str, func: Callable[[], int]) -> None:
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            count = func()
+            elapsed = time.perf_counter() - started
+            if not self.keep:
+                transaction.set_rollback(True)
+        per_second = count / elapsed if elapsed else 0.0
+        per_item = len(queries) / count if count else 0.0
+        self.stdout.write(
+            f"{name:<28} {count:>6} {unit}s in {elapsed:8.3f}s  "
+            f"{per_second:9.1f} {unit}s/s  {len(queries):>7} queries  {per_item:8.1f} queries/{unit}"
+        )
+
+    def _save_matches(self, match_ids: List[int]) -> int:
+        payloads = [self.store.get(get_url_match(match_id)) for match_id in match_ids]
+        return sum(1 for body in payloads if body and save_match_payload(body))
+
+    def _save_series(self, league_ids: List[int]) -> int:
+        count = 0
+        for league_id in league_ids:
+            for page in range(LEAGUE_MAX_PAGES):
+                body = self.store.get(get_url_league_series_list(league_id, LEAGUE_PAGE_SIZE, page * LEAGUE_PAGE_SIZE))
+                if body is None:
+                    break
+                count += sum(len(series.get("matches") or []) for series in orjson.loads(body) or [])
+            get_and_save_league_series(league_id, force=True)
+        return count
+
+    def _save_players(self, player_ids: List[int]) -> int:
+        return sum(1 for player_id in player_ids if get_and_save_player(player_id))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from orjson import orjson
+
+from dj.common.constants import LEAGUE_MAX_PAGES, LEAGUE_PAGE_SIZE
+from dj.common.replay import get_fixture_store
+from dj.common.urls import get_url_league_series_list, get_url_match, get_url_player, get_url_team
+
+
+class Command(BaseCommand):
+    help = "Record live STRATZ responses into the fixture store used by serve_stratz_fixtures and bench_ingest."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--match", type=int, nargs="*", default=[], help="Match IDs")
+        parser.add_argument("--league", type=int, nargs="*", default=[], help="League IDs (series list)")
+        parser.add_argument("--player", type=int, nargs="*", default=[], help="Player (steam account) IDs")
+        parser.add_argument("--team", type=int, nargs="*", default=[], help="Team IDs")
+        parser.add_argument(
+            "--with-matches", action="store_true",
+            help="Also record every match referenced by the recorded league series",
+        )
+        parser.add_argument("--dir", default=None, help="Fixture directory, STRATZ_FIXTURES_DIR by default")
+
+    def handle(self, *args, **options):
+        store = get_fixture_store(options["dir"])
+        match_ids = list(options["match"])
+        recorded = failed = 0
+
+        def record(url):
+            nonlocal recorded, failed
+            path = store.record(url)
+            if path:
+                recorded += 1
+                self.stdout.write(f"{url} -> {path.name}")
+            else:
+                failed += 1
+                self.stderr.write(f"failed: {url}")
+            return path
+
+        for league_id in options["league"]:
+            for page in range(LEAGUE_MAX_PAGES):
+                path = record(get_url_league_series_list(league_id, LEAGUE_PAGE_SIZE, page * LEAGUE_PAGE_SIZE))
+                series_list = orjson.loads(path.read_bytes()) if path else None
+                if not isinstance(series_list, list):
+                    break
+                if options["with_matches"]:
+                    for series in series_list:
+                        match_ids.extend(match["id"] for match in series.get("matches") or [])
+                if len(series_list) < LEAGUE_PAGE_SIZE:
+                    break
+        for match_id in dict.fromkeys(match_ids):
+            record(get_url_match(match_id))
+        for player_id in options["player"]:
+            record(get_url_player(player_id))
+        for team_id in options["team"]:
+            record(get_url_team(team_id))
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded {recorded} fixtures into {store.root} ({failed} failed)"))
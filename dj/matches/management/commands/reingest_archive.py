@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from orjson import orjson
+
+from dj.common.archive import LEAGUE_SERIES, MATCH, PLAYER, entity_id, get_archive
+from dj.common.tasks import eager_tasks
+from dj.leagues.services import queue_matches, save_series
+from dj.matches.services import save_match_payload
+from dj.players.services import save_player_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild matches, league series and players from the raw payload archive "
+        "(PAYLOAD_ARCHIVE_URL) without calling the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kinds", nargs="+", choices=["match", "series", "player"])
+        parser.add_argument("--ids", type=int, nargs="*", help="Only these match, league or player IDs")
+        parser.add_argument("--workers", type=int, default=8, help="Parallel workers, each with its own DB connection")
+
+    def handle(self, *args, **options):
+        archive = get_archive()
+        if archive is None:
+            raise CommandError("The payload archive is disabled, set PAYLOAD_ARCHIVE_URL")
+
+        savers = {
+            "match": (MATCH, self._save_match),
+            "series": (LEAGUE_SERIES, self._save_series_page),
+            "player": (PLAYER, self._save_player),
+        }
+        ids = set(options["ids"] or [])
+        # Series fan out to save_matches_from_data, save those matches inline as well.
+        with eager_tasks():
+            for kind in options["kinds"]:
+                archive_kind, save = savers[kind]
+                names = [name for name in archive.names(archive_kind) if not ids or entity_id(name) in ids]
+                started = time.perf_counter()
+                saved = self._run(archive, archive_kind, names, save, options["workers"])
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"{kind}: {saved}/{len(names)} payloads re-ingested in {elapsed:.1f}s"
+                ))
+
+    @staticmethod
+    def _run(archive, kind: str, names: List[str], save: Callable[[str, bytes], bool], workers: int) -> int:
+        workers = max(1, min(workers, len(names)))
+        chunks = [names[i::workers] for i in range(workers)]
+
+        def work(chunk: List[str]) -> int:
+            saved = 0
+            try:
+                for name in chunk:
+                    body = archive.get(kind, name)
+                    if body and save(name, body):
+                        saved += 1
+            finally:
+                connection.close()
+            return saved
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(work, chunks))
+
+    @staticmethod
+    def _save_match(name: str, body: bytes) -> bool:
+        return bool(save_match_payload(body))
+
+    @staticmethod
+    def _save_series_page(name: str, body: bytes) -> bool:
+        series_list = orjson.loads(body)
+        matches = []
+        for series_data in series_list if isinstance(series_list, list) else []:
+            save_series(series_data)
+            matches.extend(series_data.get("matches") or [])
+        queue_matches(matches)
+        return True
+
+    @staticmethod
+    def _save_player(name: str, body: bytes) -> bool:
+        player_data = orjson.loads(body)
+        return bool(save_player_data(entity_id(name), player_data if isinstance(player_data, dict) else {}))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from dj.common.replay import ReplayServer, get_fixture_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve recorded STRATZ fixtures over HTTP. "
+        "Point STRATZ_API_URL at the printed URL to run the app offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8800)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay up to this many seconds")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+        parser.add_argument("--dir", default=None, help="Fixture directory, STRATZ_FIXTURES_DIR by default")
+
+    def handle(self, *args, **options):
+        store = get_fixture_store(options["dir"])
+        server = ReplayServer(
+            store,
+            address=(options["host"], options["port"]),
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+        )
+        self.stdout.write(f"Serving {len(store)} fixtures from {store.root}")
+        self.stdout.write(self.style.SUCCESS(f"STRATZ_API_URL={server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
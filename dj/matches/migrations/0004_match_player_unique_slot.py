@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+def dedupe_match_players(apps, schema_editor):
+    """
+    Keep the most recently updated row per (match_id, player_slot) and drop
+    the others together with their many-to-many links.
+    """
+    Match = apps.get_model('matches', 'Match')
+    MatchPlayer = apps.get_model('matches', 'MatchPlayer')
+    table = MatchPlayer._meta.db_table
+    losers = f'''
+        SELECT a.uuid FROM {table} a
+        JOIN {table} b ON a.match_id = b.match_id AND a.player_slot = b.player_slot
+        WHERE (a.updated_at, a.uuid) < (b.updated_at, b.uuid)
+    '''
+    for name in ('players', 'radiant_players', 'dire_players'):
+        field = Match._meta.get_field(name)
+        through = field.remote_field.through._meta.db_table
+        column = field.m2m_reverse_name()
+        schema_editor.execute(f'DELETE FROM {through} WHERE {column} IN ({losers})')
+    schema_editor.execute(f'DELETE FROM {table} WHERE uuid IN ({losers})')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_alter_match_dire_team_alter_match_league_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_match_players, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='matchplayer',
+            constraint=models.UniqueConstraint(fields=('match_id', 'player_slot'), name='unique_match_player_slot'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+def backfill_pick_ban_match_id(apps, schema_editor):
+    """
+    Copy the match id from the Match.pick_bans link table, then keep the most
+    recently updated row per (match_id, order) and drop the others with their links.
+    """
+    Match = apps.get_model('matches', 'Match')
+    MatchPickBan = apps.get_model('matches', 'MatchPickBan')
+    table = MatchPickBan._meta.db_table
+    field = Match._meta.get_field('pick_bans')
+    through = field.remote_field.through._meta.db_table
+    source, target = field.m2m_column_name(), field.m2m_reverse_name()
+    schema_editor.execute(f'''
+        UPDATE {table} SET match_id = m.id
+        FROM {through} t JOIN {Match._meta.db_table} m ON m.uuid = t.{source}
+        WHERE t.{target} = {table}.uuid
+    ''')
+    losers = f'''
+        SELECT a.uuid FROM {table} a
+        JOIN {table} b ON a.match_id = b.match_id AND a."order" = b."order"
+        WHERE (a.updated_at, a.uuid) < (b.updated_at, b.uuid)
+    '''
+    schema_editor.execute(f'DELETE FROM {through} WHERE {target} IN ({losers})')
+    schema_editor.execute(f'DELETE FROM {table} WHERE uuid IN ({losers})')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0004_match_player_unique_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchpickban',
+            name='match_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_pick_ban_match_id, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='matchpickban',
+            constraint=models.UniqueConstraint(fields=('match_id', 'order'), name='unique_match_pick_ban_order'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0005_match_pick_ban_match_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='payload_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+def backfill_match_ingestions(apps, schema_editor):
+    """
+    Record every stored match as saved so that the crawlers do not queue them again.
+    """
+    Match = apps.get_model('matches', 'Match')
+    MatchIngestion = apps.get_model('matches', 'MatchIngestion')
+    schema_editor.execute(f'''
+        INSERT INTO {MatchIngestion._meta.db_table} (match_id, state, parsed_date_time, attempts, last_error, updated_at)
+        SELECT id, 'saved', parsed_date_time, 0, '', updated_at FROM {Match._meta.db_table}
+    ''')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0006_match_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchIngestion',
+            fields=[
+                ('match_id', models.PositiveBigIntegerField(primary_key=True, serialize=False)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('saved', 'Saved'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('parsed_date_time', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'match_ingestions',
+            },
+        ),
+        migrations.RunPython(backfill_match_ingestions, migrations.RunPython.noop),
+    ]
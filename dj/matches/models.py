@@ -28,6 +28,7 @@ class MatchPickBanManager(BaseManager):
 
 
 class MatchPickBan(BaseModel):
+    match_id = models.PositiveBigIntegerField(blank=True, null=True)
     is_pick = models.BooleanField(blank=True, null=True)
     hero_id = models.IntegerField(blank=True, null=True)
     order = models.IntegerField(blank=True, null=True)
@@ -42,6 +43,11 @@ class MatchPickBan(BaseModel):
 
     objects = MatchPickBanManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["match_id", "order"], name="unique_match_pick_ban_order"),
+        ]
+
     @property
     def hero_image_url(self):
         url_image = "https://dj.binetc.site/static/images/heroes/npc_dota_hero_"
@@ -142,6 +148,11 @@ class MatchPlayer(BaseModel):
     calculate_imp_lane = models.IntegerField(blank=True, null=True)
     game_version_id = models.IntegerField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["match_id", "player_slot"], name="unique_match_player_slot"),
+        ]
+
     def __str__(self):
         return f" player {self.steam_account_id}"
 
@@ -350,6 +361,7 @@ class Match(BaseModel):
         MatchPlayer, related_name="dire_matches_played", blank=True
     )
     game_result = models.PositiveBigIntegerField(blank=True, null=True)
+    payload_hash = models.CharField(max_length=32, blank=True, null=True, editable=False)
 
     objects = MatchManager()
 
@@ -374,3 +386,33 @@ class Match(BaseModel):
 
     def get_count_radiant_kills(self):
         return sum_elements(self.radiant_kills)
+
+
+class MatchIngestion(models.Model):
+    """
+    Ledger of the match ids queued by the crawlers and how far their ingestion got.
+    """
+    PENDING = "pending"
+    SAVED = "saved"
+    FAILED = "failed"
+    STATES = [(PENDING, "Pending"), (SAVED, "Saved"), (FAILED, "Failed")]
+
+    match_id = models.PositiveBigIntegerField(primary_key=True)
+    state = models.CharField(max_length=10, choices=STATES, default=PENDING)
+    parsed_date_time = models.PositiveBigIntegerField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "match_ingestions"
+
+    def __str__(self):
+        return f"{self.match_id} {self.state}"
+
+    @property
+    def is_done(self) -> bool:
+        """
+        Saved from a parsed payload: nothing left to fetch for this match.
+        """
+        return self.state == self.SAVED and self.parsed_date_time is not None
@@ -1,34 +1,50 @@
 import logging
 from collections import Counter
 from itertools import combinations
-from typing import Dict, Any, Optional, Union, List, Tuple
+from datetime import timedelta
+from typing import Dict, Any, Optional, Union, List, Tuple, Iterable, Set
+from uuid import UUID
 
-from django.db import transaction
-from django.db.models import Q, Model, Subquery, QuerySet
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Model, Subquery, QuerySet
+from django.utils import timezone
+from orjson import orjson
 
 from .models import (
     Match,
     MatchPlayer,
     MatchPickBan,
     CourierEvent,
+    CourierEventDetail,
     MatchPlaybackData,
     WardEvent,
     TowerDeathEvent,
     RoshanEvent,
     BuildingEvent,
     MatchRuneEvent,
+    MatchIngestion,
 )
-from ..common.constants import TEAM
+from ..common.async_fetch import iter_fetch_json
+from ..common.constants import MATCH_ID_THRESHOLD, TEAM
 from ..common.urls import get_url_match
 from ..common.utils import (
     get_hero_info,
     scale_size,
-    process_related_data,
-    to_abs, response_to_json, )
-from ..players.services import save_player_instance
+    to_abs, response_to_bytes, is_oversized, iter_json_items, json_object_without, bulk_upsert, link_m2m, bulk_insert, chunked, payload_fingerprint, )
+from ..heroes.services import hero_lookup
+from ..players.services import ensure_player_stubs
 
 logger = logging.getLogger(__name__)
 
+# Matches known to be saved from a parsed payload, see matches_to_ingest
+_done_match_ids: Set[int] = set()
+
+# Sections of a match payload saved separately from the match row
+MATCH_SECTIONS = ("playbackData", "players", "pickBans")
+PLAYBACK_EVENTS = ("runeEvents", "courierEvents", "wardEvents", "towerDeathEvents", "roshanEvents", "buildingEvents")
+PLAYBACK_EVENT_BATCH_SIZE = 5000
+
 
 def fetch_matches(id_obj: int, obj: str, filters: Q = Q()) -> QuerySet:
     """
@@ -157,6 +173,7 @@ def create_node(hero_id: int, count: int, min_count: int, max_count: int) -> Dic
     return {
         "id": hero_id,
         "name": hero_name,
+        "display_name": hero_lookup().get(hero_id, {}).get("display_name"),
         "count": count,
         "image": hero_image,
         "size": scale_size(count, min_count, max_count),
@@ -208,320 +225,591 @@ def get_hero_data_for_player(player_id: int, filters: Q = Q()) -> Dict[str, Any]
 def fetch_and_process_match(match_id: int) -> None | Model:
     try:
         url = get_url_match(match_id)
-        response = response_to_json(url, {})
-        # response = load_json('dj/common/json/7833796201.json')
-        match = response if isinstance(response, dict) else {}
-        return save_match_data(match)
+        body = response_to_bytes(url)
+        return save_match_payload(body, match_id) if body else None
     except Exception as e:
         logger.error(f"fetch_and_process_match: An error occurred during the transaction: {e}")
 
 
-def save_match_data(match_data: Dict[str, Any]) -> None | Model:
+def fetch_and_process_matches(match_ids: Iterable[int]) -> int:
+    """
+    Fetch many matches concurrently and save them as they arrive.
+
+    :param match_ids: IDs of the matches to fetch
+    :return: Number of matches saved
+    """
+    saved = 0
+    urls = {get_url_match(match_id): match_id for match_id in match_ids}
+    for url, body in iter_fetch_json(list(urls), {}, raw=True):
+        try:
+            if body and save_match_payload(body, urls[url]):
+                saved += 1
+        except Exception as e:
+            logger.error(f"fetch_and_process_matches: Error saving {url}: {e}")
+    return saved
+
+
+def save_match_payload(body: bytes, match_id: Optional[int] = None) -> None | Model:
+    """
+    Save a raw match payload.
+
+    Payloads over ``JSON_STREAM_THRESHOLD`` are never loaded whole: the match
+    fields are built first, then players, pick/bans and playback events are
+    parsed and saved one item at a time.
+
+    :param body: Match JSON as returned by the API
+    :param match_id: ID of the requested match, recorded as failed if the payload is unreadable
+    :return: The saved match
+    """
+    streamed = is_oversized(body)
+    try:
+        if streamed:
+            match_data = json_object_without(body, MATCH_SECTIONS)
+            fingerprint = payload_fingerprint(body)
+        else:
+            match_data = orjson.loads(body)
+    except Exception:
+        match_data = None
+    if not isinstance(match_data, dict) or not match_data:
+        logger.error(f"save_match_payload: unreadable payload for match {match_id}")
+        record_failed(match_id, ValueError("unreadable match payload"))
+        return None
+    if not streamed:
+        return save_match_data(match_data, match_id=match_id)
+    sections = {
+        "players": iter_json_items(body, "players.item"),
+        "pickBans": iter_json_items(body, "pickBans.item"),
+    }
+    plb_data = json_object_without(body, PLAYBACK_EVENTS, "playbackData")
+    if plb_data is not None:
+        for key in PLAYBACK_EVENTS:
+            plb_data[key] = iter_json_items(body, f"playbackData.{key}.item")
+        sections["playbackData"] = plb_data
+    return save_match_data(match_data, sections, fingerprint, match_id)
+
+
+def save_match_data(
+    match_data: Dict[str, Any],
+    sections: Optional[Dict[str, Any]] = None,
+    fingerprint: Optional[str] = None,
+    match_id: Optional[int] = None,
+) -> None | Model:
+    """
+    Save a match and its sections in a single transaction.
+
+    :param match_data: Match JSON
+    :param sections: ``playbackData``, ``players`` and ``pickBans`` when they are
+        streamed separately, taken from ``match_data`` otherwise
+    :param fingerprint: Fingerprint of the whole payload when only part of it is in ``match_data``,
+        computed from ``match_data`` if omitted
+    :param match_id: ID of the requested match, ``match_data["id"]`` if omitted
+    :return: The saved match
+    """
+    if match_id is None and isinstance(match_data, dict):
+        match_id = match_data.get("id")
     try:
         if not match_data.get("endDateTime"):
             logger.error("save match MISSING endDateTime")
+            record_failed(match_id, ValueError("missing endDateTime"))
             return None
 
-        match, _ = Match.objects.update_or_create(
-            id=match_data.get("id"),
-            defaults={
-                "did_radiant_win": match_data.get("didRadiantWin", None),
-                "duration_seconds": match_data.get("durationSeconds", None),
-                "start_date_time": match_data.get("startDateTime", None),
-                "tower_status_radiant": match_data.get("towerStatusRadiant", None),
-                "tower_status_dire": match_data.get("towerStatusDire", None),
-                "barracks_status_radiant": match_data.get(
-                    "barracksStatusRadiant", None
-                ),
-                "barracks_status_dire": match_data.get("barracksStatusDire", None),
-                "cluster_id": match_data.get("clusterId", None),
-                "first_blood_time": match_data.get("firstBloodTime", None),
-                "lobby_type": match_data.get("lobbyType", None),
-                "num_human_players": match_data.get("numHumanPlayers", None),
-                "game_mode": match_data.get("gameMode", None),
-                "replay_salt": match_data.get("replaySalt", None),
-                "is_stats": match_data.get("isStats", None),
-                "tournament_id": match_data.get("tournamentId", None),
-                "tournament_round": match_data.get("tournamentRound", None),
-                "average_rank": match_data.get("averageRank", None),
-                "actual_rank": match_data.get("actualRank", None),
-                "average_imp": match_data.get("averageImp", None),
-                "parsed_date_time": match_data.get("parsedDateTime", None),
-                "stats_date_time": match_data.get("statsDateTime", None),
-                "league_id": match_data.get("leagueId", None),
-                "radiant_team_id": to_abs(match_data, 'radiantTeamId'),
-                "dire_team_id": to_abs(match_data, 'direTeamId'),
-                "series_id": match_data.get("seriesId", None),
-                "game_version_id": match_data.get("gameVersionId", None),
-                "region_id": match_data.get("regionId", None),
-                "sequence_num": match_data.get("sequenceNum", None),
-                "rank": match_data.get("rank", None),
-                "bracket": match_data.get("bracket", None),
-                "end_date_time": match_data.get("endDateTime", None),
-                "actual_rank_weight": match_data.get("actualRankWeight", None),
-                "analysis_outcome": match_data.get("analysisOutcome", None),
-                "predicted_outcome_weight": match_data.get(
-                    "predictedOutcomeWeight", None
-                ),
-                "bottom_lane_outcome": match_data.get("bottomLaneOutcome", None),
-                "mid_lane_outcome": match_data.get("midLaneOutcome"),
-                "top_lane_outcome": match_data.get("topLaneOutcome"),
-                "radiant_networth_lead": match_data.get("radiantNetworthLead"),
-                "radiant_experience_lead": match_data.get("radiantExperienceLead"),
-                "radiant_kills": match_data.get("radiantKills"),
-                "dire_kills": match_data.get("direKills"),
-                "tower_status": match_data.get("towerStatus"),
-                "lane_report": match_data.get("laneReport"),
-                "win_rates": match_data.get("winRates"),
-                "predicted_win_rates": match_data.get("predictedWinRates"),
-                "tower_deaths": match_data.get("towerDeaths"),
-                "chat_events": match_data.get("chatEvents"),
-                "did_request_download": match_data.get("didRequestDownload"),
-                "game_result": match_data.get("gameResult"),
-            },
-        )
-        plb_data = match_data.get("playbackData")
-        if plb_data:
-            plb_instance = save_playback_data(plb_data, match_data.get("id"))
-            match.playback_data = plb_instance
-            match.save()
-
-        process_related_data(match_data, "players", save_match_player, match)
-        process_related_data(match_data, "pickBans", save_match_pick_ban, match)
-        return match
+        with transaction.atomic():
+            match = save_match_unit(
+                match_data,
+                match_data if sections is None else sections,
+                fingerprint or payload_fingerprint(match_data),
+            )
+            record_ingested(match.id, match.parsed_date_time)
+            return match
     except Exception as e:
         logger.error("Unexpected error occurred while saving match: %s", e)
+        record_failed(match_id, e)
 
 
-def save_courier_event(event_data: Dict[str, Any], plb: MatchPlaybackData) -> CourierEvent:
-    try:
-        instance, _ = plb.courier_events.update_or_create(
-            id=event_data.get("id"),
-            owner=event_data.get("owner"),
-            is_radiant=event_data.get("isRadiant"),
-        )
-        process_related_data(event_data, "events", save_courier_event_event, instance)
-        return instance
+def save_matches_data(matches_data: Iterable[Dict[str, Any]]) -> int:
+    """
+    Save a batch of match payloads, each in its own write unit.
 
-    except Exception as e:
-        logger.error("save_courier_event error: %s", e)
+    Matches are not merged into one transaction: a bad payload only rolls back
+    its own match and the ingestion ledger records the outcome of each one.
 
+    :param matches_data: Match JSON objects
+    :return: Number of matches saved
+    """
+    return sum(1 for match_data in matches_data if save_match_data(match_data))
 
-def save_courier_event_event(event_data: Dict[str, Any], courier_event: CourierEvent):
-    try:
-        instance, _ = courier_event.events.update_or_create(
-            time=event_data.get("time"),
-            x=event_data.get("x"),
-            y=event_data.get("y"),
-            defaults={
-                "hp": event_data.get("hp"),
-                "is_flying": event_data.get("is_flying"),
-                "respawn_time": event_data.get("respawn_time"),
-                "item0Id": event_data.get("item0Id"),
-                "item1Id": event_data.get("item1Id"),
-                "item2Id": event_data.get("item2Id"),
-                "item3Id": event_data.get("item3Id"),
-                "item4Id": event_data.get("item4Id"),
-                "item5Id": event_data.get("item5Id"),
-            },
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_courier_event_event error: %s", e)
 
+def save_match_unit(match_data: Dict[str, Any], sections: Dict[str, Any], fingerprint: str) -> Match:
+    """
+    Write a match and all of its children, to be run inside a transaction.
+
+    The stored match row is locked first so that concurrent writers of the
+    same match queue up, and returned untouched when its ``payload_hash``
+    equals ``fingerprint``. Otherwise playback data, players and pick/bans are
+    written, then the match row with one INSERT or UPDATE, then the
+    many-to-many links. Foreign keys are only checked at commit on PostgreSQL,
+    so an error anywhere rolls the whole match back.
+
+    :param match_data: Match JSON
+    :param sections: ``playbackData``, ``players`` and ``pickBans``
+    :param fingerprint: Fingerprint of the payload
+    :return: The saved match
+    """
+    current = (
+        Match.objects.select_for_update()
+        .only("uuid", "id", "created_at", "deleted_at", "parsed_date_time", "payload_hash", "playback_data")
+        .filter(id=match_data.get("id"))
+        .first()
+    )
+    if current and current.payload_hash == fingerprint:
+        logger.debug(f"save_match_unit: match {current.id} is unchanged")
+        return current
+
+    fields = match_fields(match_data)
+    match = Match(**fields, payload_hash=fingerprint)
+    if current:
+        match.uuid, match.created_at, match.deleted_at = current.uuid, current.created_at, current.deleted_at
+        match.playback_data_id = current.playback_data_id
+        match._state.adding = False
+
+    plb_data = sections.get("playbackData")
+    if plb_data:
+        match.playback_data = save_playback_data(plb_data, match.playback_data_id)
+    players = save_match_players(sections.get("players"), match)
+    pick_bans = save_match_pick_bans(sections.get("pickBans"), match)
+
+    if current:
+        update_fields = [name for name in fields if name != "id"]
+        match.save(update_fields=[*update_fields, "playback_data", "payload_hash", "updated_at"])
+    else:
+        match.save(force_insert=True)
+    link_m2m(match, "players", players)
+    link_m2m(match, "pick_bans", pick_bans)
+    return match
 
-def save_rune_events(event_data: Dict[str, Any], plb: MatchPlaybackData) -> MatchRuneEvent:
-    try:
-        instance, _ = plb.rune_events.update_or_create(
-            id=event_data.get("id"),
-            time=event_data.get("time"),
-            action=event_data.get("action"),
-            defaults={
-                "x": event_data.get("x"),
-                "y": event_data.get("y"),
-                "location": event_data.get("location"),
-                "rune_type": event_data.get("runeType"),
-            },
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_rune_events error: %s", e)
 
+def match_fields(match_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": match_data.get("id"),
+        "did_radiant_win": match_data.get("didRadiantWin", None),
+        "duration_seconds": match_data.get("durationSeconds", None),
+        "start_date_time": match_data.get("startDateTime", None),
+        "tower_status_radiant": match_data.get("towerStatusRadiant", None),
+        "tower_status_dire": match_data.get("towerStatusDire", None),
+        "barracks_status_radiant": match_data.get(
+            "barracksStatusRadiant", None
+        ),
+        "barracks_status_dire": match_data.get("barracksStatusDire", None),
+        "cluster_id": match_data.get("clusterId", None),
+        "first_blood_time": match_data.get("firstBloodTime", None),
+        "lobby_type": match_data.get("lobbyType", None),
+        "num_human_players": match_data.get("numHumanPlayers", None),
+        "game_mode": match_data.get("gameMode", None),
+        "replay_salt": match_data.get("replaySalt", None),
+        "is_stats": match_data.get("isStats", None),
+        "tournament_id": match_data.get("tournamentId", None),
+        "tournament_round": match_data.get("tournamentRound", None),
+        "average_rank": match_data.get("averageRank", None),
+        "actual_rank": match_data.get("actualRank", None),
+        "average_imp": match_data.get("averageImp", None),
+        "parsed_date_time": match_data.get("parsedDateTime", None),
+        "stats_date_time": match_data.get("statsDateTime", None),
+        "league_id": match_data.get("leagueId", None),
+        "radiant_team_id": to_abs(match_data, 'radiantTeamId'),
+        "dire_team_id": to_abs(match_data, 'direTeamId'),
+        "series_id": match_data.get("seriesId", None),
+        "game_version_id": match_data.get("gameVersionId", None),
+        "region_id": match_data.get("regionId", None),
+        "sequence_num": match_data.get("sequenceNum", None),
+        "rank": match_data.get("rank", None),
+        "bracket": match_data.get("bracket", None),
+        "end_date_time": match_data.get("endDateTime", None),
+        "actual_rank_weight": match_data.get("actualRankWeight", None),
+        "analysis_outcome": match_data.get("analysisOutcome", None),
+        "predicted_outcome_weight": match_data.get(
+            "predictedOutcomeWeight", None
+        ),
+        "bottom_lane_outcome": match_data.get("bottomLaneOutcome", None),
+        "mid_lane_outcome": match_data.get("midLaneOutcome"),
+        "top_lane_outcome": match_data.get("topLaneOutcome"),
+        "radiant_networth_lead": match_data.get("radiantNetworthLead"),
+        "radiant_experience_lead": match_data.get("radiantExperienceLead"),
+        "radiant_kills": match_data.get("radiantKills"),
+        "dire_kills": match_data.get("direKills"),
+        "tower_status": match_data.get("towerStatus"),
+        "lane_report": match_data.get("laneReport"),
+        "win_rates": match_data.get("winRates"),
+        "predicted_win_rates": match_data.get("predictedWinRates"),
+        "tower_deaths": match_data.get("towerDeaths"),
+        "chat_events": match_data.get("chatEvents"),
+        "did_request_download": match_data.get("didRequestDownload"),
+        "game_result": match_data.get("gameResult"),
+    }
 
-def save_ward_events(event_data: Dict[str, Any], plb: MatchPlaybackData) -> WardEvent:
-    try:
-        instance, _ = plb.ward_events.update_or_create(
-            id=event_data.get("id"),
-            time=event_data.get("time"),
-            action=event_data.get("action"),
-            defaults={
-                "from_player": event_data.get("fromPlayer"),
-                "x": event_data.get("x"),
-                "y": event_data.get("y"),
-                "ward_type": event_data.get("wardType"),
-                "player_destroyed": event_data.get("playerDestroyed"),
-            },
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_ward_events error: %s", e)
 
+def courier_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": event_data.get("id"),
+        "owner": event_data.get("owner"),
+        "is_radiant": event_data.get("isRadiant"),
+    }
 
-def save_tower_death_events(event_data: Dict[str, Any], plb: MatchPlaybackData) -> TowerDeathEvent:
-    try:
-        instance, _ = plb.tower_death_events.update_or_create(
-            radiant=event_data.get("radiant"),
-            dire=event_data.get("dire"),
-            time=event_data.get("time"),
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_tower_death_events error: %s", e)
 
+def courier_event_detail_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "time": event_data.get("time"),
+        "x": event_data.get("x"),
+        "y": event_data.get("y"),
+        "hp": event_data.get("hp"),
+        "is_flying": event_data.get("isFlying"),
+        "respawn_time": event_data.get("respawnTime"),
+        "item0Id": event_data.get("item0Id"),
+        "item1Id": event_data.get("item1Id"),
+        "item2Id": event_data.get("item2Id"),
+        "item3Id": event_data.get("item3Id"),
+        "item4Id": event_data.get("item4Id"),
+        "item5Id": event_data.get("item5Id"),
+    }
 
-def save_roshan_events(event_data: Dict[str, Any], plb: MatchPlaybackData) -> RoshanEvent:
-    try:
-        instance, _ = plb.roshan_events.update_or_create(
-            time=event_data.get("time"),
-            hp=event_data.get("hp"),
-            item0=event_data.get("item0"),
-            max_hp=event_data.get("maxHp"),
-            x=event_data.get("x"),
-            y=event_data.get("y"),
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_roshan_events error: %s", e)
 
+def rune_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": event_data.get("id"),
+        "time": event_data.get("time"),
+        "action": event_data.get("action"),
+        "x": event_data.get("x"),
+        "y": event_data.get("y"),
+        "location": event_data.get("location"),
+        "rune_type": event_data.get("runeType"),
+    }
 
-def save_building_events(event_data: Dict[str, Any], plb: MatchPlaybackData) -> BuildingEvent:
-    try:
-        instance, _ = plb.building_events.update_or_create(
-            id=event_data.get("id"),
-            time=event_data.get("time"),
-            npc_id=event_data.get("npcId"),
-            defaults={
-                "type": event_data.get("type"),
-                "hp": event_data.get("hp"),
-                "max_hp": event_data.get("maxHp"),
-                "x": event_data.get("x"),
-                "y": event_data.get("y"),
-                "is_radiant": event_data.get("isRadiant"),
-            },
-        )
-        return instance
-    except Exception as e:
-        logger.error("save_building_events error: %s", e)
 
+def ward_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": event_data.get("id"),
+        "time": event_data.get("time"),
+        "action": event_data.get("action"),
+        "from_player": event_data.get("fromPlayer"),
+        "x": event_data.get("x"),
+        "y": event_data.get("y"),
+        "ward_type": event_data.get("wardType"),
+        "player_destroyed": event_data.get("playerDestroyed"),
+    }
 
-@transaction.atomic
-def save_playback_data(plb_data: Dict[str, Any], match_id: int) -> Optional[MatchPlaybackData]:
-    try:
-        instance, _ = MatchPlaybackData.objects.get_or_create(
-            match__id=match_id,
-            radiant_captain_hero_id=plb_data.get("radiantCaptainHeroId"),
-            dire_captain_hero_id=plb_data.get("direCaptainHeroId"),
-        )
-        process_related_data(plb_data, "runeEvents", save_rune_events, instance)
-        # process_related_data(plb_data, "courierEvents", save_courier_event, instance)
-        process_related_data(plb_data, "wardEvents", save_ward_events, instance)
-        process_related_data(plb_data, "towerDeathEvents", save_tower_death_events, instance)
-        process_related_data(plb_data, "roshanEvents", save_roshan_events, instance)
-        process_related_data(plb_data, "buildingEvents", save_building_events, instance)
-        return instance
-    except Exception as e:
-        logger.error("save_playback_data error: %s", e)
-        return None
 
+def tower_death_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "radiant": event_data.get("radiant"),
+        "dire": event_data.get("dire"),
+        "time": event_data.get("time"),
+    }
 
-def save_match_pick_ban(pb_data: Dict[str, Any], match: Match) -> MatchPickBan:
-    try:
-        instance, _ = match.pick_bans.update_or_create(
-            order=pb_data.get("order"),
-            defaults={
-                "is_pick": pb_data.get("isPick"),
-                "hero_id": pb_data.get("heroId"),
-                "banned_hero_id": pb_data.get("bannedHeroId"),
-                "is_radiant": pb_data.get("isRadiant"),
-                "player_index": pb_data.get("playerIndex"),
-                "was_banned_successfully": pb_data.get("wasBannedSuccessfully"),
-                "base_win_rate": pb_data.get("baseWinRate"),
-                "adjusted_win_rate": pb_data.get("adjustedWinRate"),
-                "pick_probability": pb_data.get("pickProbability"),
-                "is_captain": pb_data.get("isCaptain"),
-            },
-        )
-        return instance
-    except Exception as e:
-        logger.error("Failed to save match pick ban: %s", e)
+
+def roshan_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "time": event_data.get("time"),
+        "hp": event_data.get("hp"),
+        "item0": event_data.get("item0"),
+        "max_hp": event_data.get("maxHp"),
+        "x": event_data.get("x"),
+        "y": event_data.get("y"),
+    }
+
+
+def building_event_fields(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": event_data.get("id"),
+        "time": event_data.get("time"),
+        "npc_id": event_data.get("npcId"),
+        "type": event_data.get("type"),
+        "hp": event_data.get("hp"),
+        "max_hp": event_data.get("maxHp"),
+        "x": event_data.get("x"),
+        "y": event_data.get("y"),
+        "is_radiant": event_data.get("isRadiant"),
+    }
+
+
+# playbackData key -> (MatchPlaybackData many-to-many field, event model, row builder)
+PLAYBACK_EVENT_TABLES = {
+    "runeEvents": ("rune_events", MatchRuneEvent, rune_event_fields),
+    "courierEvents": ("courier_events", CourierEvent, courier_event_fields),
+    "wardEvents": ("ward_events", WardEvent, ward_event_fields),
+    "towerDeathEvents": ("tower_death_events", TowerDeathEvent, tower_death_event_fields),
+    "roshanEvents": ("roshan_events", RoshanEvent, roshan_event_fields),
+    "buildingEvents": ("building_events", BuildingEvent, building_event_fields),
+}
+
+
+def delete_playback_events(plb: MatchPlaybackData) -> None:
+    """
+    Delete every event of a playback and its links, a few statements per event table.
+    Link rows are removed last; the foreign keys are checked at commit.
+    """
+    plb_id = MatchPlaybackData._meta.pk.get_db_prep_value(plb.pk, connection)
+    with connection.cursor() as cursor:
+        for field_name, model, _ in PLAYBACK_EVENT_TABLES.values():
+            field = MatchPlaybackData._meta.get_field(field_name)
+            through = field.remote_field.through._meta.db_table
+            source, target = field.m2m_column_name(), field.m2m_reverse_name()
+            linked = f"SELECT {target} FROM {through} WHERE {source} = %s"
+            if model is CourierEvent:
+                cursor.execute(
+                    f"DELETE FROM {CourierEventDetail._meta.db_table} WHERE courier_event_id IN ({linked})", [plb_id]
+                )
+            cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE uuid IN ({linked})", [plb_id])
+            cursor.execute(f"DELETE FROM {through} WHERE {source} = %s", [plb_id])
+
+
+def save_playback_events(plb: MatchPlaybackData, plb_data: Dict[str, Any]) -> None:
+    """
+    Replace the events of a playback: previous rows are deleted, then every
+    event list is written in batches of PLAYBACK_EVENT_BATCH_SIZE rows with
+    bulk_insert (COPY on PostgreSQL) together with its link rows.
+    """
+    delete_playback_events(plb)
+    for key, (field_name, model, fields) in PLAYBACK_EVENT_TABLES.items():
+        field = MatchPlaybackData._meta.get_field(field_name)
+        through = field.remote_field.through
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        for chunk in chunked(plb_data.get(key) or [], PLAYBACK_EVENT_BATCH_SIZE):
+            pairs = [(event_data, model(**fields(event_data))) for event_data in chunk if event_data]
+            events = [event for _, event in pairs]
+            bulk_insert(model, events)
+            bulk_insert(through, [through(**{f"{source}_id": plb.pk, f"{target}_id": event.pk}) for event in events])
+            if model is CourierEvent:
+                bulk_insert(CourierEventDetail, [
+                    CourierEventDetail(courier_event_id=event.pk, **courier_event_detail_fields(detail))
+                    for event_data, event in pairs
+                    for detail in event_data.get("events") or []
+                ])
+
+
+def save_playback_data(plb_data: Dict[str, Any], playback_data_id: Optional[UUID] = None) -> MatchPlaybackData:
+    """
+    Write the playback data of a match, reusing its current row if it has one,
+    and replace its events.
+    """
+    fields = {
+        "radiant_captain_hero_id": plb_data.get("radiantCaptainHeroId"),
+        "dire_captain_hero_id": plb_data.get("direCaptainHeroId"),
+    }
+    if playback_data_id:
+        instance, _ = MatchPlaybackData.objects.update_or_create(pk=playback_data_id, defaults=fields)
+    else:
+        instance = MatchPlaybackData.objects.create(**fields)
+    save_playback_events(instance, plb_data)
+    return instance
+
+
+def match_pick_ban_fields(pb_data: Dict[str, Any], match: Match) -> Dict[str, Any]:
+    return {
+        "match_id": match.id,
+        "order": pb_data.get("order"),
+        "is_pick": pb_data.get("isPick"),
+        "hero_id": pb_data.get("heroId"),
+        "banned_hero_id": pb_data.get("bannedHeroId"),
+        "is_radiant": pb_data.get("isRadiant"),
+        "player_index": pb_data.get("playerIndex"),
+        "was_banned_successfully": pb_data.get("wasBannedSuccessfully"),
+        "base_win_rate": pb_data.get("baseWinRate"),
+        "adjusted_win_rate": pb_data.get("adjustedWinRate"),
+        "pick_probability": pb_data.get("pickProbability"),
+        "is_captain": pb_data.get("isCaptain"),
+    }
 
 
-def save_match_player(player_data: Dict[str, Any], match: Match) -> MatchPlayer:
+def save_match_pick_bans(pick_bans_data: Iterable[Dict[str, Any]], match: Match) -> List[MatchPickBan]:
+    """
+    Upsert the whole pick/ban sequence of a match in one statement keyed on
+    (match_id, order) and return the stored rows for linking. Entries without
+    an order would never conflict and pile up on every re-ingest, they are skipped.
+    """
+    rows = [match_pick_ban_fields(pb_data, match) for pb_data in pick_bans_data or [] if pb_data]
+    if any(row["order"] is None for row in rows):
+        logger.warning(f"save_match_pick_bans: skipping pick/bans without order in match {match.id}")
+        rows = [row for row in rows if row["order"] is not None]
+    if not rows:
+        return []
+    unique_fields = ["match_id", "order"]
+    bulk_upsert(
+        MatchPickBan,
+        [MatchPickBan(**row) for row in rows],
+        unique_fields=unique_fields,
+        update_fields=[name for name in rows[0] if name not in unique_fields] + ["updated_at"],
+    )
+    return list(MatchPickBan.objects.filter(match_id=match.id, order__in=[row["order"] for row in rows]))
+
+
+def match_player_fields(player_data: Dict[str, Any], match: Match) -> Dict[str, Any]:
+    return {
+        "match_id": match.id,
+        "player_slot": player_data.get("playerSlot"),
+        "steam_account_id": player_data.get("steamAccountId"),
+        "hero_id": player_data.get("heroId"),
+        "is_radiant": player_data.get("isRadiant"),
+        "num_kills": player_data.get("numKills"),
+        "num_deaths": player_data.get("numDeaths"),
+        "num_assists": player_data.get("numAssists"),
+        "leaver_status": player_data.get("leaverStatus"),
+        "num_last_hits": player_data.get("numLastHits"),
+        "num_denies": player_data.get("numDenies"),
+        "gold_per_minute": player_data.get("goldPerMinute"),
+        "experience_per_minute": player_data.get("experiencePerMinute"),
+        "level": player_data.get("level"),
+        "gold": player_data.get("gold"),
+        "gold_spent": player_data.get("goldSpent"),
+        "hero_damage": player_data.get("heroDamage"),
+        "tower_damage": player_data.get("towerDamage"),
+        "party_id": player_data.get("partyId"),
+        "is_random": player_data.get("isRandom"),
+        "lane": player_data.get("lane"),
+        "streak_prediction": player_data.get("streakPrediction"),
+        "intentional_feeding": player_data.get("intentionalFeeding"),
+        "role": player_data.get("role"),
+        "imp": player_data.get("imp"),
+        "award": player_data.get("award"),
+        "item0_id": player_data.get("item0Id"),
+        "item1_id": player_data.get("item1Id"),
+        "item2_id": player_data.get("item2Id"),
+        "item3_id": player_data.get("item3Id"),
+        "item4_id": player_data.get("item4Id"),
+        "item5_id": player_data.get("item5Id"),
+        "backpack0_id": player_data.get("backpack0Id"),
+        "backpack1_id": player_data.get("backpack1Id"),
+        "backpack2_id": player_data.get("backpack2Id"),
+        "behavior": player_data.get("behavior"),
+        "hero_healing": player_data.get("heroHealing"),
+        "roam_lane": player_data.get("roamLane"),
+        "is_victory": player_data.get("isVictory"),
+        "networth": player_data.get("networth"),
+        "neutral0_id": player_data.get("neutral0Id"),
+        "dota_plus_hero_xp": player_data.get("dotaPlusHeroXp"),
+        "invisible_seconds": player_data.get("invisibleSeconds"),
+        "match_player_stats": player_data.get("matchPlayerStats"),
+        "is_dire": player_data.get("isDire"),
+        "role_basic": player_data.get("roleBasic"),
+        "position": player_data.get("position"),
+        "base_slot": player_data.get("baseSlot"),
+        "kda": player_data.get("kda"),
+        "map_location_home_fountain": player_data.get(
+            "mapLocationHomeFountain"
+        ),
+        "faction": player_data.get("faction"),
+        "calculate_imp_lane": player_data.get("calculateImpLane"),
+        "game_version_id": player_data.get("gameVersionId"),
+        "stats": player_data.get("stats"),
+        "playback_data": player_data.get("playbackData"),
+        "abilities": player_data.get("abilities"),
+    }
+
+
+def save_match_players(players_data: Iterable[Dict[str, Any]], match: Match) -> List[MatchPlayer]:
+    """
+    Upsert all players of a match in one statement keyed on (match_id, player_slot)
+    and return the stored rows for linking. Players without a slot would never
+    conflict and pile up on every re-ingest, they are skipped.
+    """
+    rows = [match_player_fields(player_data, match) for player_data in players_data or [] if player_data]
+    if any(row["player_slot"] is None for row in rows):
+        logger.warning(f"save_match_players: skipping players without playerSlot in match {match.id}")
+        rows = [row for row in rows if row["player_slot"] is not None]
+    if not rows:
+        return []
+    ensure_player_stubs(row["steam_account_id"] for row in rows)
+    unique_fields = ["match_id", "player_slot"]
+    bulk_upsert(
+        MatchPlayer,
+        [MatchPlayer(**row) for row in rows],
+        unique_fields=unique_fields,
+        update_fields=[name for name in rows[0] if name not in unique_fields] + ["updated_at"],
+    )
+    return list(MatchPlayer.objects.filter(
+        match_id=match.id, player_slot__in=[row["player_slot"] for row in rows]
+    ))
+
+
+def matches_to_ingest(
+    matches_data: Iterable[Dict[str, Any]], min_match_id: int = MATCH_ID_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Keep the crawled matches worth (re)ingesting according to the ledger: new
+    ones, failed ones with attempts left, pending ones whose job looks lost and
+    saved ones that upstream has parsed since.
+
+    Matches known to be done are remembered in process memory and skipped
+    without a query; the others are looked up in one query.
+
+    :param matches_data: Match JSON objects as found in series and league lists
+    :param min_match_id: Matches up to this id are ignored
+    :return: The matches to queue
+    """
+    candidates = {}
+    for match_data in matches_data:
+        try:
+            match_id = int(match_data.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if match_id > min_match_id and match_id not in _done_match_ids:
+            candidates[match_id] = match_data
+    if not candidates:
+        return []
+
+    entries = MatchIngestion.objects.in_bulk(list(candidates))
+    selected = []
+    for match_id, match_data in candidates.items():
+        entry = entries.get(match_id)
+        if entry is None or needs_ingest(entry, match_data.get("parsedDateTime")):
+            selected.append(match_data)
+        elif entry.is_done:
+            remember_done(match_id)
+    return selected
+
+
+def needs_ingest(entry: MatchIngestion, parsed_date_time: Optional[int]) -> bool:
+    if entry.state == MatchIngestion.FAILED:
+        return entry.attempts < getattr(settings, "MATCH_INGEST_MAX_ATTEMPTS", 5)
+    if entry.state == MatchIngestion.PENDING:
+        timeout = getattr(settings, "MATCH_INGEST_PENDING_TIMEOUT", 3600)
+        return entry.updated_at < timezone.now() - timedelta(seconds=timeout)
+    return bool(parsed_date_time) and (entry.parsed_date_time or 0) < parsed_date_time
+
+
+def mark_pending(match_ids: Iterable[int]) -> None:
+    """
+    Record that matches were queued, in one statement.
+    """
+    bulk_upsert(
+        MatchIngestion,
+        [MatchIngestion(match_id=match_id) for match_id in sorted(set(match_ids))],
+        unique_fields=["match_id"],
+        update_fields=["state", "updated_at"],
+    )
+
+
+def record_ingested(match_id: int, parsed_date_time: Optional[int]) -> None:
+    bulk_upsert(
+        MatchIngestion,
+        [MatchIngestion(match_id=match_id, state=MatchIngestion.SAVED, parsed_date_time=parsed_date_time)],
+        unique_fields=["match_id"],
+        update_fields=["state", "parsed_date_time", "last_error", "updated_at"],
+    )
+    if parsed_date_time:
+        remember_done(match_id)
+
+
+def record_failed(match_id: Optional[int], error: Exception) -> None:
+    if not match_id:
+        return
     try:
-        save_player_instance(player_data.get("steamAccountId"))
-        instance, _ = match.players.update_or_create(
-            steam_account_id=player_data.get("steamAccountId"),
-            player_slot=player_data.get("playerSlot"),
-            match_id=player_data.get("matchId"),
-            hero_id=player_data.get("heroId"),
-            defaults={
-                "is_radiant": player_data.get("isRadiant"),
-                "num_kills": player_data.get("numKills"),
-                "num_deaths": player_data.get("numDeaths"),
-                "num_assists": player_data.get("numAssists"),
-                "leaver_status": player_data.get("leaverStatus"),
-                "num_last_hits": player_data.get("numLastHits"),
-                "num_denies": player_data.get("numDenies"),
-                "gold_per_minute": player_data.get("goldPerMinute"),
-                "experience_per_minute": player_data.get("experiencePerMinute"),
-                "level": player_data.get("level"),
-                "gold": player_data.get("gold"),
-                "gold_spent": player_data.get("goldSpent"),
-                "hero_damage": player_data.get("heroDamage"),
-                "tower_damage": player_data.get("towerDamage"),
-                "party_id": player_data.get("partyId"),
-                "is_random": player_data.get("isRandom"),
-                "lane": player_data.get("lane"),
-                "streak_prediction": player_data.get("streakPrediction"),
-                "intentional_feeding": player_data.get("intentionalFeeding"),
-                "role": player_data.get("role"),
-                "imp": player_data.get("imp"),
-                "award": player_data.get("award"),
-                "item0_id": player_data.get("item0Id"),
-                "item1_id": player_data.get("item1Id"),
-                "item2_id": player_data.get("item2Id"),
-                "item3_id": player_data.get("item3Id"),
-                "item4_id": player_data.get("item4Id"),
-                "item5_id": player_data.get("item5Id"),
-                "backpack0_id": player_data.get("backpack0Id"),
-                "backpack1_id": player_data.get("backpack1Id"),
-                "backpack2_id": player_data.get("backpack2Id"),
-                "behavior": player_data.get("behavior"),
-                "hero_healing": player_data.get("heroHealing"),
-                "roam_lane": player_data.get("roamLane"),
-                "is_victory": player_data.get("isVictory"),
-                "networth": player_data.get("networth"),
-                "neutral0_id": player_data.get("neutral0Id"),
-                "dota_plus_hero_xp": player_data.get("dotaPlusHeroXp"),
-                "invisible_seconds": player_data.get("invisibleSeconds"),
-                "match_player_stats": player_data.get("matchPlayerStats"),
-                "is_dire": player_data.get("isDire"),
-                "role_basic": player_data.get("roleBasic"),
-                "position": player_data.get("position"),
-                "base_slot": player_data.get("baseSlot"),
-                "kda": player_data.get("kda"),
-                "map_location_home_fountain": player_data.get(
-                    "mapLocationHomeFountain"
-                ),
-                "faction": player_data.get("faction"),
-                "calculate_imp_lane": player_data.get("calculateImpLane"),
-                "game_version_id": player_data.get("gameVersionId"),
-                "stats": player_data.get("stats"),
-                "playback_data": player_data.get("playbackData"),
-                "abilities": player_data.get("abilities"),
-
-            },
-        )
-        return instance
+        fields = {"state": MatchIngestion.FAILED, "last_error": repr(error), "updated_at": timezone.now()}
+        if not MatchIngestion.objects.filter(match_id=match_id).update(attempts=F("attempts") + 1, **fields):
+            MatchIngestion.objects.create(match_id=match_id, attempts=1, **fields)
     except Exception as e:
-        logger.error("Failed to save match player: %s", e)
+        logger.error(f"record_failed: failed to record match {match_id}: {e}")
+
+
+def remember_done(match_id: int) -> None:
+    if len(_done_match_ids) >= getattr(settings, "MATCH_LEDGER_CACHE_SIZE", 200_000):
+        _done_match_ids.clear()
+    _done_match_ids.add(match_id)
@@ -1,13 +1,29 @@
 import logging
 
 from celery import shared_task
+from orjson import orjson
 
-from dj.common.utils import process_entities
-from dj.matches.services import save_match_data, fetch_matches, fetch_and_process_match
+from dj.common.claimcheck import check_in, check_out, release
+from dj.matches.services import (
+    save_match_data, save_matches_data, fetch_matches, fetch_and_process_match, fetch_and_process_matches,
+    record_failed,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def queue_match_batch(matches) -> None:
+    """
+    Queue a batch of match payloads, by claim-check key when a store is available.
+    The match ids travel with the key so that a lost payload can be recorded.
+    """
+    claim = check_in(orjson.dumps(matches))
+    if claim:
+        save_matches_from_data.delay(claim=claim, match_ids=[match_data.get("id") for match_data in matches])
+    else:
+        save_matches_from_data.delay(matches)
+
+
 @shared_task()
 def save_match_from_data(match):
     try:
@@ -16,6 +32,32 @@ def save_match_from_data(match):
         return f"Error saving match: {str(e)}"
 
 
+@shared_task()
+def save_matches_from_data(matches=None, claim=None, match_ids=()):
+    """
+    Save a batch of matches, passed inline or as a claim-check key.
+
+    The claimed payload is released once the batch is saved, and kept until
+    it expires if the task fails. When it cannot be loaded, ``match_ids`` are
+    recorded as failed so that the next crawl queues them again.
+    """
+    try:
+        if claim:
+            body = check_out(claim)
+            if body is None:
+                logger.error(f"save_matches_from_data: claim {claim} is missing, {len(match_ids)} matches not saved")
+                for match_id in match_ids:
+                    record_failed(match_id, LookupError(f"claim {claim} is missing"))
+                return 0
+            matches = orjson.loads(body)
+        saved = save_matches_data(matches or [])
+        if claim:
+            release(claim)
+        return saved
+    except Exception as e:
+        return f"Error saving matches: {str(e)}"
+
+
 @shared_task()
 def task_get_and_save_match(match_id: int):
     try:
@@ -27,8 +69,9 @@ def task_get_and_save_match(match_id: int):
 @shared_task()
 def task_get_and_save_object_matches(obj_type: str, obj_id: int):
     try:
-        matches_qs = fetch_matches(obj_id, obj_type)
-        logger.info("matches count: %s", matches_qs.count())
-        process_entities(matches_qs, task_get_and_save_match, 'match')
+        match_ids = list(fetch_matches(obj_id, obj_type).values_list("id", flat=True))
+        logger.info("matches count: %s", len(match_ids))
+        saved = fetch_and_process_matches(match_ids)
+        logger.info("matches saved: %s", saved)
     except Exception as e:
         return f"Error task_get_and_save_series_matches: {str(e)}"
@@ -0,0 +1,35 @@
+from unittest import mock
+
+import pytest
+from celery import current_app
+from django.core.management import call_command
+
+from dj.common.replay import get_fixture_store
+from dj.common.urls import get_url_match
+from dj.matches.management.commands.bench_ingest import Command
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_101
+
+
+@pytest.fixture(params=[False, True])
+def eager(request):
+    previous = current_app.conf.task_always_eager
+    current_app.conf.task_always_eager = request.param
+    yield request.param
+    current_app.conf.task_always_eager = previous
+
+
+def test_failing_scenario_restores_task_always_eager(tmp_path, eager):
+    get_fixture_store(tmp_path).put(get_url_match(MATCH_ID), b"{}")
+    seen = []
+
+    def run(self, name, unit, func):
+        seen.append(current_app.conf.task_always_eager)
+        raise RuntimeError("scenario failed")
+
+    with mock.patch.object(Command, "_run", run), pytest.raises(RuntimeError):
+        call_command("bench_ingest", "--only", "matches", "--dir", str(tmp_path))
+    assert current_app.conf.task_always_eager is eager
+    assert seen == [True]
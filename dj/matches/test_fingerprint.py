@@ -0,0 +1,39 @@
+from unittest import mock
+
+import pytest
+from orjson import orjson
+
+from dj.common.utils import payload_fingerprint
+from dj.matches import services
+from dj.matches.services import save_match_payload, save_matches_data
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_000
+MATCH = {
+    "id": MATCH_ID,
+    "endDateTime": 1_700_002_400,
+    "durationSeconds": 2400,
+    "players": [{"playerSlot": 0, "steamAccountId": 1000, "kda": 2.5}],
+    "playbackData": {"runeEvents": [{"time": 0, "runeType": 3}]},
+}
+
+
+@pytest.mark.parametrize("threshold", [4 * 1024 * 1024, 0])
+def test_raw_body_and_parsed_payload_share_a_fingerprint(settings, threshold):
+    settings.JSON_STREAM_THRESHOLD = threshold
+    body = orjson.dumps(dict(reversed(MATCH.items())), option=orjson.OPT_INDENT_2)
+
+    assert payload_fingerprint(body) == payload_fingerprint(MATCH)
+
+
+@pytest.mark.parametrize("threshold", [4 * 1024 * 1024, 0])
+def test_crawled_match_is_unchanged_when_fetched(settings, threshold):
+    settings.JSON_STREAM_THRESHOLD = threshold
+    assert save_matches_data([MATCH]) == 1
+
+    with mock.patch.object(services, "save_match_players") as save_match_players:
+        match = save_match_payload(orjson.dumps(MATCH, option=orjson.OPT_INDENT_2), MATCH_ID)
+
+    save_match_players.assert_not_called()
+    assert match.payload_hash == payload_fingerprint(MATCH)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from dj.common.constants import MATCH_ID_THRESHOLD
+from dj.matches import services
+from dj.matches.models import MatchIngestion
+from dj.matches.services import (
+    matches_to_ingest, mark_pending, record_failed, record_ingested, save_match_data, save_match_payload,
+)
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = MATCH_ID_THRESHOLD + 1
+PARSED = 1_700_003_000
+
+
+@pytest.fixture(autouse=True)
+def _done_match_ids():
+    services._done_match_ids.clear()
+    yield
+    services._done_match_ids.clear()
+
+
+def crawled(*match_ids, parsed_date_time=PARSED):
+    return [{"id": match_id, "parsedDateTime": parsed_date_time} for match_id in match_ids]
+
+
+def selected_ids(matches_data):
+    return [match_data["id"] for match_data in matches_to_ingest(matches_data)]
+
+
+def test_new_matches_above_the_threshold_are_selected():
+    matches_data = crawled(MATCH_ID - 1, MATCH_ID, MATCH_ID + 1) + [{"id": None}, {"id": "x"}]
+
+    assert selected_ids(matches_data) == [MATCH_ID, MATCH_ID + 1]
+
+
+def test_pending_matches_are_selected_once_stale(settings):
+    settings.MATCH_INGEST_PENDING_TIMEOUT = 3600
+    mark_pending([MATCH_ID, MATCH_ID + 1])
+    MatchIngestion.objects.filter(match_id=MATCH_ID).update(updated_at=timezone.now() - timedelta(hours=2))
+
+    assert selected_ids(crawled(MATCH_ID, MATCH_ID + 1)) == [MATCH_ID]
+
+
+def test_failed_matches_are_retried_until_attempts_run_out(settings):
+    settings.MATCH_INGEST_MAX_ATTEMPTS = 2
+    record_failed(MATCH_ID, ValueError("missing endDateTime"))
+    assert selected_ids(crawled(MATCH_ID)) == [MATCH_ID]
+
+    record_failed(MATCH_ID, ValueError("missing endDateTime"))
+    entry = MatchIngestion.objects.get(match_id=MATCH_ID)
+    assert entry.attempts == 2
+    assert entry.state == MatchIngestion.FAILED
+    assert selected_ids(crawled(MATCH_ID)) == []
+
+
+def test_saved_matches_are_selected_when_parsed_since():
+    record_ingested(MATCH_ID, None)
+    record_ingested(MATCH_ID + 1, PARSED)
+    services._done_match_ids.clear()
+
+    assert selected_ids(crawled(MATCH_ID, MATCH_ID + 1)) == [MATCH_ID]
+    services._done_match_ids.clear()
+    assert selected_ids(crawled(MATCH_ID + 1, parsed_date_time=PARSED + 60)) == [MATCH_ID + 1]
+
+
+def test_done_matches_are_skipped_without_a_query(django_assert_num_queries):
+    record_ingested(MATCH_ID, PARSED)
+
+    with django_assert_num_queries(0):
+        assert selected_ids(crawled(MATCH_ID)) == []
+
+
+def test_mark_pending_keeps_attempts():
+    record_failed(MATCH_ID, RuntimeError("boom"))
+
+    mark_pending([MATCH_ID, MATCH_ID])
+
+    entry = MatchIngestion.objects.get(match_id=MATCH_ID)
+    assert entry.state == MatchIngestion.PENDING
+    assert entry.attempts == 1
+
+
+@pytest.mark.parametrize("body", [b"", b"{not json", b"null", b"[1, 2]", b"{}"])
+@pytest.mark.parametrize("threshold", [4 * 1024 * 1024, 0])
+def test_unreadable_payload_is_recorded_as_failed(settings, body, threshold):
+    settings.JSON_STREAM_THRESHOLD = threshold
+
+    assert save_match_payload(body, MATCH_ID) is None
+
+    entry = MatchIngestion.objects.get(match_id=MATCH_ID)
+    assert entry.state == MatchIngestion.FAILED
+    assert entry.attempts == 1
+
+
+def test_save_error_is_recorded_under_the_requested_id():
+    assert save_match_data({"endDateTime": 1_700_002_400, "players": 5}, match_id=MATCH_ID) is None
+
+    assert MatchIngestion.objects.get(match_id=MATCH_ID).state == MatchIngestion.FAILED
@@ -0,0 +1,44 @@
+import pytest
+
+from dj.common.utils import link_m2m
+from dj.matches.models import Match, MatchPickBan
+from dj.matches.services import save_match_pick_bans
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_000
+
+
+def pick_ban_payload(order, **fields):
+    return {"order": order, "isPick": order % 2 == 0, "heroId": order + 1, "isRadiant": order % 4 < 2, **fields}
+
+
+def test_save_match_pick_bans_upserts_on_order():
+    match = Match(id=MATCH_ID)
+    save_match_pick_bans([pick_ban_payload(order) for order in range(24)], match)
+
+    saved = save_match_pick_bans([pick_ban_payload(0, heroId=99)], match)
+
+    assert MatchPickBan.objects.filter(match_id=MATCH_ID).count() == 24
+    assert [pick_ban.hero_id for pick_ban in saved] == [99]
+
+
+def test_save_match_pick_bans_skips_entries_without_order():
+    match = Match(id=MATCH_ID)
+    pick_bans_data = [pick_ban_payload(0), {**pick_ban_payload(1), "order": None}]
+
+    save_match_pick_bans(pick_bans_data, match)
+    save_match_pick_bans(pick_bans_data, match)
+
+    assert list(MatchPickBan.objects.values_list("order", flat=True)) == [0]
+
+
+def test_link_m2m_skips_existing_links():
+    match = Match.objects.create(id=MATCH_ID)
+    pick_bans = save_match_pick_bans([pick_ban_payload(order) for order in range(3)], match)
+
+    link_m2m(match, "pick_bans", pick_bans[:2])
+    link_m2m(match, "pick_bans", pick_bans)
+
+    assert set(match.pick_bans.values_list("order", flat=True)) == {0, 1, 2}
+    assert Match.pick_bans.through.objects.filter(match=match).count() == 3
@@ -0,0 +1,49 @@
+import pytest
+
+from dj.common.utils import bulk_upsert
+from dj.matches.models import Match, MatchPlayer
+from dj.matches.services import save_match_players
+from dj.players.models import Player, SteamAccount
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_000
+PLAYER_SLOTS = (0, 1, 2, 3, 4, 128, 129, 130, 131, 132)
+
+
+def player_payload(player_slot, **fields):
+    return {"playerSlot": player_slot, "steamAccountId": 1000 + player_slot, "heroId": 1, "numKills": 5, **fields}
+
+
+def test_bulk_upsert_inserts_then_updates_on_conflict():
+    rows = [MatchPlayer(match_id=MATCH_ID, player_slot=player_slot, num_kills=1) for player_slot in (0, 1)]
+    bulk_upsert(MatchPlayer, rows, unique_fields=["match_id", "player_slot"])
+    rows = [MatchPlayer(match_id=MATCH_ID, player_slot=player_slot, num_kills=9) for player_slot in (1, 2)]
+    bulk_upsert(MatchPlayer, rows, unique_fields=["match_id", "player_slot"], update_fields=["num_kills"])
+
+    stored = dict(MatchPlayer.objects.values_list("player_slot", "num_kills"))
+    assert stored == {0: 1, 1: 9, 2: 9}
+
+
+def test_save_match_players_is_idempotent():
+    match = Match(id=MATCH_ID)
+    players_data = [player_payload(player_slot) for player_slot in PLAYER_SLOTS]
+
+    first = save_match_players(players_data, match)
+    second = save_match_players(players_data, match)
+
+    assert len(first) == len(second) == len(PLAYER_SLOTS)
+    assert {player.uuid for player in first} == {player.uuid for player in second}
+    assert MatchPlayer.objects.count() == len(PLAYER_SLOTS)
+    assert Player.objects.count() == SteamAccount.objects.count() == len(PLAYER_SLOTS)
+
+
+def test_save_match_players_skips_players_without_slot():
+    match = Match(id=MATCH_ID)
+    players_data = [player_payload(0), player_payload(1, playerSlot=None)]
+
+    save_match_players(players_data, match)
+    saved = save_match_players(players_data, match)
+
+    assert [player.player_slot for player in saved] == [0]
+    assert MatchPlayer.objects.count() == 1
@@ -0,0 +1,97 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+from dj.common.utils import bulk_insert
+from dj.matches.models import (
+    MatchPlaybackData,
+    MatchRuneEvent,
+    CourierEvent,
+    CourierEventDetail,
+    WardEvent,
+    TowerDeathEvent,
+    RoshanEvent,
+    BuildingEvent,
+)
+from dj.matches.services import save_playback_data
+
+pytestmark = pytest.mark.django_db
+
+
+def playback_payload(**fields):
+    return {
+        "radiantCaptainHeroId": 1,
+        "direCaptainHeroId": 2,
+        "runeEvents": [{"id": 1, "time": 0, "action": 1, "x": 10, "y": 20, "location": 1, "runeType": 3}],
+        "courierEvents": [{
+            "id": 1,
+            "owner": 0,
+            "isRadiant": True,
+            "events": [{"time": 10, "x": 1, "y": 2, "hp": 100}, {"time": 20, "x": 3, "y": 4, "hp": 90}],
+        }],
+        "wardEvents": [{"id": 1, "time": 30, "action": 0, "fromPlayer": 0, "x": 5, "y": 6, "wardType": 0}],
+        "towerDeathEvents": [{"radiant": 1, "dire": 0, "time": 600}],
+        "roshanEvents": [{"time": 900, "hp": 5000, "maxHp": 6000, "x": 7, "y": 8}],
+        "buildingEvents": [{"id": 1, "time": 600, "npcId": 20, "type": 0, "hp": 0, "maxHp": 1800, "isRadiant": False}],
+        **fields,
+    }
+
+
+def test_bulk_insert_writes_every_row_with_its_primary_key():
+    events = [MatchRuneEvent(time=second, rune_type=1) for second in range(1500)]
+
+    bulk_insert(MatchRuneEvent, events, batch_size=1000)
+
+    assert MatchRuneEvent.objects.count() == 1500
+    assert set(MatchRuneEvent.objects.values_list("uuid", flat=True)) == {event.uuid for event in events}
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql" or not is_psycopg3, reason="COPY is only used on PostgreSQL with psycopg 3"
+)
+def test_bulk_insert_copies_rows_on_postgresql():
+    events = [
+        CourierEvent(id=event_id, owner=event_id % 10, is_radiant=event_id % 2 == 0, time=None)
+        for event_id in range(10)
+    ]
+
+    with mock.patch.object(CourierEvent.objects, "bulk_create") as bulk_create:
+        bulk_insert(CourierEvent, events)
+
+    bulk_create.assert_not_called()
+    stored = {event.uuid: event for event in CourierEvent.objects.all()}
+    assert set(stored) == {event.uuid for event in events}
+    for event in events:
+        copied = stored[event.uuid]
+        assert (copied.id, copied.owner, copied.is_radiant) == (event.id, event.owner, event.is_radiant)
+        assert copied.time is None
+        assert copied.created_at is not None
+
+
+def test_save_playback_data_links_every_event():
+    plb = save_playback_data(playback_payload())
+
+    assert plb.radiant_captain_hero_id == 1
+    assert plb.rune_events.count() == 1
+    assert plb.ward_events.count() == 1
+    assert plb.tower_death_events.count() == 1
+    assert plb.roshan_events.count() == 1
+    assert plb.building_events.count() == 1
+    assert plb.courier_events.get().events.count() == 2
+
+
+def test_save_playback_data_replaces_previous_events():
+    plb = save_playback_data(playback_payload())
+    runes = [{"id": rune_id, "time": rune_id * 120, "runeType": 1} for rune_id in range(3)]
+
+    again = save_playback_data(playback_payload(runeEvents=runes, direCaptainHeroId=5), plb.pk)
+
+    assert again.pk == plb.pk
+    assert MatchPlaybackData.objects.get().dire_captain_hero_id == 5
+    assert sorted(again.rune_events.values_list("time", flat=True)) == [0, 120, 240]
+    assert MatchRuneEvent.objects.count() == 3
+    for model in (CourierEvent, WardEvent, TowerDeathEvent, RoshanEvent, BuildingEvent):
+        assert model.objects.count() == 1
+    assert CourierEventDetail.objects.count() == 2
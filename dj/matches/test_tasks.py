@@ -0,0 +1,33 @@
+import pytest
+from orjson import orjson
+
+from dj.common.claimcheck import check_in
+from dj.matches.models import Match, MatchIngestion
+from dj.matches.tasks import save_matches_from_data
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_000
+
+
+@pytest.fixture()
+def claim_store(settings, tmp_path):
+    settings.CLAIM_CHECK_URL = f"file://{tmp_path}"
+    return tmp_path
+
+
+def test_claimed_batch_is_saved_and_released(claim_store):
+    claim = check_in(orjson.dumps([{"id": MATCH_ID, "endDateTime": 1_700_002_400}]))
+
+    assert save_matches_from_data(claim=claim, match_ids=[MATCH_ID]) == 1
+
+    assert Match.objects.filter(id=MATCH_ID).exists()
+    assert not (claim_store / claim).exists()
+
+
+def test_missing_claim_records_its_matches_as_failed(claim_store):
+    assert save_matches_from_data(claim="expired", match_ids=[MATCH_ID, MATCH_ID + 1]) == 0
+
+    entries = MatchIngestion.objects.filter(match_id__in=[MATCH_ID, MATCH_ID + 1])
+    assert [entry.state for entry in entries] == [MatchIngestion.FAILED] * 2
+    assert all("expired" in entry.last_error for entry in entries)
@@ -0,0 +1,149 @@
+from unittest import mock
+
+import pytest
+from orjson import orjson
+
+from dj.matches import services
+from dj.matches.models import (
+    Match,
+    MatchPlayer,
+    MatchPickBan,
+    MatchPlaybackData,
+    MatchRuneEvent,
+    CourierEvent,
+    CourierEventDetail,
+    MatchIngestion,
+)
+from dj.matches.services import save_match_data, save_match_payload
+
+pytestmark = pytest.mark.django_db
+
+MATCH_ID = 7_900_000_000
+PLAYER_SLOTS = (0, 1, 2, 3, 4, 128, 129, 130, 131, 132)
+
+
+@pytest.fixture(autouse=True)
+def _done_match_ids():
+    services._done_match_ids.clear()
+    yield
+    services._done_match_ids.clear()
+
+
+def match_payload(**fields):
+    """
+    A STRATZ match payload without league, series or team references.
+    """
+    return {
+        "id": MATCH_ID,
+        "didRadiantWin": True,
+        "durationSeconds": 2400,
+        "endDateTime": 1_700_002_400,
+        "parsedDateTime": 1_700_003_000,
+        "players": [
+            {"playerSlot": player_slot, "steamAccountId": 1000 + player_slot, "numKills": 5}
+            for player_slot in PLAYER_SLOTS
+        ],
+        "pickBans": [{"order": order, "isPick": order % 2 == 0, "heroId": order + 1} for order in range(24)],
+        "playbackData": {
+            "radiantCaptainHeroId": 1,
+            "runeEvents": [{"id": 1, "time": 0, "runeType": 3}],
+            "courierEvents": [{"id": 1, "owner": 0, "events": [{"time": 10, "hp": 100}, {"time": 20, "hp": 90}]}],
+        },
+        **fields,
+    }
+
+
+def assert_single_copy(match: Match) -> None:
+    assert Match.objects.filter(id=MATCH_ID).count() == 1
+    assert MatchPlayer.objects.filter(match_id=MATCH_ID).count() == len(PLAYER_SLOTS)
+    assert MatchPickBan.objects.filter(match_id=MATCH_ID).count() == 24
+    assert match.players.count() == len(PLAYER_SLOTS)
+    assert match.pick_bans.count() == 24
+    assert MatchPlaybackData.objects.count() == 1
+    assert MatchRuneEvent.objects.count() == 1
+    assert CourierEvent.objects.count() == 1
+    assert CourierEventDetail.objects.count() == 2
+
+
+def test_save_match_data_writes_match_and_children():
+    match = save_match_data(match_payload())
+
+    assert match.id == MATCH_ID
+    assert match.payload_hash
+    assert match.playback_data.courier_events.get().events.count() == 2
+    assert_single_copy(Match.objects.get(id=MATCH_ID))
+    entry = MatchIngestion.objects.get(match_id=MATCH_ID)
+    assert entry.state == MatchIngestion.SAVED
+    assert entry.parsed_date_time == 1_700_003_000
+
+
+def test_same_payload_is_skipped_on_reingest():
+    body = orjson.dumps(match_payload())
+    first = save_match_payload(body, MATCH_ID)
+
+    with mock.patch.object(services, "save_match_players") as save_match_players:
+        second = save_match_payload(body, MATCH_ID)
+
+    save_match_players.assert_not_called()
+    assert second.uuid == first.uuid
+    assert second.payload_hash == first.payload_hash
+    assert_single_copy(Match.objects.get(id=MATCH_ID))
+
+
+def test_streamed_payload_is_saved_like_a_parsed_one(settings):
+    settings.JSON_STREAM_THRESHOLD = 0
+    body = orjson.dumps(match_payload())
+
+    save_match_payload(body, MATCH_ID)
+    save_match_payload(body, MATCH_ID)
+
+    assert_single_copy(Match.objects.get(id=MATCH_ID))
+
+
+def test_changed_payload_updates_in_place():
+    first = save_match_data(match_payload())
+    players = [{"playerSlot": player_slot, "steamAccountId": 1000 + player_slot, "numKills": 20}
+               for player_slot in PLAYER_SLOTS]
+
+    second = save_match_data(match_payload(durationSeconds=2500, players=players))
+
+    assert second.uuid == first.uuid
+    assert second.payload_hash != first.payload_hash
+    match = Match.objects.get(id=MATCH_ID)
+    assert match.duration_seconds == 2500
+    assert match.playback_data_id == first.playback_data_id
+    assert set(MatchPlayer.objects.filter(match_id=MATCH_ID).values_list("num_kills", flat=True)) == {20}
+    assert_single_copy(match)
+
+
+def test_failing_child_rolls_back_the_whole_match():
+    with mock.patch.object(services, "save_match_pick_bans", side_effect=RuntimeError("boom")):
+        assert save_match_data(match_payload()) is None
+
+    assert not Match.objects.filter(id=MATCH_ID).exists()
+    assert not MatchPlayer.objects.exists()
+    assert not MatchPlaybackData.objects.exists()
+    assert not MatchRuneEvent.objects.exists()
+    entry = MatchIngestion.objects.get(match_id=MATCH_ID)
+    assert entry.state == MatchIngestion.FAILED
+    assert entry.attempts == 1
+    assert "boom" in entry.last_error
+
+
+def test_failing_child_keeps_the_previous_version():
+    first = save_match_data(match_payload())
+
+    with mock.patch.object(services, "save_match_pick_bans", side_effect=RuntimeError("boom")):
+        assert save_match_data(match_payload(durationSeconds=2500)) is None
+
+    match = Match.objects.get(id=MATCH_ID)
+    assert match.duration_seconds == 2400
+    assert match.payload_hash == first.payload_hash
+    assert_single_copy(match)
+
+
+def test_match_without_end_date_is_not_saved():
+    assert save_match_data(match_payload(endDateTime=None)) is None
+
+    assert not Match.objects.exists()
+    assert MatchIngestion.objects.get(match_id=MATCH_ID).state == MatchIngestion.FAILED
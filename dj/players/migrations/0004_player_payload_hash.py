@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0003_remove_player_pick_bans_player_pick_bans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='payload_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
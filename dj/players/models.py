@@ -202,6 +202,7 @@ class Player(BaseModel):
     is_followed = models.BooleanField(default=False, null=True)
     is_favorite = models.BooleanField(default=False, null=True)
     pick_bans = models.ManyToManyField(PopularMatchPickBan, related_name="player", blank=True)
+    payload_hash = models.CharField(max_length=32, blank=True, null=True, editable=False)
     objects = PlayerManager()
 
     def __str__(self):
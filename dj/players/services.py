@@ -1,9 +1,9 @@
 import logging
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, Tuple
 
 from django.db import transaction
 
-from dj.common.utils import response_to_json, save_data_if_exists, process_related_data
+from dj.common.utils import response_to_json, process_related_data, payload_fingerprint, bulk_upsert
 from .models import (
     SteamAccount, ProSteamAccount, PlayerBadge, Player, SeasonRank, PlayerName, BattlePass, TeamMember
 )
@@ -14,37 +14,43 @@ from ..teams.services import save_team
 logger = logging.getLogger(__name__)
 
 
+def pro_steam_account_fields(pro_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'steam_account_id': pro_data.get('steamAccountId'),
+        'name': pro_data.get('name'),
+        'real_name': pro_data.get('realName'),
+        'fantasy_role': pro_data.get('fantasyRole'),
+        'team_id': pro_data.get('teamId'),
+        'sponsor': pro_data.get('sponsor'),
+        'is_locked': pro_data.get('isLocked'),
+        'is_pro': pro_data.get('isPro'),
+        'total_earnings': pro_data.get('totalEarnings'),
+        'birthday': pro_data.get('birthday'),
+        'romanized_real_name': pro_data.get('romanizedRealName'),
+        'roles': pro_data.get('roles'),
+        'statuses': pro_data.get('statuses'),
+        'countries': pro_data.get('countries'),
+        'aliases': pro_data.get('aliases'),
+        'ti_wins': pro_data.get('tiWins'),
+        'is_ti_winner': pro_data.get('istiwinner'),
+        'position': pro_data.get('position'),
+        'twitter_link': pro_data.get('twitterLink'),
+        'twitch_link': pro_data.get('twitchLink'),
+        'instagram_link': pro_data.get('instagramLink'),
+        'vk_link': pro_data.get('vkLink'),
+        'you_tube_link': pro_data.get('youTubeLink'),
+        'facebook_link': pro_data.get('facebookLink'),
+        'weibo_link': pro_data.get('weiboLink'),
+        'signature_heroes': pro_data.get('signatureHeroes'),
+    }
+
+
 def save_pro_steam_account(pro_data: Dict[str, Any]) -> Optional[ProSteamAccount]:
     try:
+        defaults = pro_steam_account_fields(pro_data)
         instance, _ = ProSteamAccount.objects.update_or_create(
-            steam_account_id=pro_data.get('steamAccountId'),
-            defaults={
-                'name': pro_data.get('name'),
-                'real_name': pro_data.get('realName'),
-                'fantasy_role': pro_data.get('fantasyRole'),
-                'team_id': pro_data.get('teamId'),
-                'sponsor': pro_data.get('sponsor'),
-                'is_locked': pro_data.get('isLocked'),
-                'is_pro': pro_data.get('isPro'),
-                'total_earnings': pro_data.get('totalEarnings'),
-                'birthday': pro_data.get('birthday'),
-                'romanized_real_name': pro_data.get('romanizedRealName'),
-                'roles': pro_data.get('roles'),
-                'statuses': pro_data.get('statuses'),
-                'countries': pro_data.get('countries'),
-                'aliases': pro_data.get('aliases'),
-                'ti_wins': pro_data.get('tiWins'),
-                'is_ti_winner': pro_data.get('istiwinner'),
-                'position': pro_data.get('position'),
-                'twitter_link': pro_data.get('twitterLink'),
-                'twitch_link': pro_data.get('twitchLink'),
-                'instagram_link': pro_data.get('instagramLink'),
-                'vk_link': pro_data.get('vkLink'),
-                'you_tube_link': pro_data.get('youTubeLink'),
-                'facebook_link': pro_data.get('facebookLink'),
-                'weibo_link': pro_data.get('weiboLink'),
-                'signature_heroes': pro_data.get('signatureHeroes'),
-            }
+            steam_account_id=defaults.pop('steam_account_id'),
+            defaults=defaults
         )
         return instance
     except Exception as e:
@@ -183,76 +189,166 @@ def save_player_name(name_data: Dict[str, Any], player: Player) -> Optional[Play
         return None
 
 
+def ensure_player_stubs(steam_account_ids: Iterable[Optional[int]]) -> None:
+    """
+    Create the missing SteamAccount, ProSteamAccount and Player rows for many
+    accounts at once: one ``INSERT ... ON CONFLICT DO NOTHING`` per table.
+    Ids are inserted in sorted order so that concurrent batches lock rows in
+    the same order.
+    """
+    ids = sorted({steam_account_id for steam_account_id in steam_account_ids if steam_account_id is not None})
+    if not ids:
+        return
+    SteamAccount.objects.bulk_create([SteamAccount(id=account_id) for account_id in ids], ignore_conflicts=True)
+    ProSteamAccount.objects.bulk_create(
+        [ProSteamAccount(steam_account_id=account_id) for account_id in ids], ignore_conflicts=True
+    )
+    Player.objects.bulk_create(
+        [Player(id=account_id, steam_account_id=account_id) for account_id in ids], ignore_conflicts=True
+    )
+
+
 def save_player_instance(player_id) -> Optional[Player]:
     try:
-        steam_account, _ = SteamAccount.objects.get_or_create(id=player_id)
-        pro_steam_account, _ = ProSteamAccount.objects.get_or_create(steam_account_id=player_id)
-        player, _ = Player.objects.get_or_create(id=player_id, defaults={'steam_account': steam_account})
-        return player
+        ensure_player_stubs([player_id])
+        return Player.objects.get(id=player_id)
     except Exception as e:
         logger.error("Failed to save player instance: %s", e)
         return None
 
 
-@transaction.atomic
-def get_and_save_player(player_id: int) -> Optional[Player]:
+def get_and_save_player(player_id: int, revalidate: bool = False) -> Optional[Player]:
+    response = response_to_json(get_url_player(player_id), SCHEMA_PLAYERS, revalidate=revalidate)
+    # response = load_json('dj/common/json/pl-1.json')
+    player_data = response if isinstance(response, dict) else {}
+    return save_player_data(player_id, player_data)
+
+
+def save_player_data(player_id: int, player_data: Dict[str, Any]) -> Optional[Player]:
+    """
+    Save a player with its accounts, team membership and related rows in one transaction.
+    """
     try:
-        response = response_to_json(get_url_player(player_id), SCHEMA_PLAYERS)
-        # response = load_json('dj/common/json/pl-1.json')
-        player_data = response if isinstance(response, dict) else {}
+        with transaction.atomic():
+            return save_player_unit(player_id, player_data)
+    except Exception as e:
+        logger.error("Failed to save player: %s", e)
+        return None
+
+
+def save_player_unit(player_id: int, player_data: Dict[str, Any]) -> Optional[Player]:
+    """
+    Write a player and its related rows, must run inside a transaction.
 
-        steam_data = player_data.get('steamAccount')
+    The player is returned untouched when its ``payload_hash`` equals the
+    fingerprint of ``player_data``. The hash is written last and only if every
+    related row was saved, so that a partially failed refresh is retried.
 
-        save_player_instance(player_id)
+    :param player_id: Steam account ID
+    :param player_data: Player JSON object
+    :return: The player, None if it could not be saved
+    """
+    # An empty payload is a failed fetch, it is saved but never recorded as unchanged
+    fingerprint = payload_fingerprint(player_data) if player_data else None
+    unchanged = fingerprint and Player.objects.filter(id=player_id, payload_hash=fingerprint).first()
+    if unchanged:
+        logger.debug(f"save_player_data: player {player_id} is unchanged")
+        return unchanged
 
-        save_data_if_exists(steam_data, 'proSteamAccount', save_pro_steam_account)
+    steam_data = player_data.get('steamAccount') or {}
 
-        save_data_if_exists(player_data, 'steamAccount', save_steam_account)
+    complete = save_player_instance(player_id) is not None
 
-        player = save_player(player_data)
+    if steam_data.get('proSteamAccount') is not None:
+        complete &= save_pro_steam_account(steam_data['proSteamAccount']) is not None
 
-        team_data = player_data.get('team')
-        if team_data:
-            save_data_if_exists(team_data, 'team', save_team)
-            team_member, _ = TeamMember.objects.update_or_create(
-                steam_account_id=steam_data.get('id'),
-                team_id=team_data.get('teamId'),
-                defaults={
-                    "first_match_id": team_data.get("firstMatchId"),
-                    "first_match_date_time": team_data.get("firstMatchDateTime"),
-                    "last_match_id": team_data.get("lastMatchId"),
-                    "last_match_date_time": team_data.get("lastMatchDateTime"),
-                },
-            )
-            player.team = team_member
-            player.save()
-        if player:
-            process_related_data(player_data, 'battlePass', save_battle_pass, player)
-            process_related_data(player_data, 'badges', save_badge, player)
-            process_related_data(player_data, 'ranks', save_season_rank, player)
-            process_related_data(player_data, 'names', save_player_name, player)
-        return player
-    except Exception as e:
-        logger.error("Failed to save player: %s", e)
+    if player_data.get('steamAccount') is not None:
+        complete &= save_steam_account(steam_data) is not None
+
+    player = save_player(player_data)
+    if player is None:
+        return None
+
+    team_data = player_data.get('team')
+    if team_data:
+        if team_data.get('team') is not None:
+            complete &= save_team(team_data['team']) is not None
+        team_member, _ = TeamMember.objects.update_or_create(
+            steam_account_id=steam_data.get('id'),
+            team_id=team_data.get('teamId'),
+            defaults={
+                "first_match_id": team_data.get("firstMatchId"),
+                "first_match_date_time": team_data.get("firstMatchDateTime"),
+                "last_match_id": team_data.get("lastMatchId"),
+                "last_match_date_time": team_data.get("lastMatchDateTime"),
+            },
+        )
+        player.team = team_member
+        player.save()
+
+    complete &= process_related_data(player_data, 'battlePass', save_battle_pass, player)
+    complete &= process_related_data(player_data, 'badges', save_badge, player)
+    complete &= process_related_data(player_data, 'ranks', save_season_rank, player)
+    complete &= process_related_data(player_data, 'names', save_player_name, player)
+
+    if complete and fingerprint:
+        Player.objects.filter(id=player.id).update(payload_hash=fingerprint)
+        player.payload_hash = fingerprint
+    return player
 
 
 @transaction.atomic
 def fetch_and_process_pro_players() -> None:
     try:
         pro_players = response_to_json(get_url_pro_steam_acc(), {})
-        for player_id, player_data in pro_players.items():
-            pro_steam_account = save_pro_steam_account(player_data)
-            if pro_steam_account:
-                steam_account, _ = pro_steam_account.steam_account.update_or_create(
-                    id=player_id,
-                    defaults={
-                        'real_name': player_data.get('realName'),
-                        'name': player_data.get('name'),
-                    }
-                )
-                if steam_account:
-                    Player.objects.update_or_create(id=player_id, defaults={
-                        "steam_account": steam_account
-                    })
+        save_pro_players(pro_players.items())
     except Exception as e:
         logger.error("Failed to save pro players: %s", e)
+
+
+def save_pro_players(pro_players: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+    """
+    Upsert the pro accounts, their steam accounts and players with one
+    ``INSERT ... ON CONFLICT`` per table and batch. Rows are sorted by account
+    id so that concurrent refreshes lock them in the same order.
+
+    :param pro_players: ``(steam_account_id, pro data)`` pairs
+    :return: Number of pro players written
+    """
+    pros = {}
+    for player_id, player_data in pro_players:
+        row = pro_steam_account_fields(player_data)
+        if row['steam_account_id']:
+            pros[int(player_id)] = row
+    if not pros:
+        return 0
+    ids = sorted(pros)
+    rows = [pros[player_id] for player_id in ids]
+    unique_fields = ['steam_account_id']
+    bulk_upsert(
+        ProSteamAccount,
+        [ProSteamAccount(**row) for row in rows],
+        unique_fields=unique_fields,
+        update_fields=[name for name in rows[0] if name not in unique_fields] + ['updated_at'],
+    )
+    bulk_upsert(
+        SteamAccount,
+        [
+            SteamAccount(
+                id=player_id,
+                pro_steam_account_id=pros[player_id]['steam_account_id'],
+                real_name=pros[player_id]['real_name'],
+                name=pros[player_id]['name'],
+            )
+            for player_id in ids
+        ],
+        unique_fields=['id'],
+        update_fields=['pro_steam_account', 'real_name', 'name', 'updated_at'],
+    )
+    bulk_upsert(
+        Player,
+        [Player(id=player_id, steam_account_id=player_id) for player_id in ids],
+        unique_fields=['id'],
+        update_fields=['steam_account', 'updated_at'],
+    )
+    return len(ids)
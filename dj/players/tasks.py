@@ -4,7 +4,7 @@ from celery import shared_task
 
 from .models import Player
 from .services import get_and_save_player, fetch_and_process_pro_players
-from ..common.utils import process_entities
+from ..common.tasks import fan_out_entities
 from ..teams.services import update_team_in_players
 
 logger = logging.getLogger(__name__)
@@ -21,10 +21,10 @@ def task_get_and_save_pro_players_list():
 
 
 @shared_task
-def get_and_save_player_data(player_id: int):
+def get_and_save_player_data(player_id: int, revalidate: bool = False):
     """Fetches and updates a specific pro player by their ID."""
     try:
-        get_and_save_player(player_id)
+        get_and_save_player(player_id, revalidate)
     except Exception as e:
         logger.exception(f'Exception in task_get_and_save_player: {repr(e)}')
 
@@ -32,7 +32,7 @@ def get_and_save_player_data(player_id: int):
 @shared_task()
 def check_and_save_pro_players():
     try:
-        process_entities(Player.objects.pro_player(), get_and_save_player_data, 'Player')
+        fan_out_entities(Player.objects.pro_player(), get_and_save_player_data, 'Player')
     except Exception as e:
         # Logging error in case of an exception
         logger.error("Failed to check_and_save_pro_players: %s", e)
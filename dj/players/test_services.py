@@ -0,0 +1,18 @@
+import pytest
+
+from dj.players.models import Player
+from dj.players.services import save_player_data
+
+pytestmark = pytest.mark.django_db
+
+PLAYER_ID = 1000
+
+
+def test_failed_fetch_is_not_recorded_as_unchanged():
+    save_player_data(PLAYER_ID, {})
+    assert Player.objects.get(id=PLAYER_ID).payload_hash is None
+
+    player = save_player_data(PLAYER_ID, {"steamAccountId": PLAYER_ID, "matchCount": 10})
+
+    assert player.payload_hash
+    assert Player.objects.get(id=PLAYER_ID).payload_hash == player.payload_hash
@@ -5,6 +5,7 @@ from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
 from django.views.generic import ListView, DetailView
 
+from dj.common.constants import QUEUE_INTERACTIVE, PRIORITY_INTERACTIVE
 from dj.players.models import Player
 from dj.players.models import SteamAccount
 
@@ -52,7 +53,8 @@ def update_player_data(request, player_id):
 
     try:
         current_app.send_task(
-            "dj.players.tasks.get_and_save_player_data", args=[player_id]
+            "dj.players.tasks.get_and_save_player_data", args=[player_id], kwargs={"revalidate": True},
+            queue=QUEUE_INTERACTIVE, priority=PRIORITY_INTERACTIVE,
         )
         messages.success(request, 'Task "Update Player Data" is running!')
     except SteamAccount.DoesNotExist:
@@ -3,7 +3,7 @@ import logging
 from celery import shared_task
 
 from dj.common.constants import LEAGUE, TEAM, PLAYER
-from dj.common.utils import process_entities
+from dj.common.tasks import fan_out_entities
 from dj.leagues.models import League
 from dj.players.models import Player
 from dj.stats.services import update_popular_picks_bans
@@ -22,14 +22,14 @@ def task_update_popular_picks_bans(entity_id: int, entity_type: str) -> None:
 
 @shared_task
 def task_get_popular_picks_bans_leagues() -> None:
-    process_entities(League.objects.tier2(), lambda id: task_update_popular_picks_bans(id, LEAGUE), 'League')
+    fan_out_entities(League.objects.tier2(), task_update_popular_picks_bans, 'League', args=(LEAGUE,))
 
 
 @shared_task
 def task_get_popular_picks_bans_teams() -> None:
-    process_entities(Team.objects.is_pro(), lambda id: task_update_popular_picks_bans(id, TEAM), 'Team')
+    fan_out_entities(Team.objects.is_pro(), task_update_popular_picks_bans, 'Team', args=(TEAM,))
 
 
 @shared_task
 def task_get_popular_picks_bans_players() -> None:
-    process_entities(Player.objects.pro_player(), lambda id: task_update_popular_picks_bans(id, PLAYER), 'Player')
+    fan_out_entities(Player.objects.pro_player(), task_update_popular_picks_bans, 'Player', args=(PLAYER,))
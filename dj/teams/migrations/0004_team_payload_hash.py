@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0003_remove_team_pick_bans_team_pick_bans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='payload_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
@@ -37,6 +37,7 @@ class Team(BaseModel):
     is_followed = models.BooleanField(default=False, null=True)
     country_name = models.CharField(max_length=100, blank=True, null=True)
     pick_bans = models.ManyToManyField(PopularMatchPickBan, related_name="team", blank=True)
+    payload_hash = models.CharField(max_length=32, blank=True, null=True, editable=False)
     objects = TeamManager()
 
     class Meta:
@@ -1,10 +1,10 @@
 import logging
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable
 
 from django.db import transaction
 
 from dj.common.urls import get_opendota_teams, get_url_team
-from dj.common.utils import response_to_json, process_related_data
+from dj.common.utils import response_to_json, process_related_data, payload_fingerprint, bulk_upsert
 from dj.players.models import Player, TeamMember, SteamAccount
 from dj.teams.models import Team
 from dj.teams.schemas import SCHEMA_TEAM
@@ -12,25 +12,51 @@ from dj.teams.schemas import SCHEMA_TEAM
 logger = logging.getLogger(__name__)
 
 
-@transaction.atomic
-def get_and_save_team(team_id: int) -> None:
+def get_and_save_team(team_id: int, revalidate: bool = False) -> None:
     try:
-        response = response_to_json(get_url_team(team_id), SCHEMA_TEAM)
+        response = response_to_json(get_url_team(team_id), SCHEMA_TEAM, revalidate=revalidate)
         # response = load_json('dj/common/json/team-s.json')
         team_data = response if isinstance(response, dict) else {}
-        team = save_team(team_data)
-        process_related_data(team_data, 'members', save_team_member, team)
-        members = team.members.active().order_by('-last_match_id')
-        for member in members[:5]:
-            Player.objects.update_or_create(id=member.steam_account.id, defaults={
-                "team": member
-            })
+        with transaction.atomic():
+            save_team_unit(team_data)
     except Exception as e:
         logger.error(
             f"fetch_and_process_team: An error occurred during the transaction: {e}"
         )
 
 
+def save_team_unit(team_data: Dict[str, Any]) -> Optional[Team]:
+    """
+    Write a team, its members and their players, must run inside a transaction.
+
+    The team is returned untouched when its ``payload_hash`` equals the
+    fingerprint of ``team_data``. The hash is written last and only if every
+    member was saved, so that a partially failed refresh is retried.
+
+    :param team_data: Team JSON object
+    :return: The team, None if it could not be saved
+    """
+    # An empty payload is a failed fetch, it is saved but never recorded as unchanged
+    fingerprint = payload_fingerprint(team_data) if team_data else None
+    unchanged = fingerprint and Team.objects.filter(id=team_data.get("id"), payload_hash=fingerprint).first()
+    if unchanged:
+        logger.debug(f"save_team_unit: team {unchanged.id} is unchanged")
+        return unchanged
+    team = save_team(team_data)
+    if team is None:
+        return None
+    complete = process_related_data(team_data, 'members', save_team_member, team)
+    members = team.members.active().order_by('-last_match_id')
+    for member in members[:5]:
+        Player.objects.update_or_create(id=member.steam_account.id, defaults={
+            "team": member
+        })
+    if complete and fingerprint:
+        Team.objects.filter(id=team.id).update(payload_hash=fingerprint)
+        team.payload_hash = fingerprint
+    return team
+
+
 def save_team_member(member_data: Dict[str, Any], team: Team) -> Optional[TeamMember]:
     try:
         steam_account_id = member_data.get("steamAccount", {}).get("id")
@@ -50,31 +76,65 @@ def save_team_member(member_data: Dict[str, Any], team: Team) -> Optional[TeamMe
         return None
 
 
+def team_fields(team_data: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {
+        "id": team_data.get("id"),
+        "name": team_data.get("name"),
+        "tag": team_data.get("tag"),
+        "date_created": team_data.get("dateCreated"),
+        "is_pro": team_data.get("isProfessional"),
+        "logo": team_data.get("logo"),
+        "banner_logo": team_data.get("bannerLogo"),
+        "win_count": team_data.get("winCount"),
+        "loss_count": team_data.get("lossCount"),
+        "last_match_date_time": team_data.get("lastMatchDateTime"),
+        "is_followed": team_data.get("isFollowed"),
+        "country_name": team_data.get("countryName", ""),
+    }
+    rank = team_data.get("rank")
+    if rank:
+        fields["rank"] = rank
+    return fields
+
+
 def save_team(team_data: Dict[str, Any]) -> Optional[Team]:
     try:
-        defaults = {
-            "name": team_data.get("name"),
-            "tag": team_data.get("tag"),
-            "date_created": team_data.get("dateCreated"),
-            "is_pro": team_data.get("isProfessional"),
-            "logo": team_data.get("logo"),
-            "banner_logo": team_data.get("bannerLogo"),
-            "win_count": team_data.get("winCount"),
-            "loss_count": team_data.get("lossCount"),
-            "last_match_date_time": team_data.get("lastMatchDateTime"),
-            "is_followed": team_data.get("isFollowed"),
-            "country_name": team_data.get("countryName", ""),
-        }
-        rank = team_data.get("rank")
-        if rank:
-            defaults["rank"] = rank
-        team, _ = Team.objects.update_or_create(id=team_data.get("id"), defaults=defaults)
+        defaults = team_fields(team_data)
+        team, _ = Team.objects.update_or_create(id=defaults.pop("id"), defaults=defaults)
         return team
     except Exception as e:
         logger.error(f"Failed to save team: {e}")
         return None
 
 
+def save_teams(teams_data: Iterable[Dict[str, Any]]) -> int:
+    """
+    Upsert a list of teams with one ``INSERT ... ON CONFLICT (id)`` per batch.
+    As in ``save_team``, ``rank`` is only written for teams that carry one,
+    so a list without ranks keeps the stored ones.
+
+    :param teams_data: Team JSON objects
+    :return: Number of teams written
+    """
+    rows = {}
+    for team_data in teams_data:
+        row = team_fields(team_data)
+        if row["id"]:
+            # The list rewrites fields of the STRATZ payload, make the next team refresh write it again
+            row["payload_hash"] = None
+            rows[row["id"]] = row
+    for ranked in (True, False):
+        group = [row for row in rows.values() if ("rank" in row) is ranked]
+        if group:
+            bulk_upsert(
+                Team,
+                [Team(**row) for row in group],
+                unique_fields=["id"],
+                update_fields=[name for name in group[0] if name != "id"] + ["updated_at"],
+            )
+    return len(rows)
+
+
 def update_team_in_players() -> None:
     try:
         steam_acc_list = (
@@ -100,10 +160,11 @@ def fetch_and_process_teams() -> None:
         response = response_to_json(get_opendota_teams(), {})
         response_data = response if isinstance(response, dict) else {}
         teams = response_data.get("rows")
+        teams_data = []
         for team in list(teams):
             try:
                 is_pro = True if team.get("rating") >= 1200 else False
-                team_data = {
+                teams_data.append({
                     "id": team.get("team_id"),
                     "name": team.get("name"),
                     "tag": team.get("tag"),
@@ -114,10 +175,10 @@ def fetch_and_process_teams() -> None:
                     "winCount": team.get("wins"),
                     "lossCount": team.get("losses"),
                     "lastMatchDateTime": team.get("last_match_time"),
-                }
-                save_team(team_data)
+                })
             except Exception as e:
                 logger.exception(f"An error occurred: {e}")
+        save_teams(teams_data)
     except Exception as e:
         logger.error(
             f"fetch_and_process_teams: An error occurred during the transaction: {e}"
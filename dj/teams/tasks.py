@@ -2,7 +2,7 @@ import logging
 
 from celery import shared_task
 
-from dj.common.utils import process_entities
+from dj.common.tasks import fan_out_entities
 from dj.teams.models import Team
 from dj.teams.services import get_and_save_team, fetch_and_process_teams
 
@@ -18,10 +18,10 @@ def task_get_and_save_teams_list():
 
 
 @shared_task
-def get_and_save_team_data(team_id: int):
+def get_and_save_team_data(team_id: int, revalidate: bool = False):
     """Fetches and updates pro players."""
     try:
-        get_and_save_team(team_id)
+        get_and_save_team(team_id, revalidate)
     except Exception as e:
         logger.exception(f'Exception in task_get_and_save_team: {repr(e)}')
 
@@ -29,6 +29,6 @@ def get_and_save_team_data(team_id: int):
 @shared_task()
 def check_and_save_pro_teams():
     try:
-        process_entities(Team.objects.is_pro(), get_and_save_team_data, 'Team')
+        fan_out_entities(Team.objects.is_pro(), get_and_save_team_data, 'Team')
     except Exception as e:
         logger.error("Failed to task_get_and_update_pro_teams: %s", e)
@@ -0,0 +1,25 @@
+import pytest
+
+from dj.teams.models import Team
+from dj.teams.services import save_teams
+
+pytestmark = pytest.mark.django_db
+
+
+def test_save_teams_keeps_rank_when_the_list_has_none():
+    Team.objects.create(id=1, name="Old", rank=1500)
+
+    assert save_teams([{"id": 1, "name": "New"}, {"id": 2, "name": "Other"}]) == 2
+
+    team = Team.objects.get(id=1)
+    assert team.name == "New"
+    assert team.rank == 1500
+    assert Team.objects.get(id=2).rank is None
+
+
+def test_save_teams_writes_rank_when_present():
+    Team.objects.create(id=1, name="Old", rank=1500)
+
+    save_teams([{"id": 1, "name": "Ranked", "rank": 1600}, {"id": 2, "name": "Unranked"}])
+
+    assert dict(Team.objects.values_list("id", "rank")) == {1: 1600, 2: None}
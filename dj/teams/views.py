@@ -7,6 +7,7 @@ from django.views.decorators.http import require_POST
 from django.views.generic import DetailView
 from django.views.generic import ListView
 
+from dj.common.constants import QUEUE_INTERACTIVE, PRIORITY_INTERACTIVE
 from dj.leagues.models import League
 from dj.matches.models import Match
 from dj.teams.models import Team
@@ -91,7 +92,10 @@ def update_team_data(request, team_id):
 
     try:
         Team.objects.get_or_create(id=team_id)
-        current_app.send_task("dj.teams.tasks.get_and_save_team_data", args=[team_id])
+        current_app.send_task(
+            "dj.teams.tasks.get_and_save_team_data", args=[team_id], kwargs={"revalidate": True},
+            queue=QUEUE_INTERACTIVE, priority=PRIORITY_INTERACTIVE,
+        )
         messages.success(request, 'Task "Update Team Data" is running!')
     except Team.DoesNotExist:
         messages.error(request, "Team not found.")